@@ -1,16 +1,38 @@
+import argparse
+import math
+import multiprocessing
 from random import randrange
 from sys import maxsize
+import numpy as np
 
 
 class AverageCase():
-    def __init__(self, number_of_integers, bound, number_of_sequences):
+    """
+    Simulates searching sequences of random integers below a bound for a random target.
+
+    The hit rate times the bound and the average number of steps both have the expected value
+    bound * (1 - (1 - 1 / bound) ** number_of_integers), reported by find_expected_value.
+
+    generate_sequences and find_hits_and_steps keep every sequence as a list. stream_hits_and_steps
+    instead draws the sequences in NumPy blocks of about block_element_count integers and finds each
+    row's first hit with argmax, keeping only the running totals, so memory stays constant however
+    many sequences are drawn. It draws 64 bit integers, so its bound can be at most maximum_streaming_bound.
+    """
+    block_element_count = 1 << 20
+    maximum_streaming_bound = int(np.iinfo(np.int64).max)
+
+    def __init__(self, number_of_integers, bound, number_of_sequences, seed=None):
         self.number_of_integers = number_of_integers
         self.bound = bound
         self.number_of_sequences = number_of_sequences
         self.hits = 0
         self.steps = 0
         self.sequence_list = []
-        self.x = randrange(self.bound)
+        self.random_generator = np.random.default_rng(seed)
+        if seed is None:
+            self.x = randrange(self.bound)
+        else:
+            self.x = int(self.random_generator.integers(self.bound))
 
     def generate_sequences(self):
         for sequence_number in range(self.number_of_sequences):
@@ -28,8 +50,35 @@ class AverageCase():
             except ValueError:
                 self.steps += self.number_of_integers
 
+    def stream_hits_and_steps(self):
+        """Adds up the hits and steps block by block without keeping the sequences."""
+        if self.bound > self.maximum_streaming_bound:
+            raise ValueError('bound %d is above %d, which only the legacy simulation handles' % (
+                self.bound, self.maximum_streaming_bound))
+        if self.number_of_integers == 0:
+            # Empty sequences never hit and take no steps.
+            return
+        block_row_count = max(1, self.block_element_count // max(1, self.number_of_integers))
+        remaining_count = self.number_of_sequences
+        while remaining_count > 0:
+            row_count = min(block_row_count, remaining_count)
+            remaining_count -= row_count
+            block = self.random_generator.integers(self.bound, size=(row_count, self.number_of_integers),
+                                                   dtype=np.int64)
+            match_array = block == self.x
+            hit_array = match_array.any(axis=1)
+            self.hits += int(np.count_nonzero(hit_array))
+            self.steps += int(np.where(hit_array, match_array.argmax(axis=1) + 1, self.number_of_integers).sum())
+
+    @staticmethod
+    def find_expected_value(number_of_integers, bound):
+        """Returns bound * (1 - (1 - 1 / bound) ** number_of_integers), accurately even for huge bounds."""
+        return -bound * math.expm1(number_of_integers * math.log1p(-1 / bound)) if bound > 1 else 1.0
+
     def display_results(self):
-        print("%d  %f  %f" % (self.bound, self.hits*self.bound/self.number_of_sequences, self.steps/self.number_of_sequences))
+        print("%d  %f  %f  %f" % (self.bound, self.hits*self.bound/self.number_of_sequences,
+                                  self.steps/self.number_of_sequences,
+                                  self.find_expected_value(self.number_of_integers, self.bound)))
 
     @classmethod
     def run_all_steps(cls, number_of_integers, bound, number_of_sequences):
@@ -38,12 +87,51 @@ class AverageCase():
         average_case.find_hits_and_steps()
         average_case.display_results()
 
+    @classmethod
+    def run_streaming(cls, number_of_integers, bound, number_of_sequences, seed=None):
+        average_case = cls(number_of_integers, bound, number_of_sequences, seed=seed)
+        average_case.stream_hits_and_steps()
+        return average_case
+
+    @classmethod
+    def run_sweep(cls, number_of_integers, bound_list, number_of_sequences, number_of_processes=None, seed=None):
+        """
+        Streams one simulation per bound on a process pool, returning the finished cases in bound order.
+
+        Each bound gets its own child of the seed, so a seeded sweep gives the same results on any number
+        of processes.
+        """
+        seed_list = np.random.SeedSequence(seed).spawn(len(bound_list))
+        argument_list = [(number_of_integers, bound, number_of_sequences, bound_seed)
+                         for bound, bound_seed in zip(bound_list, seed_list)]
+        if number_of_processes is None:
+            number_of_processes = multiprocessing.cpu_count()
+        if number_of_processes <= 1 or len(bound_list) <= 1:
+            return [run_streaming_in_worker(arguments) for arguments in argument_list]
+        with multiprocessing.Pool(min(number_of_processes, len(bound_list))) as pool:
+            return pool.map(run_streaming_in_worker, argument_list, chunksize=1)
+
+
+def run_streaming_in_worker(arguments):
+    return AverageCase.run_streaming(*arguments)
+
+
 if __name__ == "__main__":
-    print("Bound Calculated Real")
-    AverageCase.run_all_steps(50, 30, 10000)
-    AverageCase.run_all_steps(50, 50, 10000)
-    AverageCase.run_all_steps(50, 80, 10000)
-    AverageCase.run_all_steps(50, 100, 10000)
-    AverageCase.run_all_steps(50, 1000, 10000)
-    AverageCase.run_all_steps(50, 10000, 10000)
-    AverageCase.run_all_steps(50, maxsize, 10000)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='Simulates finding a random target in random integer sequences.')
+    parser.add_argument('--integers', type=int, default=50)
+    parser.add_argument('--sequences', type=int, default=10000)
+    parser.add_argument('--bounds', type=int, nargs='+', default=[30, 50, 80, 100, 1000, 10000, maxsize])
+    parser.add_argument('--processes', type=int)
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--legacy', action='store_true', help='keep every sequence as a list, as originally')
+    arguments = parser.parse_args()
+    if not arguments.legacy and max(arguments.bounds) > AverageCase.maximum_streaming_bound:
+        parser.error('bounds above %d need --legacy' % AverageCase.maximum_streaming_bound)
+    print("Bound Calculated Real Expected")
+    if arguments.legacy:
+        for bound in arguments.bounds:
+            AverageCase.run_all_steps(arguments.integers, bound, arguments.sequences)
+    else:
+        for average_case in AverageCase.run_sweep(arguments.integers, arguments.bounds, arguments.sequences,
+                                                  number_of_processes=arguments.processes, seed=arguments.seed):
+            average_case.display_results()
@@ -0,0 +1,208 @@
+"""Runs graph operations over many files on a process pool, streaming one JSON line per finished job."""
+import argparse
+import glob
+import json
+import math
+import multiprocessing
+import sys
+import time
+import traceback
+from graph import Graph
+from query_context import QueryContext
+from result_cache import ResultCache
+
+
+class BatchRunner:
+    """
+    Loads each job's graph file and runs its operation, with the jobs spread over a process pool.
+
+    A job is a dictionary with a file (or a glob, expanded into one job per match), a layout naming the
+    file's columns, an operation, and the operation's parameters:
+
+    - cycles and components take no parameters;
+    - shortest_paths takes a source (0 by default) and an optional target;
+    - reliability takes a diameter or a diameter_list, an optional terminal_list, and optionally a
+      method (factoring or enumeration) and a time_budget.
+
+    Results arrive in the order the jobs finish, each tagged with its job number. A failing job yields
+    an error entry instead of stopping the batch.
+    """
+    layout_constructor_dict = {
+        'plain': Graph.create_graph_from_csv,
+        'weighted': Graph.create_weighted_graph_from_csv,
+        'reliability': Graph.create_reliability_graph_from_csv,
+        'reliability_weighted': Graph.create_reliability_weighted_graph_from_csv,
+        'coordinates': Graph.create_wireless_mesh_graph_from_csv,
+    }
+    operation_list = ['cycles', 'components', 'shortest_paths', 'reliability']
+    method_list = ['factoring', 'enumeration']
+    graph_parameter_list = ['file', 'layout', 'reliability_threshold', 'cutoff_radius']
+
+    def __init__(self, number_of_processes=None, use_cache=False, result_cache=None):
+        self.number_of_processes = number_of_processes or multiprocessing.cpu_count()
+        self.use_cache = use_cache
+        self.result_cache = result_cache
+
+    @staticmethod
+    def expand_jobs(job_list):
+        """Replaces each job with a glob by one job per matching file."""
+        expanded_job_list = []
+        for job in job_list:
+            if 'glob' in job:
+                for file_path in sorted(glob.glob(job['glob'])):
+                    file_job = {key: value for key, value in job.items() if key != 'glob'}
+                    file_job['file'] = file_path
+                    expanded_job_list.append(file_job)
+            else:
+                expanded_job_list.append(job)
+        return expanded_job_list
+
+    @staticmethod
+    def read_manifest(file_path):
+        """Reads a manifest holding either a JSON list of jobs or one JSON job per line."""
+        with open(file_path) as file:
+            text = file.read()
+        if text.lstrip().startswith('['):
+            return json.loads(text)
+        return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+    def run(self, job_list):
+        """Yields a result dictionary for each job as soon as it finishes."""
+        job_list = self.expand_jobs(job_list)
+        numbered_job_list = [(job_number, job, self.use_cache, self.result_cache)
+                             for job_number, job in enumerate(job_list)]
+        if self.number_of_processes <= 1 or len(job_list) <= 1:
+            for numbered_job in numbered_job_list:
+                yield run_batch_job(numbered_job)
+            return
+        with multiprocessing.Pool(self.number_of_processes) as pool:
+            yield from pool.imap_unordered(run_batch_job, numbered_job_list)
+
+    @classmethod
+    def check_job(cls, job):
+        """Raises a ValueError for a job with an unknown operation or method."""
+        if job.get('operation') not in cls.operation_list:
+            raise ValueError('unknown operation %r' % job.get('operation'))
+        if job.get('method', 'factoring') not in cls.method_list:
+            raise ValueError('unknown method %r' % job.get('method'))
+
+    @classmethod
+    def run_job(cls, job, use_cache=False, result_cache=None):
+        # Also checked before loading, so a mistyped job fails without reading its file.
+        cls.check_job(job)
+        graph = cls.load_graph(job, use_cache=use_cache)
+        graph.result_cache = result_cache
+        return cls.answer_job(graph, job)
+
+    @classmethod
+    def load_graph(cls, job, use_cache=False):
+        """Loads the job's file with the constructor for its layout, using only the graph_parameter_list keys."""
+        file_path = job['file']
+        layout = job.get('layout', 'plain')
+        if layout not in cls.layout_constructor_dict:
+            raise ValueError('unknown layout %r' % layout)
+        if layout == 'coordinates':
+            return Graph.create_wireless_mesh_graph_from_csv(
+                file_path, reliability_threshold=job.get('reliability_threshold', 0.0),
+                cutoff_radius=job.get('cutoff_radius'), use_cache=use_cache)
+        return cls.layout_constructor_dict[layout](file_path, use_cache=use_cache)
+
+    @classmethod
+    def answer_job(cls, graph, job):
+        """Runs the job's operation on an already loaded graph, which it leaves unchanged."""
+        cls.check_job(job)
+        context = QueryContext(graph)
+        operation = job['operation']
+        if operation == 'cycles':
+            return context.check_for_cycles()
+        if operation == 'components':
+            return context.find_number_of_components()
+        if operation == 'shortest_paths':
+            source = job.get('source', 0)
+            if job.get('target') is not None:
+                distance, path_list = context.find_shortest_path(source, job['target'])
+                return {'distance': cls.make_finite(distance), 'path': path_list}
+            distance_array, parent_array = graph.shortest_paths(source)
+            return {'distance': [cls.make_finite(distance) for distance in distance_array],
+                    'parent': list(parent_array)}
+        terminal_list = job.get('terminal_list')
+        if job.get('diameter_list') is not None:
+            return graph.attain_reliability_curve(job['diameter_list'], terminal_list)
+        if job.get('method', 'factoring') == 'enumeration':
+            reliability = graph.attain_reliability_for_diameter(job['diameter'], terminal_list,
+                                                                time_budget=job.get('time_budget'), context=context)
+        else:
+            reliability = graph.attain_reliability_by_factoring(job['diameter'], terminal_list,
+                                                                time_budget=job.get('time_budget'), context=context)
+        if isinstance(reliability, tuple):
+            return reliability._asdict()
+        return reliability
+
+    @staticmethod
+    def make_finite(distance):
+        """JSON has no infinity, so unreachable distances are written as null."""
+        return None if math.isinf(distance) else distance
+
+
+def run_batch_job(numbered_job):
+    job_number, job, use_cache, result_cache = numbered_job
+    start_time = time.perf_counter()
+    result = {'job': job_number, 'file': job.get('file'), 'operation': job.get('operation')}
+    try:
+        result['result'] = BatchRunner.run_job(job, use_cache=use_cache, result_cache=result_cache)
+    except Exception as exception:
+        result['error'] = ''.join(traceback.format_exception_only(type(exception), exception)).strip()
+    result['seconds'] = time.perf_counter() - start_time
+    return result
+
+
+def main(argument_list=None):
+    parser = argparse.ArgumentParser(description='Runs graph operations over many files, one JSON line per job.')
+    parser.add_argument('pattern', nargs='*', help='graph files or globs such as examplegraphs/*.csv')
+    parser.add_argument('--manifest', help='JSON list or JSON lines file of jobs')
+    parser.add_argument('--layout', default='plain', choices=list(BatchRunner.layout_constructor_dict))
+    parser.add_argument('--operation', nargs='+', default=['cycles'], choices=BatchRunner.operation_list)
+    parser.add_argument('--source', type=int, default=0)
+    parser.add_argument('--target', type=int)
+    parser.add_argument('--diameter', type=float, nargs='+', help='one diameter, or several for a curve')
+    parser.add_argument('--terminals', type=int, nargs='+')
+    parser.add_argument('--method', default='factoring', choices=BatchRunner.method_list)
+    parser.add_argument('--time-budget', type=float)
+    parser.add_argument('--processes', type=int)
+    parser.add_argument('--cache', action='store_true', help='load through memory-mapped sidecar caches')
+    parser.add_argument('--result-cache', help='SQLite file of reliability results reused across runs')
+    parser.add_argument('--output', help='file to write the JSON lines to instead of standard output')
+    arguments = parser.parse_args(argument_list)
+    job_list = BatchRunner.read_manifest(arguments.manifest) if arguments.manifest else []
+    for pattern in arguments.pattern:
+        for operation in arguments.operation:
+            job = {'glob': pattern, 'layout': arguments.layout, 'operation': operation, 'source': arguments.source,
+                   'target': arguments.target, 'terminal_list': arguments.terminals, 'method': arguments.method,
+                   'time_budget': arguments.time_budget}
+            if operation == 'reliability':
+                if not arguments.diameter:
+                    parser.error('reliability needs --diameter')
+                if len(arguments.diameter) == 1:
+                    job['diameter'] = arguments.diameter[0]
+                else:
+                    job['diameter_list'] = arguments.diameter
+            job_list.append(job)
+    if not job_list:
+        parser.error('give a manifest or at least one file pattern')
+    result_cache = ResultCache(arguments.result_cache) if arguments.result_cache else None
+    runner = BatchRunner(number_of_processes=arguments.processes, use_cache=arguments.cache, result_cache=result_cache)
+    output_file = open(arguments.output, 'w') if arguments.output else sys.stdout
+    failure_count = 0
+    try:
+        for result in runner.run(job_list):
+            failure_count += 'error' in result
+            output_file.write(json.dumps(result) + '\n')
+            output_file.flush()
+    finally:
+        if output_file is not sys.stdout:
+            output_file.close()
+    return 1 if failure_count else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
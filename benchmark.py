@@ -0,0 +1,221 @@
+"""Times the graph operations on seeded synthetic graphs and compares the results against a saved baseline."""
+import argparse
+import csv
+import json
+import math
+import os
+import random
+import tempfile
+import time
+from graph import Graph
+
+
+class Benchmark:
+    """
+    Runs each graph operation over a sweep of generated graph sizes.
+
+    Every generator is seeded, so a run measures the same graphs as the baseline it is compared against.
+    Each timing is the best of several repeats, with any state reset done outside the timed call. Results
+    are keyed by 'generator/size/operation' in seconds.
+    """
+    default_size_list_dict = {
+        'grid': [16, 32, 64],
+        'random_geometric': [500, 2000, 8000],
+        'erdos_renyi': [500, 2000, 8000],
+        'long_path': [1000, 10000, 100000],
+    }
+    quick_size_list_dict = {
+        'grid': [8, 16],
+        'random_geometric': [200, 500],
+        'erdos_renyi': [200, 500],
+        'long_path': [1000, 10000],
+    }
+    # The legacy enumeration is exponential in the number of edges, so it gets its own small sizes.
+    reliability_size_list_dict = {
+        'grid': [2, 3],
+        'long_path': [6, 10],
+    }
+    average_degree = 4
+    reliability_coefficient = 0.001
+
+    def __init__(self, size_list_dict=None, repeat=3, seed=0, directory=None):
+        self.size_list_dict = size_list_dict or self.default_size_list_dict
+        self.repeat = repeat
+        self.seed = seed
+        self.directory = directory
+
+    @staticmethod
+    def generate_grid(side, random_generator):
+        """Returns the edges of a side by side grid with random reliabilities and weights."""
+        edge_list = []
+        for row in range(side):
+            for column in range(side):
+                vertex_index = row * side + column
+                if column + 1 < side:
+                    edge_list.append((vertex_index, vertex_index + 1))
+                if row + 1 < side:
+                    edge_list.append((vertex_index, vertex_index + side))
+        return [(vertex1, vertex2, random_generator.uniform(0.5, 1.0), random_generator.randint(1, 10))
+                for vertex1, vertex2 in edge_list]
+
+    @classmethod
+    def generate_erdos_renyi(cls, number_of_vertices, random_generator):
+        """Returns the edges of a G(n, p) graph with the class's expected average degree."""
+        probability = min(1.0, cls.average_degree / max(number_of_vertices - 1, 1))
+        edge_list = []
+        # Skips ahead geometrically between edges, so the cost follows the number of edges, not pairs.
+        vertex1, vertex2 = 1, -1
+        log_failure = math.log(1.0 - probability) if probability < 1 else None
+        while vertex1 < number_of_vertices:
+            if log_failure is None:
+                vertex2 += 1
+            else:
+                vertex2 += 1 + int(math.log(1.0 - random_generator.random()) / log_failure)
+            while vertex2 >= vertex1 and vertex1 < number_of_vertices:
+                vertex2 -= vertex1
+                vertex1 += 1
+            if vertex1 < number_of_vertices:
+                edge_list.append((vertex1, vertex2, random_generator.uniform(0.5, 1.0),
+                                  random_generator.randint(1, 10)))
+        return edge_list
+
+    @staticmethod
+    def generate_long_path(number_of_vertices, random_generator):
+        """Returns the edges of a single path through every vertex."""
+        return [(vertex_index, vertex_index + 1, random_generator.uniform(0.5, 1.0), random_generator.randint(1, 10))
+                for vertex_index in range(number_of_vertices - 1)]
+
+    @classmethod
+    def generate_random_geometric(cls, number_of_vertices, random_generator):
+        """Returns positions in a square sized so the mesh's expected average degree matches the class's."""
+        cutoff_radius = math.sqrt(1 / cls.reliability_coefficient)
+        side = math.sqrt(number_of_vertices * math.pi * cutoff_radius ** 2 / cls.average_degree)
+        return [(random_generator.uniform(0, side), random_generator.uniform(0, side))
+                for _ in range(number_of_vertices)]
+
+    @staticmethod
+    def write_csv(file_path, row_list):
+        with open(file_path, 'w', newline='') as file:
+            csv.writer(file).writerows(row_list)
+
+    def time_call(self, function, setup=None):
+        """Returns the best time of the repeats, calling setup untimed before each one."""
+        best_time = float("inf")
+        for _ in range(self.repeat):
+            if setup is not None:
+                setup()
+            start_time = time.perf_counter()
+            function()
+            best_time = min(best_time, time.perf_counter() - start_time)
+        return best_time
+
+    def run(self, include_reliability=True):
+        with tempfile.TemporaryDirectory(dir=self.directory) as directory:
+            result_dict = {}
+            for generator_name, size_list in self.size_list_dict.items():
+                for size in size_list:
+                    result_dict.update(self.run_size(directory, generator_name, size))
+            if include_reliability:
+                for generator_name, size_list in self.reliability_size_list_dict.items():
+                    for size in size_list:
+                        result_dict.update(self.run_reliability_size(directory, generator_name, size))
+            return result_dict
+
+    def run_size(self, directory, generator_name, size):
+        random_generator = random.Random('%s/%s/%s' % (self.seed, generator_name, size))
+        prefix = '%s/%d/' % (generator_name, size)
+        file_path = os.path.join(directory, '%s_%d.csv' % (generator_name, size))
+        result_dict = {}
+        if generator_name == 'random_geometric':
+            self.write_csv(file_path, self.generate_random_geometric(size, random_generator))
+            result_dict[prefix + 'create_wireless_mesh_graph_from_csv'] = self.time_call(
+                lambda: Graph.create_wireless_mesh_graph_from_csv(file_path))
+            graph = Graph.create_wireless_mesh_graph_from_csv(file_path)
+        else:
+            edge_list = getattr(self, 'generate_' + generator_name)(size, random_generator)
+            self.write_csv(file_path, edge_list)
+            # The plain layout takes exactly two columns, so it is timed on a file of the same edges without the rest.
+            plain_file_path = os.path.join(directory, '%s_%d_plain.csv' % (generator_name, size))
+            self.write_csv(plain_file_path, [edge[:2] for edge in edge_list])
+            result_dict[prefix + 'create_graph_from_csv'] = self.time_call(
+                lambda: Graph.create_graph_from_csv(plain_file_path))
+            result_dict[prefix + 'create_reliability_weighted_graph_from_csv'] = self.time_call(
+                lambda: Graph.create_reliability_weighted_graph_from_csv(file_path))
+            graph = Graph.create_reliability_weighted_graph_from_csv(file_path)
+        result_dict[prefix + 'check_for_cycles'] = self.time_call(graph.check_for_cycles, setup=graph.reset_graph)
+        result_dict[prefix + 'find_number_of_components'] = self.time_call(graph.find_number_of_components,
+                                                                           setup=graph.reset_graph)
+        result_dict[prefix + 'dijkstra_algorithm'] = self.time_call(lambda: graph.dijkstra_algorithm(0),
+                                                                    setup=graph.reset_graph)
+        return result_dict
+
+    def run_reliability_size(self, directory, generator_name, size):
+        random_generator = random.Random('%s/%s/%s/reliability' % (self.seed, generator_name, size))
+        file_path = os.path.join(directory, '%s_%d_reliability.csv' % (generator_name, size))
+        edge_list = [(vertex1, vertex2, reliability, 1)
+                     for vertex1, vertex2, reliability, _ in getattr(self, 'generate_' + generator_name)(size,
+                                                                                                  random_generator)]
+        self.write_csv(file_path, edge_list)
+        graph = Graph.create_reliability_weighted_graph_from_csv(file_path)
+        diameter = graph.number_of_vertices - 1
+        prefix = '%s/%d/' % (generator_name, size)
+        return {
+            prefix + 'attain_reliability_for_diameter': self.time_call(
+                lambda: graph.attain_reliability_for_diameter(diameter), setup=graph.reset_graph),
+            prefix + 'attain_reliability_by_factoring': self.time_call(
+                lambda: graph.attain_reliability_by_factoring(diameter), setup=graph.reset_graph),
+        }
+
+    @staticmethod
+    def save_baseline(result_dict, file_path):
+        with open(file_path, 'w') as file:
+            json.dump(result_dict, file, indent=2, sort_keys=True)
+
+    @staticmethod
+    def load_baseline(file_path):
+        with open(file_path) as file:
+            return json.load(file)
+
+    @staticmethod
+    def find_regressions(result_dict, baseline_dict, threshold=0.25, minimum_time=0.001):
+        """
+        Returns (name, baseline time, time, ratio) for each timing that is more than the threshold slower.
+
+        Timings under minimum_time in both runs are skipped, since their noise swamps any difference.
+        """
+        regression_list = []
+        for name, seconds in sorted(result_dict.items()):
+            baseline_seconds = baseline_dict.get(name)
+            if baseline_seconds is None or max(seconds, baseline_seconds) < minimum_time:
+                continue
+            ratio = seconds / baseline_seconds if baseline_seconds > 0 else float("inf")
+            if ratio > 1 + threshold:
+                regression_list.append((name, baseline_seconds, seconds, ratio))
+        return regression_list
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Times the graph operations on seeded synthetic graphs.')
+    parser.add_argument('--baseline', default='benchmark_baseline.json', help='baseline JSON file')
+    parser.add_argument('--save', action='store_true', help='write this run as the new baseline')
+    parser.add_argument('--threshold', type=float, default=0.25, help='slowdown ratio flagged as a regression')
+    parser.add_argument('--quick', action='store_true', help='use the smaller size sweep')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    arguments = parser.parse_args()
+    benchmark = Benchmark(Benchmark.quick_size_list_dict if arguments.quick else None, repeat=arguments.repeat,
+                          seed=arguments.seed)
+    result_dict = benchmark.run()
+    for name, seconds in sorted(result_dict.items()):
+        print('%-70s %10.6f' % (name, seconds))
+    if arguments.save:
+        Benchmark.save_baseline(result_dict, arguments.baseline)
+        print('Saved baseline to %s' % arguments.baseline)
+    elif os.path.exists(arguments.baseline):
+        regression_list = Benchmark.find_regressions(result_dict, Benchmark.load_baseline(arguments.baseline),
+                                                     threshold=arguments.threshold)
+        for name, baseline_seconds, seconds, ratio in regression_list:
+            print('REGRESSION %s: %.6f -> %.6f (%.2fx)' % (name, baseline_seconds, seconds, ratio))
+        if regression_list:
+            raise SystemExit(1)
+        print('No regressions above %.0f%%' % (100 * arguments.threshold))
@@ -0,0 +1,2 @@
+# Being the rootdir conftest, this puts the top-level modules on sys.path for the tests under tests/, from any
+# working directory. The tests find the example graphs through brute_force.example_graph_path.
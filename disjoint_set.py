@@ -0,0 +1,52 @@
+"""Disjoint set (union-find) index over a graph's vertices."""
+from array import array
+
+
+class DisjointSet:
+    """
+    Tracks the connected components of a graph as edges are added.
+
+    Uses union by size and path halving, so each operation takes near-constant amortized time. Edges
+    are only ever added, so a graph drops its index when an edge is removed or restored. Any edge
+    joining two vertices that are already connected closes a cycle, so parallel edges and self-loops
+    count as cycles here.
+    """
+    def __init__(self, size=0):
+        self.parent_array = array('q', range(size))
+        self.size_array = array('q', [1]) * size
+        self.number_of_components = size
+        self.has_a_cycle = False
+
+    def add_element(self):
+        label = len(self.parent_array)
+        self.parent_array.append(label)
+        self.size_array.append(1)
+        self.number_of_components += 1
+        return label
+
+    def find(self, element):
+        parent_array = self.parent_array
+        while parent_array[element] != element:
+            parent_array[element] = parent_array[parent_array[element]]
+            element = parent_array[element]
+        return element
+
+    def union(self, element1, element2):
+        """Merges the two elements' sets, returning False if they were already in the same set."""
+        root1 = self.find(element1)
+        root2 = self.find(element2)
+        if root1 == root2:
+            self.has_a_cycle = True
+            return False
+        if self.size_array[root1] < self.size_array[root2]:
+            root1, root2 = root2, root1
+        self.parent_array[root2] = root1
+        self.size_array[root1] += self.size_array[root2]
+        self.number_of_components -= 1
+        return True
+
+    def in_same_set(self, element1, element2):
+        return self.find(element1) == self.find(element2)
+
+    def get_set_size(self, element):
+        return self.size_array[self.find(element)]
@@ -0,0 +1,192 @@
+"""Shortest path tree maintained through edge insertions, removals and weight changes."""
+import heapq
+from array import array
+
+
+class DynamicShortestPaths:
+    """
+    Keeps the distances and shortest path tree from one or more sources as a graph's edges change.
+
+    An edge that gets shorter (or is inserted) starts a Dijkstra from its far endpoint that only follows
+    strict improvements. An edge that gets longer (or is removed) only matters if it is a tree edge: the
+    subtree below it is walked in order of distance, and each vertex that still has a neighbor outside
+    the damaged part at the same, smaller distance is simply reattached there, keeping its own subtree.
+    Only the vertices left without one lose their distance, and they are settled again by a Dijkstra
+    seeded from their intact neighbors. So each update costs time in proportion to the vertices it
+    examines and their edges, not to the whole graph. Weights must not be negative.
+
+    The graph calls insert_edge, remove_edge, change_weight and add_vertex itself once the index is
+    enabled with Graph.enable_shortest_path_index. Edges added since the graph last built its adjacency
+    arrays are kept in a small adjacency of their own, so updates never rebuild the graph's arrays.
+    """
+    def __init__(self, graph, source_list):
+        self.graph = graph
+        self.source_list = list(source_list)
+        graph.build_adjacency_arrays()
+        self.added_adjacency_dict = {}
+        self.examined_vertex_count = 0
+        self.rebuild()
+
+    def rebuild(self):
+        """Recomputes the whole tree from the sources."""
+        vertex_count = self.graph.number_of_vertices
+        self.distance_array = array('d', [float("inf")]) * vertex_count
+        self.parent_array = array('q', [-1]) * vertex_count
+        self.parent_edge_array = array('q', [-1]) * vertex_count
+        self.child_set_list = [set() for _ in range(vertex_count)]
+        heap = []
+        for source in self.source_list:
+            self.distance_array[source] = 0.0
+            heap.append((0.0, source))
+        self.examined_vertex_count = 0
+        self.propagate(heap)
+
+    def get_adjacent_edges(self, vertex_index):
+        """Yields each (adjacent vertex, edge index) pair of the vertex whose edge is not removed."""
+        graph = self.graph
+        edge_removed_array = graph.edge_removed_array
+        adjacency_offset_array = graph.adjacency_offset_array
+        adjacency_vertex_array = graph.adjacency_vertex_array
+        adjacency_edge_array = graph.adjacency_edge_array
+        # The adjacency arrays hold two entries per edge they were built with, whether or not they are stale.
+        covered_edge_count = len(adjacency_edge_array) // 2
+        if vertex_index + 1 < len(adjacency_offset_array):
+            for offset in range(adjacency_offset_array[vertex_index], adjacency_offset_array[vertex_index + 1]):
+                edge_index = adjacency_edge_array[offset]
+                if not edge_removed_array[edge_index]:
+                    yield adjacency_vertex_array[offset], edge_index
+        for adjacent_vertex, edge_index in self.added_adjacency_dict.get(vertex_index, ()):
+            if edge_index >= covered_edge_count and not edge_removed_array[edge_index]:
+                yield adjacent_vertex, edge_index
+
+    def set_parent(self, vertex_index, parent, edge_index):
+        old_parent = self.parent_array[vertex_index]
+        if old_parent != -1:
+            self.child_set_list[old_parent].discard(vertex_index)
+        self.parent_array[vertex_index] = parent
+        self.parent_edge_array[vertex_index] = edge_index
+        if parent != -1:
+            self.child_set_list[parent].add(vertex_index)
+
+    def propagate(self, heap):
+        """Runs Dijkstra from the heap's (distance, vertex) entries, following only strict improvements."""
+        distance_array = self.distance_array
+        edge_weight_array = self.graph.edge_weight_array
+        while heap:
+            distance, vertex_index = heapq.heappop(heap)
+            if distance > distance_array[vertex_index]:
+                continue
+            self.examined_vertex_count += 1
+            for adjacent_vertex, edge_index in self.get_adjacent_edges(vertex_index):
+                new_distance = distance + edge_weight_array[edge_index]
+                if new_distance < distance_array[adjacent_vertex]:
+                    distance_array[adjacent_vertex] = new_distance
+                    self.set_parent(adjacent_vertex, vertex_index, edge_index)
+                    heapq.heappush(heap, (new_distance, adjacent_vertex))
+
+    def relax_edge(self, edge_index, heap):
+        """Pushes each endpoint that the edge brings closer to the sources."""
+        graph = self.graph
+        if graph.edge_removed_array[edge_index]:
+            return
+        vertex1 = graph.edge_vertex1_array[edge_index]
+        vertex2 = graph.edge_vertex2_array[edge_index]
+        weight = graph.edge_weight_array[edge_index]
+        distance_array = self.distance_array
+        for vertex_index, adjacent_vertex in [(vertex1, vertex2), (vertex2, vertex1)]:
+            new_distance = distance_array[vertex_index] + weight
+            if new_distance < distance_array[adjacent_vertex]:
+                distance_array[adjacent_vertex] = new_distance
+                self.set_parent(adjacent_vertex, vertex_index, edge_index)
+                heapq.heappush(heap, (new_distance, adjacent_vertex))
+
+    def add_vertex(self):
+        self.distance_array.append(float("inf"))
+        self.parent_array.append(-1)
+        self.parent_edge_array.append(-1)
+        self.child_set_list.append(set())
+
+    def insert_edges(self, edge_index_list):
+        """Updates the tree for edges that were added or are no longer removed."""
+        graph = self.graph
+        self.examined_vertex_count = 0
+        covered_edge_count = len(graph.adjacency_edge_array) // 2
+        heap = []
+        for edge_index in edge_index_list:
+            if edge_index >= covered_edge_count:
+                vertex1 = graph.edge_vertex1_array[edge_index]
+                vertex2 = graph.edge_vertex2_array[edge_index]
+                self.added_adjacency_dict.setdefault(vertex1, []).append((vertex2, edge_index))
+                if vertex2 != vertex1:
+                    self.added_adjacency_dict.setdefault(vertex2, []).append((vertex1, edge_index))
+            self.relax_edge(edge_index, heap)
+        self.propagate(heap)
+
+    def insert_edge(self, edge_index):
+        self.insert_edges([edge_index])
+
+    def remove_edge(self, edge_index):
+        """Updates the tree for an edge that was just removed."""
+        self.examined_vertex_count = 0
+        self.repair_tree_edge(edge_index)
+
+    def change_weight(self, edge_index, old_weight):
+        """Updates the tree for an edge whose weight was just changed from old_weight."""
+        self.examined_vertex_count = 0
+        if self.graph.edge_weight_array[edge_index] < old_weight:
+            heap = []
+            self.relax_edge(edge_index, heap)
+            self.propagate(heap)
+        elif self.graph.edge_weight_array[edge_index] > old_weight:
+            self.repair_tree_edge(edge_index)
+
+    def repair_tree_edge(self, edge_index):
+        """Repairs the subtree hanging from the edge, if it is a tree edge that got longer or was removed."""
+        graph = self.graph
+        for vertex_index in [graph.edge_vertex1_array[edge_index], graph.edge_vertex2_array[edge_index]]:
+            if self.parent_edge_array[vertex_index] == edge_index:
+                self.repair_subtree(vertex_index)
+                return
+
+    def repair_subtree(self, root):
+        distance_array = self.distance_array
+        edge_weight_array = self.graph.edge_weight_array
+        # Walks the subtree in order of old distance, so every possible new parent has been decided on.
+        heap = [(distance_array[root], root)]
+        invalid_set = set()
+        while heap:
+            distance, vertex_index = heapq.heappop(heap)
+            self.examined_vertex_count += 1
+            for adjacent_vertex, edge_index in self.get_adjacent_edges(vertex_index):
+                # A strictly closer parent cannot lie in the vertex's own subtree.
+                if adjacent_vertex not in invalid_set and distance_array[adjacent_vertex] < distance and \
+                        distance_array[adjacent_vertex] + edge_weight_array[edge_index] == distance:
+                    self.set_parent(vertex_index, adjacent_vertex, edge_index)
+                    break
+            else:
+                invalid_set.add(vertex_index)
+                for child in self.child_set_list[vertex_index]:
+                    heapq.heappush(heap, (distance_array[child], child))
+        for vertex_index in invalid_set:
+            distance_array[vertex_index] = float("inf")
+            self.set_parent(vertex_index, -1, -1)
+        heap = []
+        for vertex_index in invalid_set:
+            for adjacent_vertex, edge_index in self.get_adjacent_edges(vertex_index):
+                new_distance = distance_array[adjacent_vertex] + edge_weight_array[edge_index]
+                if adjacent_vertex not in invalid_set and new_distance < distance_array[vertex_index]:
+                    distance_array[vertex_index] = new_distance
+                    self.set_parent(vertex_index, adjacent_vertex, edge_index)
+            if distance_array[vertex_index] < float("inf"):
+                heapq.heappush(heap, (distance_array[vertex_index], vertex_index))
+        self.propagate(heap)
+
+    def get_path(self, vertex_index):
+        """Returns the vertices from the nearest source to the vertex, or [] if it cannot be reached."""
+        if self.distance_array[vertex_index] == float("inf"):
+            return []
+        path_list = [vertex_index]
+        while self.parent_array[path_list[-1]] != -1:
+            path_list.append(self.parent_array[path_list[-1]])
+        path_list.reverse()
+        return path_list
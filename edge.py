@@ -1,7 +1,71 @@
+"""Edge view onto a graph's edge arrays."""
+from collections.abc import Sequence
+
+
 class Edge:
-    def __init__(self, vertex1, vertex2, removed=False, reliability=1, weight=1):
-        self.vertex_list = [vertex1, vertex2]
-        self.vertex_list.sort()
-        self.reliability = reliability
-        self.removed = removed
-        self.weight = weight
+    """A single edge of a graph, reading and writing the graph's arrays."""
+    def __init__(self, graph, index):
+        self.graph = graph
+        self.index = index
+
+    @property
+    def vertex_list(self):
+        vertex_list = [self.graph.edge_vertex1_array[self.index], self.graph.edge_vertex2_array[self.index]]
+        vertex_list.sort()
+        return vertex_list
+
+    @property
+    def reliability(self):
+        return self.graph.edge_reliability_array[self.index]
+
+    @reliability.setter
+    def reliability(self, reliability):
+        self.graph.make_arrays_writable()
+        self.graph.edge_reliability_array[self.index] = reliability
+
+    @property
+    def weight(self):
+        return self.graph.edge_weight_array[self.index]
+
+    @weight.setter
+    def weight(self, weight):
+        self.graph.make_arrays_writable()
+        old_weight = self.graph.edge_weight_array[self.index]
+        self.graph.edge_weight_array[self.index] = weight
+        if self.graph.shortest_path_index is not None:
+            self.graph.shortest_path_index.change_weight(self.index, old_weight)
+
+    @property
+    def removed(self):
+        return bool(self.graph.edge_removed_array[self.index])
+
+    @removed.setter
+    def removed(self, removed):
+        self.graph.ensure_mutable()
+        was_removed = self.graph.edge_removed_array[self.index]
+        self.graph.edge_removed_array[self.index] = removed
+        if bool(was_removed) != bool(removed):
+            self.graph.component_index = None
+        if self.graph.shortest_path_index is not None and bool(was_removed) != bool(removed):
+            if removed:
+                self.graph.shortest_path_index.remove_edge(self.index)
+            else:
+                self.graph.shortest_path_index.insert_edge(self.index)
+
+
+class EdgeList(Sequence):
+    """A list-like view of every edge in a graph."""
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __len__(self):
+        return len(self.graph.edge_vertex1_array)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [Edge(self.graph, edge_index) for edge_index in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('edge index out of range')
+        return Edge(self.graph, index)
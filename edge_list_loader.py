@@ -0,0 +1,223 @@
+"""Streams edge list files into graph arrays and caches them in a memory-mapped binary file."""
+import csv
+import itertools
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+
+class EdgeListLoader:
+    """
+    Loads the csv layouts accepted by the Graph constructors without holding the rows in memory.
+
+    Rows are read in chunks and converted column by column into typed arrays, tracking the largest
+    vertex label as they go. With caching on, the finished graph (including its compressed sparse row
+    adjacency) is written to a sidecar file next to the csv. Later loads memory-map that file, so the
+    graph's arrays are views onto the page cache and are shared by every process that maps it.
+
+    Every non-empty row must have exactly the layout's number of columns, and a ValueError names the first
+    row that does not. (The original constructors ignored extra columns, except that the plain layout
+    counted them as vertex labels, so a weighted file loaded as plain gained isolated vertices.)
+    """
+    layout_column_count_dict = {
+        'plain': 2,
+        'weighted': 3,
+        'reliability': 3,
+        'reliability_weighted': 4,
+        'coordinates': 2,
+    }
+    layout_list = list(layout_column_count_dict)
+    cache_suffix = '.graphbin'
+    magic = b'GRAPHCSR'
+    version = 1
+    # magic, version, layout, byte order, flags, vertices, edges, csv size, csv mtime, mesh coefficient, mesh radius
+    header_struct = struct.Struct('<8sIIcB6xqqqqdd')
+    header_size = 128
+
+    def __init__(self, chunk_size=65536, use_cache=False, cache_path=None):
+        self.chunk_size = chunk_size
+        self.use_cache = use_cache
+        self.cache_path = cache_path
+
+    def load(self, file_path, layout, graph_class, mesh_builder=None):
+        """Loads a graph from a csv file, through the sidecar cache when caching is on."""
+        if layout not in self.layout_column_count_dict:
+            raise ValueError('unknown edge list layout %r' % layout)
+        if layout == 'coordinates' and mesh_builder is None:
+            from wireless_mesh import WirelessMeshBuilder
+            mesh_builder = WirelessMeshBuilder()
+        cache_path = self.cache_path or file_path + self.cache_suffix
+        if self.use_cache:
+            graph = self.map_cache(cache_path, graph_class=graph_class, source_path=file_path, layout=layout,
+                                   mesh_builder=mesh_builder)
+            if graph is not None:
+                return graph
+        graph = self.parse_csv(file_path, layout, graph_class=graph_class, mesh_builder=mesh_builder)
+        if self.use_cache:
+            self.write_cache(graph, cache_path, file_path, layout, mesh_builder=mesh_builder)
+        return graph
+
+    def read_chunks(self, file_path, column_count):
+        """Yields lists of columns, each column holding one chunk's worth of strings."""
+        with open(file_path, newline='') as file:
+            reader = csv.reader(file)
+            while True:
+                row_list = list(itertools.islice(reader, self.chunk_size))
+                if not row_list:
+                    return
+                first_row_number = reader.line_num - len(row_list) + 1
+                for row_number, row in enumerate(row_list, first_row_number):
+                    if row and len(row) != column_count:
+                        raise ValueError('%s, row %d: expected %d columns, found %d' % (
+                            file_path, row_number, column_count, len(row)))
+                row_list = [row for row in row_list if row]
+                if row_list:
+                    yield list(zip(*row_list))
+
+    def parse_csv(self, file_path, layout, graph_class, mesh_builder=None):
+        column_count = self.layout_column_count_dict[layout]
+        graph = graph_class()
+        if layout == 'coordinates':
+            position_array = array('d')
+            for column_list in self.read_chunks(file_path, column_count):
+                chunk_array = array('d', [0.0]) * (2 * len(column_list[0]))
+                chunk_array[0::2] = array('d', map(float, column_list[0]))
+                chunk_array[1::2] = array('d', map(float, column_list[1]))
+                position_array.extend(chunk_array)
+            return mesh_builder.build_graph(position_array, graph_class=graph_class)
+        graph.using_weight = layout in ('weighted', 'reliability_weighted')
+        graph.using_reliability = layout in ('reliability', 'reliability_weighted')
+        vertex1_array = array('q')
+        vertex2_array = array('q')
+        weight_array = array('d')
+        reliability_array = array('d')
+        maximum_vertex = -1
+        for column_list in self.read_chunks(file_path, column_count):
+            vertex1_chunk = array('q', map(int, column_list[0]))
+            vertex2_chunk = array('q', map(int, column_list[1]))
+            maximum_vertex = max(maximum_vertex, max(vertex1_chunk), max(vertex2_chunk))
+            vertex1_array.extend(vertex1_chunk)
+            vertex2_array.extend(vertex2_chunk)
+            if layout == 'weighted':
+                weight_array.extend(array('d', map(float, column_list[2])))
+            elif layout == 'reliability':
+                reliability_array.extend(array('d', map(float, column_list[2])))
+            elif layout == 'reliability_weighted':
+                reliability_array.extend(array('d', map(float, column_list[2])))
+                weight_array.extend(array('d', map(float, column_list[3])))
+        number_of_edges = len(vertex1_array)
+        if not weight_array:
+            weight_array = array('d', [1.0]) * number_of_edges
+        if not reliability_array:
+            reliability_array = array('d', [1.0]) * number_of_edges
+        graph.initialize_with_size(maximum_vertex + 1)
+        graph.edge_vertex1_array = vertex1_array
+        graph.edge_vertex2_array = vertex2_array
+        graph.edge_weight_array = weight_array
+        graph.edge_reliability_array = reliability_array
+        graph.edge_removed_array = bytearray(number_of_edges)
+        graph.number_of_edges = number_of_edges
+        graph.adjacency_arrays_stale = True
+        return graph
+
+    def write_cache(self, graph, cache_path, source_path, layout, mesh_builder=None):
+        """Writes the graph's arrays after a fixed size header; every section is 8 byte aligned."""
+        graph.build_adjacency_arrays()
+        source_stat = os.stat(source_path)
+        flags = (graph.using_weight << 0) | (graph.using_reliability << 1) | \
+                ((graph.vertex_position_array is not None) << 2)
+        header = self.header_struct.pack(
+            self.magic, self.version, self.layout_list.index(layout), sys.byteorder[0].encode(), flags,
+            graph.number_of_vertices, graph.number_of_edges, source_stat.st_size, source_stat.st_mtime_ns,
+            *self.get_mesh_parameters(layout, mesh_builder))
+        temporary_path = '%s.%d.tmp' % (cache_path, os.getpid())
+        with open(temporary_path, 'wb') as file:
+            file.write(header.ljust(self.header_size, b'\0'))
+            for array_name in self.get_array_name_list(graph.vertex_position_array is not None):
+                file.write(getattr(graph, array_name).tobytes())
+        # Readers either see the previous cache or the complete new one.
+        os.replace(temporary_path, cache_path)
+
+    def map_cache(self, cache_path, graph_class, source_path=None, layout=None, mesh_builder=None):
+        """Maps a cache file into a new graph, or returns None if it is missing or out of date."""
+        try:
+            file = open(cache_path, 'rb')
+        except FileNotFoundError:
+            return None
+        with file:
+            header = file.read(self.header_size)
+            if len(header) < self.header_size:
+                return None
+            (magic, version, layout_number, byte_order, flags, number_of_vertices, number_of_edges, source_size,
+             source_mtime_ns, mesh_coefficient, mesh_radius) = self.header_struct.unpack_from(header)
+            if magic != self.magic or version != self.version or byte_order != sys.byteorder[0].encode():
+                return None
+            if layout is not None and self.layout_list[layout_number] != layout:
+                return None
+            if layout is not None and (mesh_coefficient, mesh_radius) != self.get_mesh_parameters(layout, mesh_builder):
+                return None
+            if source_path is not None:
+                source_stat = os.stat(source_path)
+                if (source_stat.st_size, source_stat.st_mtime_ns) != (source_size, source_mtime_ns):
+                    return None
+            memory_map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        graph = graph_class()
+        graph.using_weight = bool(flags & 1)
+        graph.using_reliability = bool(flags & 2)
+        graph.number_of_vertices = number_of_vertices
+        graph.number_of_edges = number_of_edges
+        self.attach_memory_map(graph, memory_map, bool(flags & 4))
+        graph.memory_map_path = cache_path
+        graph.edge_removed_array = bytearray(number_of_edges)
+        graph.reset_graph()
+        return graph
+
+    @classmethod
+    def attach_memory_map(cls, graph, memory_map, has_positions):
+        """Points the graph's structural arrays at their sections of the mapped file."""
+        view = memoryview(memory_map)
+        length_dict = {
+            'edge_vertex1_array': graph.number_of_edges,
+            'edge_vertex2_array': graph.number_of_edges,
+            'edge_weight_array': graph.number_of_edges,
+            'edge_reliability_array': graph.number_of_edges,
+            'adjacency_offset_array': graph.number_of_vertices + 1,
+            'adjacency_vertex_array': 2 * graph.number_of_edges,
+            'adjacency_edge_array': 2 * graph.number_of_edges,
+            'vertex_position_array': 2 * graph.number_of_vertices,
+        }
+        offset = cls.header_size
+        for array_name in cls.get_array_name_list(has_positions):
+            typecode = 'd' if array_name in ('edge_weight_array', 'edge_reliability_array',
+                                             'vertex_position_array') else 'q'
+            length = length_dict[array_name] * 8
+            setattr(graph, array_name, view[offset:offset + length].cast(typecode))
+            offset += length
+        if not has_positions:
+            graph.vertex_position_array = None
+        graph.adjacency_arrays_stale = False
+        graph.memory_map = memory_map
+
+    @classmethod
+    def reattach_cache(cls, graph):
+        """Maps a graph's cache file again, used when a memory-mapped graph is unpickled in another process."""
+        with open(graph.memory_map_path, 'rb') as file:
+            memory_map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        flags = cls.header_struct.unpack_from(memory_map)[4]
+        cls.attach_memory_map(graph, memory_map, bool(flags & 4))
+
+    @staticmethod
+    def get_array_name_list(has_positions):
+        array_name_list = ['edge_vertex1_array', 'edge_vertex2_array', 'edge_weight_array', 'edge_reliability_array',
+                           'adjacency_offset_array', 'adjacency_vertex_array', 'adjacency_edge_array']
+        if has_positions:
+            array_name_list.append('vertex_position_array')
+        return array_name_list
+
+    @staticmethod
+    def get_mesh_parameters(layout, mesh_builder):
+        if layout != 'coordinates' or mesh_builder is None:
+            return 0.0, 0.0
+        return mesh_builder.reliability_coefficient, mesh_builder.cutoff_radius
@@ -1,81 +1,278 @@
 """Graph class using an adjacency list."""
-import copy
+import bisect
 import csv
+import heapq
 import math
-from edge import Edge
-from vertex import Vertex
-from operator import attrgetter
+import multiprocessing
+import multiprocessing.pool
+import threading
+from array import array
+from disjoint_set import DisjointSet
+from dynamic_shortest_paths import DynamicShortestPaths
+from edge import EdgeList
+from edge_list_loader import EdgeListLoader
+from graph_reduction import ReliabilityReducer
+from instrumentation import BudgetExhausted, ReliabilityBounds
+from query_context import QueryContext
+from reliability_curve import ReliabilityCurveEngine
+from reliability_engine import ReliabilityEngine
+from reliability_sensitivity import ReliabilitySensitivity
+from vertex import VertexList
 
 
 class Graph():
-    edge_boolean_list_list = []
-
     def __init__(self):
         self.number_of_vertices = 0
         self.number_of_edges = 0
         self.using_weight = False
         self.using_reliability = False
-        self.has_a_cycle = False
-        self.vertex_list = []
-        self.edge_list = []
-        self.queue = []
+        # Edge storage, one entry per edge index.
+        self.edge_vertex1_array = array('q')
+        self.edge_vertex2_array = array('q')
+        self.edge_weight_array = array('d')
+        self.edge_reliability_array = array('d')
+        self.edge_removed_array = bytearray()
+        # Vertex storage, one entry per vertex label.
+        self.vertex_position_array = None
+        # Compressed sparse row adjacency, rebuilt lazily after edges are added.
+        self.adjacency_offset_array = array('q', [0])
+        self.adjacency_vertex_array = array('q')
+        self.adjacency_edge_array = array('q')
+        self.adjacency_arrays_stale = False
+        # Set when the structural arrays are views onto a memory-mapped cache file.
+        self.memory_map = None
+        self.memory_map_path = None
+        # Optional union-find index kept up to date by add_vertex and add_edge.
+        self.component_index = None
+        # Optional DynamicShortestPaths kept up to date by add_vertex, add_edge and the Edge setters.
+        self.shortest_path_index = None
+        # Set by freeze; a frozen graph's edges, vertices and removed flags can no longer change.
+        self.frozen = False
+        # Traversal state and counters for the methods called on the graph itself.
+        self.query_context = QueryContext(self)
+        # Optional ResultCache consulted by the expensive queries before computing anything.
+        self.result_cache = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # Traversal state belongs to the process running the queries, so a fresh context is made on arrival.
+        del state['query_context']
+        if self.memory_map is not None:
+            # Mapped arrays are not copied; the receiving process maps the same file and shares its pages.
+            for array_name in ['edge_vertex1_array', 'edge_vertex2_array', 'edge_weight_array',
+                               'edge_reliability_array', 'adjacency_offset_array', 'adjacency_vertex_array',
+                               'adjacency_edge_array', 'vertex_position_array', 'memory_map']:
+                del state[array_name]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.query_context = QueryContext(self)
+        if 'memory_map' not in state:
+            EdgeListLoader.reattach_cache(self)
+
+    @property
+    def has_a_cycle(self):
+        return self.query_context.has_a_cycle
+
+    @has_a_cycle.setter
+    def has_a_cycle(self, has_a_cycle):
+        self.query_context.has_a_cycle = has_a_cycle
+
+    @property
+    def instrumentation(self):
+        return self.query_context.instrumentation
+
+    def freeze(self):
+        """Makes the graph immutable, so queries with their own contexts can share it across threads."""
+        self.build_adjacency_arrays()
+        self.frozen = True
+
+    def ensure_mutable(self):
+        if self.frozen:
+            raise TypeError('a frozen graph cannot be changed')
+
+    def make_arrays_writable(self):
+        """Copies memory-mapped arrays into private arrays so the graph can be changed."""
+        self.ensure_mutable()
+        if self.memory_map is None:
+            return
+        self.edge_vertex1_array = array('q', self.edge_vertex1_array)
+        self.edge_vertex2_array = array('q', self.edge_vertex2_array)
+        self.edge_weight_array = array('d', self.edge_weight_array)
+        self.edge_reliability_array = array('d', self.edge_reliability_array)
+        self.adjacency_offset_array = array('q', self.adjacency_offset_array)
+        self.adjacency_vertex_array = array('q', self.adjacency_vertex_array)
+        self.adjacency_edge_array = array('q', self.adjacency_edge_array)
+        if self.vertex_position_array is not None:
+            self.vertex_position_array = array('d', self.vertex_position_array)
+        self.memory_map = None
+        self.memory_map_path = None
+
+    @property
+    def vertex_list(self):
+        return VertexList(self)
+
+    @property
+    def edge_list(self):
+        return EdgeList(self)
 
     def initialize_with_size(self, size):
         self.number_of_vertices = size
-        self.vertex_list = []
-        for i in range(size):
-            self.vertex_list.append(Vertex(i))
+        self.vertex_position_array = None
+        self.reset_all_vertices()
+        self.adjacency_arrays_stale = True
+        if self.component_index is not None:
+            self.enable_component_index()
+        if self.shortest_path_index is not None:
+            self.enable_shortest_path_index(self.shortest_path_index.source_list)
+
+    def add_vertex(self, position=None):
+        self.make_arrays_writable()
+        label = self.number_of_vertices
+        self.number_of_vertices += 1
+        self.query_context.resize()
+        if position is not None and self.vertex_position_array is None:
+            self.vertex_position_array = array('d', [float("nan")]) * (2 * label)
+        if self.vertex_position_array is not None:
+            if position is None:
+                position = [float("nan"), float("nan")]
+            self.vertex_position_array.extend(position)
+        self.adjacency_arrays_stale = True
+        if self.component_index is not None:
+            self.component_index.add_element()
+        if self.shortest_path_index is not None:
+            self.shortest_path_index.add_vertex()
+        return label
+
+    def get_vertex_position(self, label):
+        if self.vertex_position_array is None or math.isnan(self.vertex_position_array[2 * label]):
+            return None
+        return [self.vertex_position_array[2 * label], self.vertex_position_array[2 * label + 1]]
 
     def add_edge(self, vertex1, vertex2, reliability=1.0, weight=1.0):
-        self.vertex_list[vertex1].adjacency_list.append(vertex2)
-        self.vertex_list[vertex2].adjacency_list.append(vertex1)
-        self.edge_list.append(Edge(vertex1, vertex2, reliability=reliability, weight=weight))
+        if not (0 <= vertex1 < self.number_of_vertices and 0 <= vertex2 < self.number_of_vertices):
+            raise IndexError('edge vertex out of range')
+        self.make_arrays_writable()
+        self.edge_vertex1_array.append(vertex1)
+        self.edge_vertex2_array.append(vertex2)
+        self.edge_reliability_array.append(reliability)
+        self.edge_weight_array.append(weight)
+        self.edge_removed_array.append(False)
+        self.number_of_edges += 1
+        self.adjacency_arrays_stale = True
+        if self.component_index is not None:
+            self.component_index.union(vertex1, vertex2)
+        if self.shortest_path_index is not None:
+            self.shortest_path_index.insert_edge(self.number_of_edges - 1)
+
+    def add_edges(self, vertex1_list, vertex2_list, reliability_list, weight_list):
+        """Adds many edges at once from equal length sequences."""
+        vertex1_array = array('q', vertex1_list)
+        vertex2_array = array('q', vertex2_list)
+        if not len(vertex1_array) == len(vertex2_array) == len(reliability_list) == len(weight_list):
+            raise ValueError('edge sequences differ in length')
+        if vertex1_array and not (0 <= min(min(vertex1_array), min(vertex2_array)) and
+                                  max(max(vertex1_array), max(vertex2_array)) < self.number_of_vertices):
+            raise IndexError('edge vertex out of range')
+        self.make_arrays_writable()
+        self.edge_vertex1_array.extend(vertex1_array)
+        self.edge_vertex2_array.extend(vertex2_array)
+        self.edge_reliability_array.extend(array('d', reliability_list))
+        self.edge_weight_array.extend(array('d', weight_list))
+        self.edge_removed_array.extend(bytes(len(vertex1_array)))
+        self.number_of_edges += len(vertex1_array)
+        self.adjacency_arrays_stale = True
+        if self.component_index is not None:
+            for vertex1, vertex2 in zip(vertex1_array, vertex2_array):
+                self.component_index.union(vertex1, vertex2)
+        if self.shortest_path_index is not None:
+            self.shortest_path_index.insert_edges(range(self.number_of_edges - len(vertex1_array),
+                                                        self.number_of_edges))
+
+    def build_adjacency_arrays(self):
+        """Builds the compressed sparse row adjacency, keeping each vertex's edges in insertion order."""
+        if not self.adjacency_arrays_stale:
+            return
+        offset_array = array('q', [0]) * (self.number_of_vertices + 1)
+        for vertex_index in self.edge_vertex1_array:
+            offset_array[vertex_index + 1] += 1
+        for vertex_index in self.edge_vertex2_array:
+            offset_array[vertex_index + 1] += 1
+        for vertex_index in range(self.number_of_vertices):
+            offset_array[vertex_index + 1] += offset_array[vertex_index]
+        cursor_array = offset_array[:-1]
+        adjacency_vertex_array = array('q', [0]) * offset_array[-1]
+        adjacency_edge_array = array('q', [0]) * offset_array[-1]
+        for edge_index, (vertex1, vertex2) in enumerate(zip(self.edge_vertex1_array, self.edge_vertex2_array)):
+            position = cursor_array[vertex1]
+            adjacency_vertex_array[position] = vertex2
+            adjacency_edge_array[position] = edge_index
+            cursor_array[vertex1] += 1
+            position = cursor_array[vertex2]
+            adjacency_vertex_array[position] = vertex1
+            adjacency_edge_array[position] = edge_index
+            cursor_array[vertex2] += 1
+        self.adjacency_offset_array = offset_array
+        self.adjacency_vertex_array = adjacency_vertex_array
+        self.adjacency_edge_array = adjacency_edge_array
+        self.adjacency_arrays_stale = False
+
+    def get_adjacent_edges(self, vertex_index):
+        """Yields each (adjacent vertex, edge index) pair of the vertex whose edge is not removed."""
+        self.build_adjacency_arrays()
+        adjacency_vertex_array = self.adjacency_vertex_array
+        adjacency_edge_array = self.adjacency_edge_array
+        edge_removed_array = self.edge_removed_array
+        for offset in range(self.adjacency_offset_array[vertex_index], self.adjacency_offset_array[vertex_index + 1]):
+            edge_index = adjacency_edge_array[offset]
+            if not edge_removed_array[edge_index]:
+                yield adjacency_vertex_array[offset], edge_index
 
     def set_all_vertices_unvisited(self):
-        for vertex in self.vertex_list:
-            vertex.visited = False
+        self.query_context.start_query()
 
     def simple_depth_first_search(self, start):
-        self.vertex_list[start].visited = True
-        for vertex_index in self.vertex_list[start].adjacency_list:
-            if not self.vertex_list[vertex_index].visited:
-                self.vertex_list[vertex_index].parent = start
-                self.depth_first_search(vertex_index)
-            else:
-                if self.vertex_list[start].parent != vertex_index:
-                    self.has_a_cycle = True
+        self.iterative_depth_first_search(start, parent_edge_is_a_cycle=False)
 
     def reliability_depth_first_search(self, start):
-        self.vertex_list[start].visited = True
-        for vertex_index in self.vertex_list[start].adjacency_list:
-            if not self.vertex_list[vertex_index].visited:
-                self.vertex_list[vertex_index].parent = start
-                self.depth_first_search(vertex_index)
+        self.iterative_depth_first_search(start, parent_edge_is_a_cycle=True)
+
+    def iterative_depth_first_search(self, start, parent_edge_is_a_cycle, context=None):
+        """
+        Visits the vertices reachable from start in depth first order using an explicit stack.
+
+        Reaching an already visited vertex marks the context as having a cycle, except for the vertex's own
+        parent unless parent_edge_is_a_cycle is set. The context defaults to the graph's own.
+        """
+        if context is None:
+            context = self.query_context
+        epoch = context.epoch
+        visited_epoch_array = context.visited_epoch_array
+        reached_epoch_array = context.reached_epoch_array
+        parent_array = context.parent_array
+        distance_array = context.distance_array
+        infinity = float("inf")
+        visited_epoch_array[start] = epoch
+        stack = [(start, context.get_parent(start), self.get_adjacent_edges(start))]
+        while stack:
+            vertex_index, parent, adjacent_edge_iterator = stack[-1]
+            for adjacent_vertex, edge_index in adjacent_edge_iterator:
+                if visited_epoch_array[adjacent_vertex] != epoch:
+                    visited_epoch_array[adjacent_vertex] = epoch
+                    reached_epoch_array[adjacent_vertex] = epoch
+                    parent_array[adjacent_vertex] = vertex_index
+                    distance_array[adjacent_vertex] = infinity
+                    stack.append((adjacent_vertex, vertex_index, self.get_adjacent_edges(adjacent_vertex)))
+                    break
+                elif parent_edge_is_a_cycle or parent != adjacent_vertex:
+                    context.has_a_cycle = True
             else:
-                self.has_a_cycle = True
+                stack.pop()
 
     def breadth_first_search(self, start):
-        self.vertex_list[start].visited = True
-        if self.vertex_list[start].parent == -1:
-            self.vertex_list[start].value = 0
-        for vertex_index in self.vertex_list[start].adjacency_list:
-            if not self.vertex_list[vertex_index].visited:
-                edge_vertex_list = [start, vertex_index]
-                edge_vertex_list.sort()
-                edge = next((x for x in self.edge_list if x.vertex_list == edge_vertex_list), "Not here")
-                current_value = self.vertex_list[start].value + edge.weight
-                if current_value < self.vertex_list[vertex_index].value:
-                    self.vertex_list[vertex_index].parent = start
-                    self.vertex_list[vertex_index].value = current_value
-                    self.queue.append([vertex_index, current_value])
-        if len(self.queue):
-            self.queue.sort(key=lambda entry: entry[1])
-            next_vertex = self.queue.pop(0)[0]
-            self.breadth_first_search(next_vertex)
-            return
-        else:
-            return
-
+        self.instrumentation.counter_dict['breadth_first_searches'] += 1
+        self.dijkstra_search([start])
 
     def depth_first_search(self, start):
         if self.using_reliability:
@@ -93,8 +290,7 @@ class Graph():
         self.depth_first_search(0)
         return self.has_a_cycle
 
-    def display_shortest_paths(self):
-        source = 0
+    def display_shortest_paths(self, source=0):
         self.dijkstra_algorithm(source)
         for vertex in self.vertex_list:
             current_index = vertex.label
@@ -104,97 +300,74 @@ class Graph():
                     path_string = str(current_index)
                 else:
                     path_string = str(current_index) + ',' + path_string
-                current_index = self.vertex_list[current_index].parent
+                current_index = self.query_context.get_parent(current_index)
             print(path_string)
 
     @classmethod
-    def create_graph_from_csv(cls, file_path):
-        graph = cls()
-        with open(file_path) as file:
-            edge_list = list(csv.reader(file))
-        graph.number_of_vertices = max([int(vertex_index) for edge in edge_list for vertex_index in edge]) + 1
-        graph.initialize_with_size(graph.number_of_vertices)
-        for edge in edge_list:
-            edge = list(map(int, edge))
-            graph.add_edge(edge[0], edge[1])
-        return graph
+    def create_graph_from_csv(cls, file_path, use_cache=False):
+        return EdgeListLoader(use_cache=use_cache).load(file_path, 'plain', graph_class=cls)
 
     @classmethod
-    def create_weighted_graph_from_csv(cls, file_path):
-        graph = cls()
-        graph.using_weight = True
-        with open(file_path) as file:
-            edge_list = list(csv.reader(file))
-        graph.number_of_vertices = max([int(edge[i]) for edge in edge_list for i in range(2)]) + 1
-        graph.initialize_with_size(graph.number_of_vertices)
-        for edge in edge_list:
-            edge = list(map(int, edge))
-            graph.add_edge(edge[0], edge[1], weight=edge[2])
-        return graph
+    def create_weighted_graph_from_csv(cls, file_path, use_cache=False):
+        return EdgeListLoader(use_cache=use_cache).load(file_path, 'weighted', graph_class=cls)
 
     @classmethod
-    def create_reliability_graph_from_csv(cls, file_path):
-        graph = cls()
-        graph.using_reliability = True
-        with open(file_path) as file:
-            edge_list = list(csv.reader(file))
-        graph.number_of_vertices = max([int(edge[i]) for edge in edge_list for i in range(2)]) + 1
-        graph.initialize_with_size(graph.number_of_vertices)
-        for edge in edge_list:
-            edge = [int(edge[0]), int(edge[1]), float(edge[2])]
-            graph.add_edge(edge[0], edge[1], reliability=edge[2])
-        return graph
+    def create_reliability_graph_from_csv(cls, file_path, use_cache=False):
+        return EdgeListLoader(use_cache=use_cache).load(file_path, 'reliability', graph_class=cls)
 
     @classmethod
-    def create_reliability_weighted_graph_from_csv(cls, file_path):
-        graph = cls()
-        graph.using_reliability = True
-        with open(file_path) as file:
-            edge_list = list(csv.reader(file))
-        graph.number_of_vertices = max([int(edge[i]) for edge in edge_list for i in range(2)]) + 1
-        graph.initialize_with_size(graph.number_of_vertices)
-        for edge in edge_list:
-            edge = [int(edge[0]), int(edge[1]), float(edge[2]), float(edge[3])]
-            graph.add_edge(edge[0], edge[1], reliability=edge[2], weight=edge[3])
-        return graph
+    def create_reliability_weighted_graph_from_csv(cls, file_path, use_cache=False):
+        return EdgeListLoader(use_cache=use_cache).load(file_path, 'reliability_weighted', graph_class=cls)
 
     @classmethod
-    def create_wireless_mesh_graph_from_csv(cls, file_path):
-        graph = cls()
-        graph.using_reliability = True
-        graph.using_weight = True
-        with open(file_path) as file:
-            position_list = list(csv.reader(file))
-        i = 0
-        #Create all the vertices
-        for position_string in position_list:
-            position = [float(position_string[0]), float(position_string[1])]
-            graph.vertex_list.append(Vertex(i, position=position))
-            graph.number_of_vertices += 1
-            i += 1
-        #Create the wireless mesh edges.
-        i = 0
-        while i < len(graph.vertex_list):
-            j = i + 1
-            while j < len(graph.vertex_list):
-                vertex1 = graph.vertex_list[i]
-                vertex2 = graph.vertex_list[j]
-                if vertex1 is not vertex2:
-                    distance = math.hypot(vertex2.position[0]-vertex1.position[0], vertex2.position[1]-vertex2.position[1])
-                    reliability = 1 - (0.001 * (distance**2))
-                    graph.add_edge(vertex1.label, vertex2.label, reliability=reliability, weight=distance)
-                j += 1
-            i += 1
-        return graph
+    def create_wireless_mesh_graph_from_csv(cls, file_path, reliability_threshold=0.0, cutoff_radius=None,
+                                            use_cache=False):
+        """
+        Creates a graph with an edge between every pair of positions whose reliability is above the threshold.
+
+        Each edge's weight is the distance between its positions and its reliability is 1 - 0.001 * distance**2.
+        """
+        from wireless_mesh import WirelessMeshBuilder
+        builder = WirelessMeshBuilder(reliability_threshold=reliability_threshold, cutoff_radius=cutoff_radius)
+        return EdgeListLoader(use_cache=use_cache).load(file_path, 'coordinates', graph_class=cls,
+                                                        mesh_builder=builder)
 
     def find_number_of_components(self):
         number_of_components = 0
-        for vertex in self.vertex_list:
-            if not vertex.visited:
-                self.depth_first_search(vertex.label)
+        epoch = self.query_context.epoch
+        visited_epoch_array = self.query_context.visited_epoch_array
+        for vertex_index in range(self.number_of_vertices):
+            if visited_epoch_array[vertex_index] != epoch:
+                self.depth_first_search(vertex_index)
                 number_of_components += 1
         return number_of_components
 
+    def enable_component_index(self):
+        """
+        Builds a union-find index of the edges that are not removed, which add_vertex and add_edge keep up to date.
+
+        Union-find cannot split a set, so removing or restoring an edge drops the index instead, and
+        in_same_component builds it again when next asked.
+        """
+        self.component_index = DisjointSet(self.number_of_vertices)
+        edge_removed_array = self.edge_removed_array
+        for edge_index, (vertex1, vertex2) in enumerate(zip(self.edge_vertex1_array, self.edge_vertex2_array)):
+            if not edge_removed_array[edge_index]:
+                self.component_index.union(vertex1, vertex2)
+        return self.component_index
+
+    def enable_shortest_path_index(self, source_list=0):
+        """Keeps the shortest paths from the sources up to date as edges change, and returns the index."""
+        if isinstance(source_list, int):
+            source_list = [source_list]
+        self.shortest_path_index = DynamicShortestPaths(self, source_list)
+        return self.shortest_path_index
+
+    def in_same_component(self, vertex1, vertex2):
+        if self.component_index is None:
+            self.enable_component_index()
+        return self.component_index.in_same_set(vertex1, vertex2)
+
     '''def dijkstra_algorithm(self, start):
         self.vertex_list[start].visited = True
         #Update adjacent vertices' weights.
@@ -209,96 +382,459 @@ class Graph():
             self.dijkstra_algorithm(minimum_value_vertex.label)'''
 
     def dijkstra_algorithm(self, start):
-        self.vertex_list[start].value = 0
+        self.query_context.set_distance(start, 0)
         self.dijkstra_algorithm_helper(start)
-        for vertex in self.vertex_list:
-            if not vertex.visited:
-                self.vertex_list[vertex.label].value = 0
-                self.dijkstra_algorithm_helper(vertex.label)
+        epoch = self.query_context.epoch
+        visited_epoch_array = self.query_context.visited_epoch_array
+        for vertex_index in range(self.number_of_vertices):
+            if visited_epoch_array[vertex_index] != epoch:
+                self.query_context.set_distance(vertex_index, 0)
+                self.dijkstra_algorithm_helper(vertex_index)
 
     def dijkstra_algorithm_helper(self, start):
-        self.vertex_list[start].visited = True
-        #Update adjacent vertices' weights.
-        for adjacent_vertex in self.vertex_list[start].adjacency_list:
-            if not self.vertex_list[adjacent_vertex].visited:
-                edge_vertex_list = [adjacent_vertex, start]
-                edge_vertex_list.sort()
-                edge = next((edge for edge in self.edge_list if edge.vertex_list == edge_vertex_list), None)
-                if edge.weight + self.vertex_list[start].value < self.vertex_list[adjacent_vertex].value:
-                    self.vertex_list[adjacent_vertex].value = edge.weight + self.vertex_list[start].value
-                    self.vertex_list[adjacent_vertex].parent = start
-        unvisited_vertex_list = [vertex for vertex in self.vertex_list if not vertex.visited]
-        if unvisited_vertex_list:
-            minimum_value_vertex = min(unvisited_vertex_list, key=attrgetter('value'))
-            if minimum_value_vertex.value == float("inf"):
-                return
-            self.dijkstra_algorithm_helper(minimum_value_vertex.label)
+        self.dijkstra_search([start])
 
-    def attain_reliability_for_diameter(self, diameter, terminal_list=None):
-        edge_boolean_list = self.get_edge_boolean_list()
-        if edge_boolean_list in Graph.edge_boolean_list_list:
-            return 0
+    def dijkstra_search(self, source_list, context=None, target=None, distance_bound=float("inf")):
+        """
+        Runs a binary heap Dijkstra from the sources, recording distances, parents and visits in the context.
+
+        Stops once the target is settled or every remaining vertex is farther than the distance bound.
+        Vertices beyond the bound are not reached. The context defaults to the graph's own.
+        """
+        if context is None:
+            context = self.query_context
+        epoch = context.epoch
+        visited_epoch_array = context.visited_epoch_array
+        reached_epoch_array = context.reached_epoch_array
+        distance_array = context.distance_array
+        parent_array = context.parent_array
+        self.build_adjacency_arrays()
+        adjacency_offset_array = self.adjacency_offset_array
+        adjacency_vertex_array = self.adjacency_vertex_array
+        adjacency_edge_array = self.adjacency_edge_array
+        edge_weight_array = self.edge_weight_array
+        edge_removed_array = self.edge_removed_array
+        heap = []
+        for source in source_list:
+            reached_epoch_array[source] = epoch
+            distance_array[source] = 0
+            parent_array[source] = -1
+            heap.append((0, source))
+        heapq.heapify(heap)
+        while heap:
+            distance, vertex_index = heapq.heappop(heap)
+            if visited_epoch_array[vertex_index] == epoch or distance > distance_array[vertex_index]:
+                continue
+            visited_epoch_array[vertex_index] = epoch
+            if vertex_index == target:
+                break
+            for offset in range(adjacency_offset_array[vertex_index], adjacency_offset_array[vertex_index + 1]):
+                edge_index = adjacency_edge_array[offset]
+                adjacent_vertex = adjacency_vertex_array[offset]
+                if edge_removed_array[edge_index] or visited_epoch_array[adjacent_vertex] == epoch:
+                    continue
+                current_value = distance + edge_weight_array[edge_index]
+                if current_value <= distance_bound and (reached_epoch_array[adjacent_vertex] != epoch or
+                                                        current_value < distance_array[adjacent_vertex]):
+                    reached_epoch_array[adjacent_vertex] = epoch
+                    distance_array[adjacent_vertex] = current_value
+                    parent_array[adjacent_vertex] = vertex_index
+                    heapq.heappush(heap, (current_value, adjacent_vertex))
+
+    def shortest_paths(self, source_list, target=None, distance_bound=float("inf")):
+        """
+        Finds the shortest paths from one or more sources without touching the vertex state.
+
+        Returns a distance array and a parent array indexed by vertex label. With several sources each
+        vertex gets its distance to the nearest source. Unreached vertices have an infinite distance and
+        a parent of -1.
+        """
+        if isinstance(source_list, int):
+            source_list = [source_list]
+        # A fresh context's arrays hold infinity and -1 wherever the search does not reach.
+        context = QueryContext(self)
+        self.dijkstra_search(source_list, context=context, target=target, distance_bound=distance_bound)
+        return context.distance_array, context.parent_array
+
+    def all_pairs_shortest_paths(self, source_list=None, number_of_processes=None, distance_bound=float("inf")):
+        """
+        Finds the shortest paths from every source (every vertex by default), one Dijkstra per source.
+
+        The sources are spread over a process pool; each worker receives the graph once. Returns a list of
+        (distance array, parent array) pairs in source order.
+        """
+        if source_list is None:
+            source_list = range(self.number_of_vertices)
+        source_list = list(source_list)
+        cache_key, path_list = self.look_up_result('all_pairs_shortest_paths', source_list, distance_bound)
+        if path_list is not None:
+            return path_list
+        self.build_adjacency_arrays()
+        if number_of_processes is None:
+            number_of_processes = multiprocessing.cpu_count()
+        if number_of_processes <= 1 or len(source_list) <= 1:
+            path_list = [self.shortest_paths(source, distance_bound=distance_bound) for source in source_list]
         else:
-            Graph.edge_boolean_list_list.append(edge_boolean_list)
+            chunk_size = max(1, len(source_list) // (4 * number_of_processes))
+            with multiprocessing.Pool(number_of_processes, initializer=initialize_shortest_path_worker,
+                                      initargs=(self, distance_bound)) as pool:
+                path_list = pool.map(find_shortest_paths_in_worker, source_list, chunksize=chunk_size)
+        self.store_result(cache_key, path_list)
+        return path_list
+
+    def attain_reliability_for_diameter(self, diameter, terminal_list=None, time_budget=None, node_budget=None,
+                                        progress_callback=None, context=None):
+        """
+        Finds the reliability by enumerating every subgraph reached by removing edges.
+
+        The run resets and fills in the context's instrumentation (the graph's own context by default),
+        calling progress_callback with it about once a second. With a time budget (in seconds) or a node
+        budget the result is a ReliabilityBounds, which holds certified bounds instead of the exact value if
+        the budget runs out first. A result found in the result cache is returned without running anything.
+        """
+        from subgraph_view import SubgraphView
+        if context is None:
+            context = self.query_context
+        if not terminal_list:
+            terminal_list = [self.number_of_vertices - 1]
+        cache_key, reliability = self.look_up_result('reliability', 'enumeration', float(diameter),
+                                                       sorted(set(terminal_list)))
+        if reliability is None:
+            instrumentation = context.instrumentation
+            instrumentation.start(time_budget, node_budget, progress_callback)
+            try:
+                reliability = SubgraphView(self).explore_reliability_for_diameter(diameter, terminal_list, context)
+            except BudgetExhausted:
+                return instrumentation.get_bounds()
+            finally:
+                instrumentation.stop()
+            self.store_result(cache_key, reliability)
+        if time_budget is None and node_budget is None:
+            return reliability
+        return ReliabilityBounds(reliability, reliability, True)
+
+    def attain_reliability_for_diameter_in_parallel(self, diameter, terminal_list=None, number_of_processes=None,
+                                                    split_depth=None):
+        """
+        Finds the same reliability as attain_reliability_for_diameter, spreading the enumeration over processes.
+
+        The enumeration tree is expanded here down to split_depth removed edges, and each subtree below that
+        depth becomes one task. Workers take tasks one at a time from the pool's shared queue, so uneven
+        subtrees balance out. The subtree values are added back in the serial order, so the result is the
+        serial result bit for bit, whatever the number of processes. Without a split depth, the depth is
+        the smallest giving about sixteen tasks per process.
+        """
+        from subgraph_view import SubgraphView
         if not terminal_list:
             terminal_list = [self.number_of_vertices - 1]
-        self.breadth_first_search(0)
-        if not all(self.vertex_list[terminal_index].visited for terminal_index in terminal_list):
+        if number_of_processes is None:
+            number_of_processes = multiprocessing.cpu_count()
+        view = SubgraphView(self)
+        if split_depth is None:
+            live_edge_count = self.number_of_edges - sum(self.edge_removed_array)
+            split_depth = 0
+            while split_depth < live_edge_count and \
+                    math.comb(live_edge_count, split_depth) < 16 * number_of_processes:
+                split_depth += 1
+        task_list = []
+        tree = view.expand_reliability_tree(diameter, terminal_list, QueryContext(view), 0, split_depth, task_list)
+        task_value_list = [0] * len(task_list)
+        with multiprocessing.Pool(number_of_processes, initializer=initialize_enumeration_worker,
+                                  initargs=(self, diameter, terminal_list)) as pool:
+            for task_number, task_value in pool.imap_unordered(explore_subtree_in_worker, enumerate(task_list)):
+                task_value_list[task_number] = task_value
+        return self.combine_reliability_tree(tree, task_value_list)
+
+    def expand_reliability_tree(self, diameter, terminal_list, context, first_edge_index, depth, task_list):
+        """
+        Expands the enumeration from this subgraph down to the given depth, leaving each deeper subtree as a task.
+
+        Returns 0 if the subgraph fails, a (task number, None) pair for a subtree left to a worker, and
+        otherwise a (state probability, child list) pair.
+        """
+        if depth == 0:
+            task_list.append((tuple(edge_index for edge_index, _ in self.removed_edge_stack), first_edge_index))
+            return len(task_list) - 1, None
+        is_a_success, state_probability = self.check_edge_state(diameter, terminal_list, context, first_edge_index)
+        if not is_a_success:
             return 0
-        else:
-            if any(diameter < self.vertex_list[terminal_index].value for terminal_index in terminal_list):
-                return 0
-            # Get the reliability of this graph.
-            reliability = 1
-            for edge in self.edge_list:
-                if edge.removed:
-                    reliability *= (1 - edge.reliability)
+        child_list = []
+        for edge_index in range(first_edge_index, self.number_of_edges):
+            if not self.edge_removed_array[edge_index]:
+                self.remove_edge(edge_index)
+                try:
+                    child_list.append(self.expand_reliability_tree(diameter, terminal_list, context, edge_index + 1,
+                                                                   depth - 1, task_list))
+                finally:
+                    self.undo_edge_removal()
+        return state_probability, child_list
+
+    @classmethod
+    def combine_reliability_tree(cls, tree, task_value_list):
+        """Adds up an expanded enumeration tree in the same order as explore_reliability_for_diameter."""
+        if not isinstance(tree, tuple):
+            return tree
+        state_probability, child_list = tree
+        if child_list is None:
+            return task_value_list[state_probability]
+        reliability = state_probability
+        for child in child_list:
+            reliability += cls.combine_reliability_tree(child, task_value_list)
+        return reliability
+
+    def explore_reliability_for_diameter(self, diameter, terminal_list, context, first_edge_index=0):
+        """
+        Adds up the reliability of this subgraph and those made by also removing edges from first_edge_index on.
+
+        Edges are only ever removed in increasing index order, so each set of removed edges is reached
+        exactly once, and every set containing a failing one is skipped, since removing edges never
+        brings a terminal closer.
+        """
+        is_a_success, state_probability = self.check_edge_state(diameter, terminal_list, context, first_edge_index)
+        if not is_a_success:
+            return 0
+        instrumentation = context.instrumentation
+        reliability = state_probability
+        # Add the reliability of the subgraphs.
+        for edge_index in range(first_edge_index, self.number_of_edges):
+            if not self.edge_removed_array[edge_index]:
+                instrumentation.counter_dict['edge_flips'] += 1
+                self.remove_edge(edge_index)
+                try:
+                    reliability += self.explore_reliability_for_diameter(diameter, terminal_list, context,
+                                                                         edge_index + 1)
+                finally:
+                    self.undo_edge_removal()
+        return reliability
+
+    def check_edge_state(self, diameter, terminal_list, context, first_edge_index=0):
+        """
+        Returns whether every terminal is within the diameter and the probability of exactly these edges being up.
+
+        A failure is recorded with the mass of every subgraph that would be reached by also removing edges from
+        first_edge_index on, since all of those are skipped and fail too.
+        """
+        instrumentation = context.instrumentation
+        instrumentation.explore_node()
+        with instrumentation.phase('breadth_first_search'):
+            context.start_query()
+            instrumentation.counter_dict['breadth_first_searches'] += 1
+            self.dijkstra_search([0], context=context)
+        with instrumentation.phase('probability'):
+            # Get the probability of exactly this graph's edges being up.
+            state_probability = 1
+            skipped_probability = 1
+            for edge_index in range(self.number_of_edges):
+                if self.edge_removed_array[edge_index]:
+                    state_probability *= (1 - self.edge_reliability_array[edge_index])
+                    skipped_probability *= (1 - self.edge_reliability_array[edge_index])
                 else:
-                    reliability *= edge.reliability
-            # Add the reliability of the subgraphs.
-            for edge in self.edge_list:
-                if not edge.removed:
-                    subgraph = self.clone_with_edge_removed(edge)
-                    reliability += subgraph.attain_reliability_for_diameter(diameter, terminal_list=terminal_list)
+                    state_probability *= self.edge_reliability_array[edge_index]
+                    if edge_index < first_edge_index:
+                        skipped_probability *= self.edge_reliability_array[edge_index]
+        is_a_success = all(context.is_visited(terminal_index) and context.get_distance(terminal_index) <= diameter
+                           for terminal_index in terminal_list)
+        instrumentation.add_outcome(state_probability if is_a_success else skipped_probability, is_a_success)
+        return is_a_success, state_probability
+
+    def attain_reliability_by_factoring(self, diameter, terminal_list=None, reduce=True, time_budget=None,
+                                        node_budget=None, progress_callback=None, context=None):
+        """
+        Finds the same reliability as attain_reliability_for_diameter using the memoized factoring engine.
+
+        Takes the same budgets, progress callback and context, counting each factored subproblem as a node,
+        and caches its results apart from the enumeration's.
+        """
+        if context is None:
+            context = self.query_context
+        cache_key, reliability = self.look_up_result(
+            'reliability', 'factoring', float(diameter), sorted(set(terminal_list or [self.number_of_vertices - 1])))
+        if reliability is None:
+            instrumentation = context.instrumentation
+            instrumentation.start(time_budget, node_budget, progress_callback)
+            try:
+                graph = self
+                if reduce:
+                    with instrumentation.phase('reduction'):
+                        graph, terminal_list = self.reduce_for_reliability(diameter, terminal_list=terminal_list)[:2]
+                with instrumentation.phase('preparation'):
+                    engine = ReliabilityEngine(graph, diameter, terminal_list=terminal_list,
+                                               instrumentation=instrumentation)
+                with instrumentation.phase('factoring'):
+                    reliability = engine.find_reliability()
+            except BudgetExhausted:
+                return instrumentation.get_bounds()
+            finally:
+                instrumentation.stop()
+            self.store_result(cache_key, reliability)
+        if time_budget is None and node_budget is None:
             return reliability
+        return ReliabilityBounds(reliability, reliability, True)
+
+    def attain_reliability_curve(self, diameter_list=None, terminal_list=None, reduce=True):
+        """
+        Finds the reliability at several diameters with one factoring run.
+
+        Returns the reliabilities in the order of diameter_list, or without one the whole step function as
+        (diameter, reliability) pairs, one for each diameter at which the reliability rises.
+        """
+        cache_key, curve = self.look_up_result('reliability_curve', diameter_list,
+                                               sorted(set(terminal_list or [self.number_of_vertices - 1])))
+        if curve is not None:
+            return curve
+        curve = self.find_reliability_curve(diameter_list, terminal_list, reduce)
+        self.store_result(cache_key, curve)
+        return curve
+
+    def find_reliability_curve(self, diameter_list, terminal_list, reduce):
+        if diameter_list is not None and not diameter_list:
+            return []
+        maximum_diameter = max(diameter_list) if diameter_list is not None else float("inf")
+        graph = self
+        if reduce:
+            graph, terminal_list = self.reduce_for_reliability(maximum_diameter, terminal_list=terminal_list)[:2]
+        distribution = ReliabilityCurveEngine(graph, maximum_diameter,
+                                              terminal_list=terminal_list).find_distance_distribution()
+        step_list = []
+        reliability = 0.0
+        for distance in sorted(distribution):
+            if distance == float("inf"):
+                break
+            reliability += distribution[distance]
+            step_list.append((distance, reliability))
+        if diameter_list is None:
+            return step_list
+        distance_list = [distance for distance, _ in step_list]
+        reliability_list = []
+        for diameter in diameter_list:
+            step_index = bisect.bisect_right(distance_list, diameter)
+            reliability_list.append(step_list[step_index - 1][1] if step_index else 0.0)
+        return reliability_list
+
+    def attain_reliability_sensitivity(self, diameter, terminal_list=None, reduce=True):
+        """
+        Finds the reliability together with its derivative with respect to each edge's reliability.
+
+        Returns a ReliabilityGradient whose derivative_list is indexed like the edges. Use
+        prepare_reliability_sensitivity instead to re-evaluate cheaply after changing edge reliabilities.
+        """
+        return self.prepare_reliability_sensitivity(diameter, terminal_list=terminal_list, reduce=reduce).evaluate()
+
+    def prepare_reliability_sensitivity(self, diameter, terminal_list=None, reduce=True):
+        """Factors the graph once, returning a ReliabilitySensitivity to evaluate at any edge reliabilities."""
+        self.instrumentation.start()
+        try:
+            return ReliabilitySensitivity(self, diameter, terminal_list=terminal_list, reduce=reduce,
+                                          instrumentation=self.instrumentation)
+        finally:
+            self.instrumentation.stop()
+
+    def reduce_for_reliability(self, diameter, terminal_list=None, source=0):
+        """Returns a smaller graph with the same reliability, its terminal list, edge origins and statistics."""
+        return ReliabilityReducer(self, diameter, terminal_list=terminal_list, source=source).reduce()
+
+    def look_up_result(self, query_name, *parameter_list):
+        """Returns the result cache key for the query and its cached result, which is None on a miss."""
+        if self.result_cache is None:
+            return None, None
+        cache_key = self.result_cache.make_key(self, query_name, parameter_list)
+        return cache_key, self.result_cache.get(cache_key)
+
+    def store_result(self, cache_key, result):
+        if cache_key is not None:
+            self.result_cache.put(cache_key, result)
 
     def reset_all_vertices(self):
-        self.set_all_vertices_unvisited()
-        for vertex in self.vertex_list:
-            vertex.parent = -1
-        for vertex in self.vertex_list:
-            vertex.value = float("inf")
+        """Starts a new epoch in the graph's own context, which clears every visit, parent and value at once."""
+        self.query_context.start_query()
 
     def reset_graph(self):
         self.reset_all_vertices()
-        for edge in self.edge_list:
-            edge.removed = False
-        self.queue = []
-        self.has_a_cycle = False
-        Graph.edge_boolean_list_list = []
+        if any(self.edge_removed_array):
+            self.ensure_mutable()
+            restored_edge_index_list = [edge_index for edge_index, removed in enumerate(self.edge_removed_array)
+                                        if removed]
+            self.edge_removed_array = bytearray(self.number_of_edges)
+            self.component_index = None
+            if self.shortest_path_index is not None:
+                self.shortest_path_index.insert_edges(restored_edge_index_list)
 
     def clone_with_edge_removed(self, edge_to_remove):
-        subgraph = Graph()
-        subgraph.number_of_vertices = self.number_of_vertices
-        subgraph.number_of_edges = self.number_of_edges - 1
-        subgraph.using_reliability = self.using_reliability
-        subgraph.using_weight = self.using_weight
-        subgraph.vertex_list = copy.deepcopy(self.vertex_list)
-        subgraph.reset_all_vertices()
-        subgraph.edge_list = copy.deepcopy(self.edge_list)
-        #Remove the edge
-        for edge in subgraph.edge_list:
-            if edge.vertex_list == edge_to_remove.vertex_list:
-                subgraph.vertex_list[edge.vertex_list[0]].adjacency_list.remove(edge.vertex_list[1])
-                subgraph.vertex_list[edge.vertex_list[1]].adjacency_list.remove(edge.vertex_list[0])
-                edge.removed = True
+        """Returns a view of this graph sharing its structure, with the given edge removed as well."""
+        from subgraph_view import SubgraphView
+        subgraph = SubgraphView(self)
+        subgraph.edge_removed_array[edge_to_remove.index] = True
+        self.instrumentation.counter_dict['clones_made'] += 1
         return subgraph
 
     def get_edge_boolean_list(self):
-        edge_boolean_list = []
-        for edge in self.edge_list:
-            edge_boolean_list.append(edge.removed)
-        return edge_boolean_list
+        return [bool(removed) for removed in self.edge_removed_array]
+
+    def run_queries(self, query_list, number_of_workers=None, use_processes=False):
+        """
+        Answers (name, *arguments) queries in parallel, where name is one of QueryContext.query_name_list.
+
+        The graph is frozen first. Worker threads share it, each with its own QueryContext; worker processes
+        receive it once. Returns the answers in query order.
+        """
+        self.freeze()
+        if number_of_workers is None:
+            number_of_workers = multiprocessing.cpu_count()
+        pool_class = multiprocessing.Pool if use_processes else multiprocessing.pool.ThreadPool
+        with pool_class(number_of_workers, initializer=initialize_query_worker, initargs=(self,)) as pool:
+            return pool.map(answer_query_in_worker, query_list)
+
+
+shortest_path_worker_state = {}
+
+
+def initialize_shortest_path_worker(graph, distance_bound):
+    shortest_path_worker_state['graph'] = graph
+    shortest_path_worker_state['distance_bound'] = distance_bound
+
+
+def find_shortest_paths_in_worker(source):
+    graph = shortest_path_worker_state['graph']
+    return graph.shortest_paths(source, distance_bound=shortest_path_worker_state['distance_bound'])
+
+
+enumeration_worker_state = {}
+
+
+def initialize_enumeration_worker(graph, diameter, terminal_list):
+    from subgraph_view import SubgraphView
+    view = SubgraphView(graph)
+    enumeration_worker_state['view'] = view
+    enumeration_worker_state['context'] = QueryContext(view)
+    enumeration_worker_state['diameter'] = diameter
+    enumeration_worker_state['terminal_list'] = terminal_list
+
+
+def explore_subtree_in_worker(numbered_task):
+    task_number, (removed_edge_tuple, first_edge_index) = numbered_task
+    view = enumeration_worker_state['view']
+    for edge_index in removed_edge_tuple:
+        view.remove_edge(edge_index)
+    try:
+        return task_number, view.explore_reliability_for_diameter(enumeration_worker_state['diameter'],
+                                                                  enumeration_worker_state['terminal_list'],
+                                                                  enumeration_worker_state['context'],
+                                                                  first_edge_index)
+    finally:
+        for _ in removed_edge_tuple:
+            view.undo_edge_removal()
+
+
+# Each worker thread or process keeps its own context over the shared graph.
+query_worker_state = threading.local()
+
+
+def initialize_query_worker(graph):
+    query_worker_state.context = QueryContext(graph)
+
+
+def answer_query_in_worker(query):
+    return query_worker_state.context.run_query(query)
 
 
 if __name__ == "__main__":
@@ -308,4 +844,4 @@ if __name__ == "__main__":
     print(r)
     #graph = Graph.create_weighted_graph_from_csv("examplegraphs/basic_weighted_graph.csv")
     #graph.breadth_first_search(0)
-    #print('go')
\ No newline at end of file
+    #print('go')
@@ -0,0 +1,213 @@
+"""Shrinks a graph before diameter-constrained reliability is computed on it."""
+import heapq
+from collections import namedtuple
+
+ReductionResult = namedtuple('ReductionResult', ['graph', 'terminal_list', 'edge_origin_list', 'statistics'])
+
+
+class ReliabilityReducer:
+    """
+    Removes and merges edges without changing the probability that every terminal is within the diameter.
+
+    The reductions, repeated until none applies:
+
+    - bounded-distance pruning: an edge is dropped when no source to terminal walk through it is within
+      the diameter, measured from both ends;
+    - dangling removal: a vertex other than the source or a terminal with a single edge is dropped;
+    - parallel merge: two edges with the same ends and the same weight become one edge that is up when
+      either is up;
+    - series merge: a vertex other than the source or a terminal with exactly two edges is bypassed by
+      one edge whose weight is the sum and whose reliability is the product, since any path through the
+      vertex uses both edges.
+
+    Parallel edges of different weights are kept apart, since the shorter one alone may satisfy the
+    diameter. The reduced graph has the source relabeled to 0. Each reduced edge records where it came
+    from in edge_origin_list: an original edge index, or ('series', origin, origin) or
+    ('parallel', origin, origin).
+
+    Edges that never come up are dropped too, unless keep_failed_edges is set; every other reduction only
+    depends on the edges and weights, so with it set the reduced graph's structure holds for any reliabilities.
+    """
+    def __init__(self, graph, diameter, terminal_list=None, source=0, keep_failed_edges=False):
+        self.graph = graph
+        self.keep_failed_edges = keep_failed_edges
+        self.diameter = diameter
+        # Slack so that rounding never prunes an edge on a path of exactly the diameter.
+        self.relevance_bound = diameter + 1e-9 * max(1.0, abs(diameter))
+        self.source = source
+        if not terminal_list:
+            terminal_list = [graph.number_of_vertices - 1]
+        self.terminal_list = list(terminal_list)
+        self.kept_vertex_set = set(self.terminal_list)
+        self.kept_vertex_set.add(source)
+        self.statistics = {
+            'original_vertices': graph.number_of_vertices,
+            'original_edges': graph.number_of_edges,
+            'failed_edges_removed': 0,
+            'pruned_edges': 0,
+            'dangling_edges_removed': 0,
+            'parallel_merges': 0,
+            'series_merges': 0,
+        }
+
+    def reduce(self):
+        graph = self.graph
+        self.edge_dict = {}
+        self.incident_edge_dict = {}
+        for edge_index in range(graph.number_of_edges):
+            vertex1 = graph.edge_vertex1_array[edge_index]
+            vertex2 = graph.edge_vertex2_array[edge_index]
+            reliability = graph.edge_reliability_array[edge_index]
+            if graph.edge_removed_array[edge_index] or vertex1 == vertex2 or \
+                    (reliability <= 0 and not self.keep_failed_edges):
+                self.statistics['failed_edges_removed'] += 1
+                continue
+            self.insert_edge(vertex1, vertex2, graph.edge_weight_array[edge_index], reliability, edge_index,
+                             edge_key=edge_index)
+        self.next_edge_key = graph.number_of_edges
+        changed = True
+        while changed:
+            changed = self.prune_distant_edges()
+            changed = self.remove_dangling_edges() or changed
+            changed = self.merge_parallel_edges() or changed
+            changed = self.merge_series_edges() or changed
+        return self.build_result()
+
+    def insert_edge(self, vertex1, vertex2, weight, reliability, origin, edge_key=None):
+        if edge_key is None:
+            edge_key = self.next_edge_key
+            self.next_edge_key += 1
+        self.edge_dict[edge_key] = (vertex1, vertex2, weight, reliability, origin)
+        self.incident_edge_dict.setdefault(vertex1, set()).add(edge_key)
+        self.incident_edge_dict.setdefault(vertex2, set()).add(edge_key)
+
+    def delete_edge(self, edge_key):
+        vertex1, vertex2 = self.edge_dict.pop(edge_key)[:2]
+        self.incident_edge_dict[vertex1].discard(edge_key)
+        self.incident_edge_dict[vertex2].discard(edge_key)
+
+    def find_distances(self, start):
+        distance_dict = {start: 0}
+        heap = [(0, start)]
+        while heap:
+            distance, vertex_index = heapq.heappop(heap)
+            if distance > distance_dict[vertex_index]:
+                continue
+            for edge_key in self.incident_edge_dict.get(vertex_index, ()):
+                vertex1, vertex2, weight = self.edge_dict[edge_key][:3]
+                adjacent_vertex = vertex2 if vertex1 == vertex_index else vertex1
+                length = distance + weight
+                if length <= self.relevance_bound and length < distance_dict.get(adjacent_vertex, float("inf")):
+                    distance_dict[adjacent_vertex] = length
+                    heapq.heappush(heap, (length, adjacent_vertex))
+        return distance_dict
+
+    def prune_distant_edges(self):
+        source_distance_dict = self.find_distances(self.source)
+        terminal_distance_dict_list = [self.find_distances(terminal_index) for terminal_index in self.terminal_list]
+        infinity = float("inf")
+        pruned_edge_list = []
+        for edge_key, (vertex1, vertex2, weight, reliability, origin) in self.edge_dict.items():
+            if not any(source_distance_dict.get(vertex1, infinity) + weight +
+                       terminal_distance_dict.get(vertex2, infinity) <= self.relevance_bound or
+                       source_distance_dict.get(vertex2, infinity) + weight +
+                       terminal_distance_dict.get(vertex1, infinity) <= self.relevance_bound
+                       for terminal_distance_dict in terminal_distance_dict_list):
+                pruned_edge_list.append(edge_key)
+        for edge_key in pruned_edge_list:
+            self.delete_edge(edge_key)
+        self.statistics['pruned_edges'] += len(pruned_edge_list)
+        return bool(pruned_edge_list)
+
+    def remove_dangling_edges(self):
+        changed = False
+        stack = [vertex_index for vertex_index, edge_key_set in self.incident_edge_dict.items()
+                 if len(edge_key_set) == 1 and vertex_index not in self.kept_vertex_set]
+        while stack:
+            vertex_index = stack.pop()
+            edge_key_set = self.incident_edge_dict[vertex_index]
+            if len(edge_key_set) != 1 or vertex_index in self.kept_vertex_set:
+                continue
+            edge_key = next(iter(edge_key_set))
+            vertex1, vertex2 = self.edge_dict[edge_key][:2]
+            self.delete_edge(edge_key)
+            self.statistics['dangling_edges_removed'] += 1
+            changed = True
+            adjacent_vertex = vertex2 if vertex1 == vertex_index else vertex1
+            if len(self.incident_edge_dict[adjacent_vertex]) == 1:
+                stack.append(adjacent_vertex)
+        return changed
+
+    def merge_parallel_edges(self):
+        changed = False
+        first_edge_dict = {}
+        for edge_key in sorted(self.edge_dict):
+            vertex1, vertex2, weight, reliability, origin = self.edge_dict[edge_key]
+            pair_key = (min(vertex1, vertex2), max(vertex1, vertex2), weight)
+            if pair_key not in first_edge_dict:
+                first_edge_dict[pair_key] = edge_key
+                continue
+            first_edge_key = first_edge_dict[pair_key]
+            first_reliability, first_origin = self.edge_dict[first_edge_key][3:]
+            self.delete_edge(edge_key)
+            self.edge_dict[first_edge_key] = (vertex1, vertex2, weight,
+                                              1 - (1 - first_reliability) * (1 - reliability),
+                                              ('parallel', first_origin, origin))
+            self.statistics['parallel_merges'] += 1
+            changed = True
+        return changed
+
+    def merge_series_edges(self):
+        changed = False
+        for vertex_index in sorted(self.incident_edge_dict):
+            edge_key_set = self.incident_edge_dict[vertex_index]
+            if len(edge_key_set) != 2 or vertex_index in self.kept_vertex_set:
+                continue
+            first_edge_key, second_edge_key = sorted(edge_key_set)
+            first_vertex1, first_vertex2, first_weight, first_reliability, first_origin = \
+                self.edge_dict[first_edge_key]
+            second_vertex1, second_vertex2, second_weight, second_reliability, second_origin = \
+                self.edge_dict[second_edge_key]
+            first_end = first_vertex2 if first_vertex1 == vertex_index else first_vertex1
+            second_end = second_vertex2 if second_vertex1 == vertex_index else second_vertex1
+            self.delete_edge(first_edge_key)
+            self.delete_edge(second_edge_key)
+            changed = True
+            if first_end == second_end:
+                # Both edges go back to the same vertex, so no path passes through this one.
+                self.statistics['dangling_edges_removed'] += 2
+                continue
+            self.insert_edge(first_end, second_end, first_weight + second_weight,
+                             first_reliability * second_reliability, ('series', first_origin, second_origin))
+            self.statistics['series_merges'] += 1
+        return changed
+
+    def build_result(self):
+        """Relabels the remaining vertices with the source first and builds the reduced graph."""
+        used_vertex_set = {vertex_index for edge in self.edge_dict.values() for vertex_index in edge[:2]}
+        used_vertex_set.update(self.kept_vertex_set)
+        used_vertex_set.discard(self.source)
+        label_dict = {self.source: 0}
+        for vertex_index in sorted(used_vertex_set):
+            label_dict[vertex_index] = len(label_dict)
+        reduced_graph = type(self.graph)()
+        reduced_graph.using_weight = self.graph.using_weight
+        reduced_graph.using_reliability = self.graph.using_reliability
+        reduced_graph.initialize_with_size(len(label_dict))
+        edge_origin_list = []
+        vertex1_list = []
+        vertex2_list = []
+        reliability_list = []
+        weight_list = []
+        for edge_key in sorted(self.edge_dict):
+            vertex1, vertex2, weight, reliability, origin = self.edge_dict[edge_key]
+            vertex1_list.append(label_dict[vertex1])
+            vertex2_list.append(label_dict[vertex2])
+            reliability_list.append(reliability)
+            weight_list.append(weight)
+            edge_origin_list.append(origin)
+        reduced_graph.add_edges(vertex1_list, vertex2_list, reliability_list, weight_list)
+        self.statistics['reduced_vertices'] = reduced_graph.number_of_vertices
+        self.statistics['reduced_edges'] = reduced_graph.number_of_edges
+        terminal_list = [label_dict[terminal_index] for terminal_index in self.terminal_list]
+        return ReductionResult(reduced_graph, terminal_list, edge_origin_list, self.statistics)
@@ -0,0 +1,97 @@
+"""Counters, progress reporting and budgets for long reliability runs."""
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+ReliabilityBounds = namedtuple('ReliabilityBounds', ['lower', 'upper', 'complete'])
+
+
+class BudgetExhausted(Exception):
+    """Raised inside a reliability run when its time or node budget runs out."""
+
+
+class Instrumentation:
+    """
+    Collects what a reliability run did and stops it when its budget runs out.
+
+    Runs report each explored subgraph through explore_node, which checks the budgets and calls the
+    progress callback every check_interval nodes. They also add the probability of every settled outcome
+    to success_mass or failure_mass, so that a run stopped early still certifies the reliability to lie
+    between the success mass and one minus the failure mass.
+    """
+    counter_name_list = ['subgraphs_explored', 'memo_hits', 'breadth_first_searches', 'edge_flips', 'clones_made']
+    check_interval = 256
+
+    def __init__(self):
+        self.counter_dict = dict.fromkeys(self.counter_name_list, 0)
+        self.phase_time_dict = {}
+        self.success_mass = 0.0
+        self.failure_mass = 0.0
+        self.time_budget = None
+        self.node_budget = None
+        self.progress_callback = None
+        self.progress_interval = 1.0
+        self.start_time = None
+        self.next_check = self.check_interval
+        self.next_progress_time = float("inf")
+
+    def start(self, time_budget=None, node_budget=None, progress_callback=None, progress_interval=1.0):
+        """Clears the counters and sets the budgets for a new run."""
+        self.__init__()
+        self.time_budget = time_budget
+        self.node_budget = node_budget
+        self.progress_callback = progress_callback
+        self.progress_interval = progress_interval
+        self.start_time = time.perf_counter()
+        if node_budget is not None:
+            self.next_check = min(self.next_check, node_budget)
+        if progress_callback is not None:
+            self.next_progress_time = self.start_time + progress_interval
+
+    def stop(self):
+        if self.progress_callback is not None:
+            self.progress_callback(self)
+        self.progress_callback = None
+
+    @property
+    def elapsed_time(self):
+        if self.start_time is None:
+            return 0.0
+        return time.perf_counter() - self.start_time
+
+    def get_bounds(self, complete=False):
+        return ReliabilityBounds(self.success_mass, 1.0 - self.failure_mass, complete)
+
+    @contextmanager
+    def phase(self, name):
+        """Adds the time spent in the block to the named phase."""
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phase_time_dict[name] = self.phase_time_dict.get(name, 0.0) + time.perf_counter() - start_time
+
+    def explore_node(self):
+        counter_dict = self.counter_dict
+        counter_dict['subgraphs_explored'] += 1
+        if counter_dict['subgraphs_explored'] >= self.next_check:
+            self.check_budget()
+
+    def check_budget(self):
+        node_count = self.counter_dict['subgraphs_explored']
+        self.next_check = node_count + self.check_interval
+        if self.node_budget is not None:
+            if node_count >= self.node_budget:
+                raise BudgetExhausted('node budget of %d exhausted' % self.node_budget)
+            self.next_check = min(self.next_check, self.node_budget)
+        now = time.perf_counter()
+        if self.time_budget is not None and now - self.start_time >= self.time_budget:
+            raise BudgetExhausted('time budget of %g seconds exhausted' % self.time_budget)
+        if now >= self.next_progress_time:
+            self.progress_callback(self)
+            self.next_progress_time = now + self.progress_interval
+
+    def add_outcome(self, probability, reliability):
+        """Records a settled subproblem reached with the given probability."""
+        self.success_mass += probability * reliability
+        self.failure_mass += probability * (1 - reliability)
@@ -4,8 +4,11 @@ from graph import Graph
 
 class Interface:
     """The class for user interfacing with the graph code."""
-    def __init__(self):
+    def __init__(self, result_cache=None):
         self.graph = None
+        # Given a ResultCache, results are kept between sessions, so reopening a graph answers repeated queries
+        # from disk.
+        self.result_cache = result_cache
 
     def main_prompt(self):
         print("===============================")
@@ -31,14 +34,19 @@ class Interface:
             if not self.graph:
                 print('You must create or load a graph first.')
                 continue
+            self.graph.result_cache = self.result_cache
             self.graph.reset_graph()
             if user_input.lower() == 'c':
                 self.check_for_cycles()
             elif user_input.lower() == 'd':
-                self.graph.display_shortest_paths()
+                self.display_shortest_paths()
             elif user_input.lower() == 'e':
                 self.find_reliability()
-        print()
+        if self.result_cache is not None:
+            statistic_dict = self.result_cache.get_statistics()
+            print("Result cache: %d hits, %d misses, %d results in %d bytes" % (
+                statistic_dict['hits'], statistic_dict['misses'], statistic_dict['entries'], statistic_dict['size']))
+            print()
 
     def create_graph_with_user_prompts(self):
         """Asks the user for the information required to build a graph."""
@@ -104,13 +112,32 @@ class Interface:
         else:
             print("No cycles.")
 
+    def display_shortest_paths(self):
+        source_string = input("Enter a source vertex (nothing for vertex 0): ")
+        if source_string:
+            self.graph.display_shortest_paths(int(source_string))
+        else:
+            self.graph.display_shortest_paths()
+
     def find_reliability(self):
-        diameter = float(input("Enter a diameter: "))
+        print('Enter one or more diameters separated by spaces.')
+        diameter_string = input("Enter nothing for the reliability at every diameter: ")
         print('Enter a list of terminals separated by spaces.')
         terminal_string = input("Enter nothing for final node as only terminal: ")
+        terminal_list = None
         if terminal_string:
             terminal_list = list(map(int, terminal_string.split(' ')))
-            reliability = self.graph.attain_reliability_for_diameter(diameter, terminal_list)
+        if diameter_string:
+            diameter_list = list(map(float, diameter_string.split()))
+            reliability_list = self.graph.attain_reliability_curve(diameter_list, terminal_list)
+            if len(diameter_list) == 1:
+                print("The graph reliability is %f" % reliability_list[0])
+                return
         else:
-            reliability = self.graph.attain_reliability_for_diameter(diameter)
-        print("The graph reliability is %f" % reliability)
+            step_list = self.graph.attain_reliability_curve(None, terminal_list)
+            if not step_list:
+                print("The graph reliability is 0 at every diameter")
+            diameter_list = [diameter for diameter, _ in step_list]
+            reliability_list = [reliability for _, reliability in step_list]
+        for diameter, reliability in zip(diameter_list, reliability_list):
+            print("Diameter %g: the graph reliability is %f" % (diameter, reliability))
@@ -1,6 +1,13 @@
+import sys
 from interface import Interface
 
+if len(sys.argv) > 1:
+    # Any arguments select the non-interactive batch runner, for example:
+    # python main.py 'examplegraphs/*.csv' --layout reliability --operation reliability --diameter 3
+    from batch_runner import main
+    sys.exit(main())
+
 interface = Interface()
 interface.main_prompt()
 
-#examplegraphs/has_cycle_and_3_components.csv
\ No newline at end of file
+#examplegraphs/has_cycle_and_3_components.csv
@@ -0,0 +1,172 @@
+"""Monte Carlo estimation of diameter-constrained reliability."""
+import math
+import multiprocessing
+from collections import namedtuple
+from statistics import NormalDist
+import numpy as np
+from graph_reduction import ReliabilityReducer
+
+ReliabilityEstimate = namedtuple('ReliabilityEstimate', ['estimate', 'standard_error', 'number_of_samples',
+                                                         'confidence_interval'])
+
+
+class MonteCarloReliability:
+    """
+    Estimates the probability that every terminal is within the diameter of the source by sampling.
+
+    Each batch draws a boolean matrix of edge states (one row per sample) from the edge reliabilities
+    and relaxes the distances of every sample at once, one hop per round, until nothing changes or no
+    path within the diameter could use another hop.
+
+    The per-batch matrices are samples by arcs (twice the edges) or samples by vertices, so unless batch_size
+    is given, a batch takes the most samples for which samples * (2 * edges + vertices) stays within
+    batch_element_budget, up to maximum_batch_size.
+
+    Each round of estimate runs up to shards_per_round shards of samples_per_shard samples before checking
+    whether to stop, so a seeded estimate is the same on any number of processes.
+    """
+    shards_per_round = 8
+    batch_element_budget = 1 << 22
+    maximum_batch_size = 4096
+
+    def __init__(self, graph, diameter, terminal_list=None, source=0, batch_size=None, reduce=True,
+                 batch_element_budget=None):
+        self.reduction_statistics = None
+        if reduce:
+            graph, terminal_list, _, self.reduction_statistics = ReliabilityReducer(
+                graph, diameter, terminal_list=terminal_list, source=source).reduce()
+            source = 0
+        self.diameter = diameter
+        self.source = source
+        if not terminal_list:
+            terminal_list = [graph.number_of_vertices - 1]
+        self.terminal_array = np.array(sorted(set(terminal_list)), dtype=np.int64)
+        self.number_of_vertices = graph.number_of_vertices
+        kept_edge_list = [edge_index for edge_index in range(graph.number_of_edges)
+                          if not graph.edge_removed_array[edge_index]]
+        self.reliability_array = np.array([graph.edge_reliability_array[edge_index] for edge_index in kept_edge_list])
+        vertex1_array = np.array([graph.edge_vertex1_array[edge_index] for edge_index in kept_edge_list], dtype=np.int64)
+        vertex2_array = np.array([graph.edge_vertex2_array[edge_index] for edge_index in kept_edge_list], dtype=np.int64)
+        weight_array = np.array([graph.edge_weight_array[edge_index] for edge_index in kept_edge_list])
+        # Each edge gives two arcs; arcs are grouped by head so one reduceat finds each vertex's best offer.
+        tail_array = np.concatenate([vertex1_array, vertex2_array])
+        head_array = np.concatenate([vertex2_array, vertex1_array])
+        arc_order = np.argsort(head_array, kind='stable')
+        self.arc_tail_array = tail_array[arc_order]
+        self.arc_head_array = head_array[arc_order]
+        self.arc_weight_array = np.concatenate([weight_array, weight_array])[arc_order]
+        self.arc_edge_array = np.concatenate([np.arange(len(kept_edge_list))] * 2)[arc_order]
+        self.head_vertex_array, self.head_start_array = np.unique(self.arc_head_array, return_index=True)
+        if batch_size is None:
+            batch_size = min(self.maximum_batch_size, max(1, (batch_element_budget or self.batch_element_budget) //
+                                                           (2 * len(kept_edge_list) + self.number_of_vertices)))
+        self.batch_size = batch_size
+        positive_weight_array = weight_array[weight_array > 0]
+        self.maximum_rounds = max(self.number_of_vertices - 1, 0)
+        if len(positive_weight_array) == len(weight_array) and len(weight_array) and math.isfinite(diameter):
+            self.maximum_rounds = min(self.maximum_rounds, int(math.floor(diameter / positive_weight_array.min())))
+
+    def sample_edge_states(self, random_generator, number_of_samples):
+        """Draws a samples by edges boolean matrix that is True where the edge is up."""
+        return random_generator.random((number_of_samples, len(self.reliability_array))) < self.reliability_array
+
+    def count_successes(self, alive_matrix):
+        """Counts the samples in which every terminal is within the diameter of the source."""
+        number_of_samples = alive_matrix.shape[0]
+        distance_matrix = np.full((number_of_samples, self.number_of_vertices), np.inf)
+        distance_matrix[:, self.source] = 0
+        if len(self.arc_edge_array):
+            arc_weight_matrix = np.where(alive_matrix[:, self.arc_edge_array], self.arc_weight_array, np.inf)
+            for _ in range(self.maximum_rounds):
+                offer_matrix = distance_matrix[:, self.arc_tail_array] + arc_weight_matrix
+                best_offer_matrix = np.minimum.reduceat(offer_matrix, self.head_start_array, axis=1)
+                current_matrix = distance_matrix[:, self.head_vertex_array]
+                improved_matrix = best_offer_matrix < current_matrix
+                if not improved_matrix.any():
+                    break
+                distance_matrix[:, self.head_vertex_array] = np.where(improved_matrix, best_offer_matrix,
+                                                                      current_matrix)
+        terminal_distance_matrix = distance_matrix[:, self.terminal_array]
+        # An unreachable terminal fails even when the diameter is infinite.
+        success_array = ((terminal_distance_matrix <= self.diameter) &
+                         np.isfinite(terminal_distance_matrix)).all(axis=1)
+        return int(success_array.sum())
+
+    def run_samples(self, seed_sequence, number_of_samples):
+        """Runs the given number of samples from one seed, returning the number of successes."""
+        random_generator = np.random.default_rng(seed_sequence)
+        successes = 0
+        while number_of_samples > 0:
+            batch_size = min(self.batch_size, number_of_samples)
+            successes += self.count_successes(self.sample_edge_states(random_generator, batch_size))
+            number_of_samples -= batch_size
+        return successes
+
+    def estimate(self, target_standard_error=0.001, maximum_number_of_samples=10 ** 7, samples_per_shard=None,
+                 number_of_processes=None, seed=None, confidence_level=0.95):
+        """
+        Samples until the standard error reaches the target or the sample budget is spent.
+
+        Samples are sharded across a process pool, each shard with its own spawned seed. The stopping
+        rule uses the Agresti-Coull adjusted proportion so that a run of all successes or all failures
+        does not stop after the first round with a zero standard error.
+        """
+        if number_of_processes is None:
+            number_of_processes = multiprocessing.cpu_count()
+        if samples_per_shard is None:
+            samples_per_shard = 4 * self.batch_size
+        seed_sequence = np.random.SeedSequence(seed)
+        successes = 0
+        number_of_samples = 0
+        pool = None
+        if number_of_processes > 1:
+            pool = multiprocessing.Pool(number_of_processes, initializer=initialize_monte_carlo_worker,
+                                        initargs=(self,))
+        try:
+            while number_of_samples < maximum_number_of_samples:
+                shard_count = max(1, min(self.shards_per_round, math.ceil(
+                    (maximum_number_of_samples - number_of_samples) / samples_per_shard)))
+                shard_list = []
+                remaining = maximum_number_of_samples - number_of_samples
+                for shard_seed in seed_sequence.spawn(shard_count):
+                    shard_size = min(samples_per_shard, remaining)
+                    remaining -= shard_size
+                    shard_list.append((shard_seed, shard_size))
+                if pool is None:
+                    successes += sum(self.run_samples(shard_seed, shard_size) for shard_seed, shard_size in shard_list)
+                else:
+                    successes += sum(pool.starmap(run_monte_carlo_worker, shard_list))
+                number_of_samples += sum(shard_size for _, shard_size in shard_list)
+                adjusted_estimate = (successes + 2) / (number_of_samples + 4)
+                if math.sqrt(adjusted_estimate * (1 - adjusted_estimate) / (number_of_samples + 4)) <= \
+                        target_standard_error:
+                    break
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+        return self.summarize(successes, number_of_samples, confidence_level)
+
+    @staticmethod
+    def summarize(successes, number_of_samples, confidence_level=0.95):
+        """Builds the estimate, its standard error and a Wilson score confidence interval."""
+        estimate = successes / number_of_samples
+        standard_error = math.sqrt(estimate * (1 - estimate) / number_of_samples)
+        z = NormalDist().inv_cdf((1 + confidence_level) / 2)
+        denominator = 1 + z * z / number_of_samples
+        center = (estimate + z * z / (2 * number_of_samples)) / denominator
+        half_width = z * math.sqrt(estimate * (1 - estimate) / number_of_samples +
+                                   z * z / (4 * number_of_samples * number_of_samples)) / denominator
+        return ReliabilityEstimate(estimate, standard_error, number_of_samples,
+                                   (max(0.0, center - half_width), min(1.0, center + half_width)))
+
+
+monte_carlo_worker_state = {}
+
+
+def initialize_monte_carlo_worker(estimator):
+    monte_carlo_worker_state['estimator'] = estimator
+
+
+def run_monte_carlo_worker(seed_sequence, number_of_samples):
+    return monte_carlo_worker_state['estimator'].run_samples(seed_sequence, number_of_samples)
@@ -0,0 +1,111 @@
+"""Per-query traversal state, kept apart from the graph so queries can run side by side."""
+from array import array
+from instrumentation import Instrumentation
+
+
+class QueryContext:
+    """
+    The visited marks, parents, distances, cycle flag and counters of the queries run against one graph.
+
+    Visited and reached marks are epoch stamps: a vertex counts as visited only when its stamp equals the
+    current epoch, so start_query forgets the previous query by incrementing the epoch instead of clearing
+    every array. Parents and distances are only read for vertices reached in the current epoch. The query
+    methods never change the graph, so each thread can answer queries against a shared, frozen graph with
+    its own context.
+    """
+    query_name_list = ['check_for_cycles', 'find_number_of_components', 'find_shortest_path', 'attain_reliability']
+
+    def __init__(self, graph):
+        self.graph = graph
+        self.epoch = 1
+        self.visited_epoch_array = array('q')
+        self.reached_epoch_array = array('q')
+        self.parent_array = array('q')
+        self.distance_array = array('d')
+        self.has_a_cycle = False
+        self.instrumentation = Instrumentation()
+        self.resize()
+
+    def resize(self):
+        """Grows the arrays to the graph's current number of vertices."""
+        missing_count = self.graph.number_of_vertices - len(self.visited_epoch_array)
+        if missing_count > 0:
+            self.visited_epoch_array.extend(array('q', [0]) * missing_count)
+            self.reached_epoch_array.extend(array('q', [0]) * missing_count)
+            self.parent_array.extend(array('q', [-1]) * missing_count)
+            self.distance_array.extend(array('d', [float("inf")]) * missing_count)
+
+    def start_query(self):
+        self.epoch += 1
+        self.has_a_cycle = False
+        self.resize()
+
+    def is_visited(self, vertex_index):
+        return self.visited_epoch_array[vertex_index] == self.epoch
+
+    def set_visited(self, vertex_index, visited):
+        self.visited_epoch_array[vertex_index] = self.epoch if visited else 0
+
+    def reach(self, vertex_index):
+        """Stamps a vertex as reached in this epoch, clearing its parent and distance if it was not yet."""
+        if self.reached_epoch_array[vertex_index] != self.epoch:
+            self.reached_epoch_array[vertex_index] = self.epoch
+            self.parent_array[vertex_index] = -1
+            self.distance_array[vertex_index] = float("inf")
+
+    def get_parent(self, vertex_index):
+        if self.reached_epoch_array[vertex_index] != self.epoch:
+            return -1
+        return self.parent_array[vertex_index]
+
+    def set_parent(self, vertex_index, parent):
+        self.reach(vertex_index)
+        self.parent_array[vertex_index] = parent
+
+    def get_distance(self, vertex_index):
+        if self.reached_epoch_array[vertex_index] != self.epoch:
+            return float("inf")
+        return self.distance_array[vertex_index]
+
+    def set_distance(self, vertex_index, distance):
+        self.reach(vertex_index)
+        self.distance_array[vertex_index] = distance
+
+    def run_query(self, query):
+        """Answers a (name, *arguments) query, where name is one of query_name_list."""
+        name, *argument_list = query
+        if name not in self.query_name_list:
+            raise ValueError('unknown query %r' % name)
+        return getattr(self, name)(*argument_list)
+
+    def check_for_cycles(self):
+        self.start_query()
+        self.graph.iterative_depth_first_search(0, self.graph.using_reliability, context=self)
+        return self.has_a_cycle
+
+    def find_number_of_components(self):
+        self.start_query()
+        number_of_components = 0
+        visited_epoch_array = self.visited_epoch_array
+        for vertex_index in range(self.graph.number_of_vertices):
+            if visited_epoch_array[vertex_index] != self.epoch:
+                self.graph.iterative_depth_first_search(vertex_index, self.graph.using_reliability, context=self)
+                number_of_components += 1
+        return number_of_components
+
+    def find_shortest_path(self, source, target, distance_bound=float("inf")):
+        """Returns the distance from source to target and the path's vertices, or infinity and [] if out of reach."""
+        self.start_query()
+        self.graph.dijkstra_search([source], context=self, target=target, distance_bound=distance_bound)
+        if not self.is_visited(target):
+            return float("inf"), []
+        path_list = [target]
+        while path_list[-1] != source:
+            path_list.append(self.get_parent(path_list[-1]))
+        path_list.reverse()
+        return self.get_distance(target), path_list
+
+    def attain_reliability(self, diameter, terminal_list=None, time_budget=None, node_budget=None):
+        return self.graph.attain_reliability_by_factoring(diameter, terminal_list=terminal_list,
+                                                          time_budget=time_budget, node_budget=node_budget,
+                                                          context=self)
@@ -0,0 +1,278 @@
+"""A localhost HTTP service answering graph queries against graphs kept loaded in memory."""
+import argparse
+import asyncio
+import collections
+import concurrent.futures
+import json
+import time
+import traceback
+from urllib.parse import parse_qsl, urlsplit
+from batch_runner import BatchRunner
+from result_cache import ResultCache
+
+
+class QueryService:
+    """
+    Loads named graphs once and answers queries on them over HTTP, returning JSON.
+
+    Endpoints:
+
+    - POST /graphs with a JSON body {"name", "file", "layout", ...} loads a graph, where the other keys are
+      BatchRunner.graph_parameter_list (with "use_cache" to load through the memory-mapped binary cache);
+    - GET /graphs lists the loaded graphs;
+    - GET /cycles, /components, /shortest_paths and /reliability take the graph's name as ?graph= and the
+      operation's parameters as in BatchRunner (terminal_list and diameter_list comma separated);
+    - GET /metrics reports each endpoint's request count, errors, coalesced requests and latencies.
+
+    Loaded graphs are frozen, and every query gets its own query context. Cycles, components and shortest
+    paths run on a thread pool, so a large graph does not stall the event loop and the other clients;
+    on graphs of at most inline_edge_limit edges they are answered on the loop, since that is quicker
+    than handing them to a thread. Reliability runs on a process pool whose workers load each graph the
+    first time they need it and then keep it. A request identical to one still in flight waits for the
+    same answer instead of computing it again. Requests for unknown paths share one metrics entry.
+    """
+    offloaded_operation_set = {'reliability'}
+    inline_edge_limit = 10000
+    integer_parameter_list = ['source', 'target']
+    float_parameter_list = ['diameter', 'time_budget', 'reliability_threshold', 'cutoff_radius']
+    latency_window = 1024
+
+    def __init__(self, number_of_processes=None, result_cache_path=None):
+        self.graph_dict = {}
+        self.graph_specification_dict = {}
+        self.in_flight_dict = {}
+        self.metric_dict = {}
+        self.load_count = 0
+        self.result_cache_path = result_cache_path
+        self.executor = concurrent.futures.ProcessPoolExecutor(number_of_processes)
+        self.thread_executor = concurrent.futures.ThreadPoolExecutor()
+
+    def close(self):
+        self.executor.shutdown(cancel_futures=True)
+        self.thread_executor.shutdown(cancel_futures=True)
+
+    def record_latency(self, endpoint, seconds, error=False, coalesced=False):
+        metric = self.metric_dict.get(endpoint)
+        if metric is None:
+            metric = self.metric_dict[endpoint] = {'count': 0, 'errors': 0, 'coalesced': 0, 'total_seconds': 0.0,
+                                                   'maximum_seconds': 0.0,
+                                                   'recent': collections.deque(maxlen=self.latency_window)}
+        metric['count'] += 1
+        metric['errors'] += error
+        metric['coalesced'] += coalesced
+        metric['total_seconds'] += seconds
+        metric['maximum_seconds'] = max(metric['maximum_seconds'], seconds)
+        metric['recent'].append(seconds)
+
+    def get_metrics(self):
+        """Returns each endpoint's counts, mean and maximum latency, and percentiles over its recent requests."""
+        metrics_dict = {}
+        for endpoint, metric in sorted(self.metric_dict.items()):
+            recent_list = sorted(metric['recent'])
+            endpoint_dict = {name: metric[name] for name in ['count', 'errors', 'coalesced', 'maximum_seconds']}
+            endpoint_dict['mean_seconds'] = metric['total_seconds'] / metric['count']
+            for percentile in [50, 95, 99]:
+                endpoint_dict['p%d_seconds' % percentile] = recent_list[
+                    min(len(recent_list) - 1, len(recent_list) * percentile // 100)]
+            metrics_dict[endpoint] = endpoint_dict
+        return metrics_dict
+
+    async def load_graph(self, specification):
+        """Loads and freezes a graph from a BatchRunner-style job, replacing any graph of the same name."""
+        if not isinstance(specification, dict):
+            raise ValueError('a graph must be described by a JSON object')
+        for key in specification:
+            if key not in ['name', 'use_cache'] + BatchRunner.graph_parameter_list:
+                raise ValueError('unknown graph parameter %r' % key)
+        name = specification['name']
+        loop = asyncio.get_running_loop()
+        graph = await loop.run_in_executor(None, BatchRunner.load_graph, specification,
+                                           bool(specification.get('use_cache')))
+        graph.freeze()
+        self.graph_dict[name] = graph
+        # Workers load from the specification and keep graphs by it; the load number keeps a reloaded
+        # graph from being answered with a worker's copy of the old one.
+        self.load_count += 1
+        self.graph_specification_dict[name] = (self.load_count, json.dumps(specification, sort_keys=True))
+        return {'name': name, 'vertices': graph.number_of_vertices, 'edges': graph.number_of_edges}
+
+    def parse_job(self, operation, query_dict):
+        job = {'operation': operation}
+        for name, value in query_dict.items():
+            if name == 'graph':
+                continue
+            if name in self.integer_parameter_list:
+                job[name] = int(value)
+                if job[name] < 0:
+                    raise ValueError('%s must not be negative' % name)
+            elif name in self.float_parameter_list:
+                job[name] = float(value)
+            elif name == 'terminal_list':
+                job[name] = [int(terminal) for terminal in value.split(',') if terminal]
+                if any(terminal < 0 for terminal in job[name]):
+                    raise ValueError('terminals must not be negative')
+            elif name == 'diameter_list':
+                job[name] = [float(diameter) for diameter in value.split(',') if diameter]
+            elif name == 'method':
+                job[name] = value
+            else:
+                raise ValueError('unknown parameter %r' % name)
+        return job
+
+    async def answer(self, name, job):
+        graph = self.graph_dict[name]
+        vertex_list = job.get('terminal_list', []) + [job[key] for key in ['source', 'target'] if key in job]
+        if any(vertex >= graph.number_of_vertices for vertex in vertex_list):
+            raise IndexError('vertex out of range for graph %r' % name)
+        loop = asyncio.get_running_loop()
+        if job['operation'] not in self.offloaded_operation_set:
+            if graph.number_of_edges <= self.inline_edge_limit:
+                return BatchRunner.answer_job(graph, job)
+            return await loop.run_in_executor(self.thread_executor, BatchRunner.answer_job, graph, job)
+        return await loop.run_in_executor(self.executor, answer_in_worker, self.graph_specification_dict[name],
+                                          job, self.result_cache_path)
+
+    async def handle_request(self, method, path, query_dict, body):
+        """Returns the HTTP status and JSON-ready payload for one request."""
+        endpoint = path.strip('/')
+        if endpoint == 'metrics':
+            return 200, self.get_metrics()
+        if endpoint == 'graphs':
+            if method == 'POST':
+                return 200, await self.load_graph(json.loads(body or b'{}'))
+            return 200, {name: {'vertices': graph.number_of_vertices, 'edges': graph.number_of_edges}
+                         for name, graph in sorted(self.graph_dict.items())}
+        if endpoint not in BatchRunner.operation_list:
+            return 404, {'error': 'unknown endpoint %r' % path}
+        name = query_dict.get('graph')
+        if name not in self.graph_dict:
+            return 404, {'error': 'no graph named %r is loaded' % name}
+        job = self.parse_job(endpoint, query_dict)
+        key = (self.graph_specification_dict[name], json.dumps(job, sort_keys=True))
+        task = self.in_flight_dict.get(key)
+        coalesced = task is not None
+        if task is None:
+            task = asyncio.ensure_future(self.answer(name, job))
+            self.in_flight_dict[key] = task
+            task.add_done_callback(lambda _: self.in_flight_dict.pop(key, None))
+        # Shielded, so one client disconnecting does not cancel the answer others are waiting on.
+        result = await asyncio.shield(task)
+        return 200, {'result': result, 'coalesced': coalesced}
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                start_time = time.perf_counter()
+                header_dict = {}
+                try:
+                    method, target, version = request_line.decode('latin-1').split()
+                    while True:
+                        header_line = (await reader.readline()).decode('latin-1').strip()
+                        if not header_line:
+                            break
+                        header_name, _, header_value = header_line.partition(':')
+                        header_dict[header_name.strip().lower()] = header_value.strip()
+                    body = await reader.readexactly(int(header_dict.get('content-length', 0)))
+                except ValueError as exception:
+                    # The rest of the stream cannot be framed, so this answers and ends the connection.
+                    await self.write_response(writer, 400, {'error': 'malformed request: %s' % exception}, False)
+                    self.record_latency('malformed', time.perf_counter() - start_time, error=True)
+                    break
+                url = urlsplit(target)
+                coalesced = False
+                try:
+                    status, payload = await self.handle_request(method, url.path, dict(parse_qsl(url.query)), body)
+                    coalesced = isinstance(payload, dict) and payload.get('coalesced', False)
+                except (KeyError, IndexError, ValueError, TypeError) as exception:
+                    status, payload = 400, {'error': '%s: %s' % (type(exception).__name__, exception)}
+                except Exception as exception:
+                    traceback.print_exc()
+                    status, payload = 500, {'error': '%s: %s' % (type(exception).__name__, exception)}
+                keep_alive = (header_dict.get('connection', '').lower() != 'close' and
+                              (version == 'HTTP/1.1' or header_dict.get('connection', '').lower() == 'keep-alive'))
+                await self.write_response(writer, status, payload, keep_alive)
+                endpoint = url.path.strip('/')
+                if endpoint not in ['metrics', 'graphs'] + BatchRunner.operation_list:
+                    endpoint = 'unknown'
+                self.record_latency(endpoint, time.perf_counter() - start_time, error=status != 200,
+                                    coalesced=coalesced)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            # Cancellation only comes at shutdown, so the connection just ends.
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def write_response(writer, status, payload, keep_alive):
+        response_body = json.dumps(payload, default=make_json_value).encode()
+        writer.write(('HTTP/1.1 %d %s\r\nContent-Type: application/json\r\nContent-Length: %d\r\n'
+                      'Connection: %s\r\n\r\n' % (status, 'OK' if status == 200 else 'Error', len(response_body),
+                                                  'keep-alive' if keep_alive else 'close')).encode())
+        writer.write(response_body)
+        await writer.drain()
+
+    async def start_server(self, host='127.0.0.1', port=8765):
+        # Forked workers keep a copy of every socket open when they start, which would hold closed connections
+        # open, so the pool (started whole by its first task) is started before the first connection.
+        await asyncio.get_running_loop().run_in_executor(self.executor, int)
+        return await asyncio.start_server(self.handle_connection, host, port)
+
+    async def serve(self, host='127.0.0.1', port=8765):
+        server = await self.start_server(host, port)
+        async with server:
+            await server.serve_forever()
+
+
+def make_json_value(value):
+    """Converts the arrays and named tuples in query answers into JSON values."""
+    if hasattr(value, '_asdict'):
+        return value._asdict()
+    return list(value)
+
+
+service_worker_state = {}
+
+
+def answer_in_worker(graph_specification, job, result_cache_path):
+    graph = service_worker_state.get(graph_specification)
+    if graph is None:
+        specification = json.loads(graph_specification[1])
+        graph = BatchRunner.load_graph(specification, use_cache=bool(specification.get('use_cache')))
+        if result_cache_path is not None:
+            graph.result_cache = ResultCache(result_cache_path)
+        graph.freeze()
+        service_worker_state[graph_specification] = graph
+    return BatchRunner.answer_job(graph, job)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Serves graph queries on localhost from graphs kept in memory.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--processes', type=int, help='worker processes for reliability queries')
+    parser.add_argument('--graph', action='append', default=[], metavar='NAME=FILE[:LAYOUT]',
+                        help='graph to load at startup, such as p=examplegraphs/petingi_graph.csv:reliability')
+    parser.add_argument('--cache', action='store_true', help='load graphs through memory-mapped sidecar caches')
+    parser.add_argument('--result-cache', help='SQLite file of reliability results shared by the workers')
+    arguments = parser.parse_args()
+    service = QueryService(number_of_processes=arguments.processes, result_cache_path=arguments.result_cache)
+
+    async def start():
+        for graph_argument in arguments.graph:
+            name, _, file_layout = graph_argument.partition('=')
+            file_path, _, layout = file_layout.partition(':')
+            print(await service.load_graph({'name': name, 'file': file_path, 'layout': layout or 'plain',
+                                            'use_cache': arguments.cache}))
+        print('Serving on http://%s:%d' % (arguments.host, arguments.port))
+        await service.serve(arguments.host, arguments.port)
+    try:
+        asyncio.run(start())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
@@ -0,0 +1,87 @@
+"""Diameter-constrained reliability at every diameter from one factoring run."""
+import sys
+from reliability_engine import ReliabilityEngine
+
+
+class ReliabilityCurveEngine(ReliabilityEngine):
+    """
+    Finds the distribution of the largest source to terminal distance, up to a maximum diameter.
+
+    The factoring is the same as ReliabilityEngine's at the maximum diameter, but a subproblem's value is a
+    dictionary from the largest terminal distance to its probability, with infinity standing for a terminal
+    beyond the maximum diameter. A terminal is settled once its distance cannot shrink any more, rather than
+    once it is within the diameter, and the key keeps only the largest settled distance. The reliability at
+    any diameter up to the maximum is the probability of the distances no larger than it.
+    """
+    def find_distance_distribution(self):
+        recursion_limit = sys.getrecursionlimit()
+        sys.setrecursionlimit(max(recursion_limit, 4 * len(self.edge_order) + 1000))
+        try:
+            return self.factor(0, 0, float("-inf"), self.initial_state)
+        finally:
+            sys.setrecursionlimit(recursion_limit)
+
+    def factor(self, level, settled_mask, settled_distance, state):
+        """Returns the distance distribution of the subproblem whose first undecided edge is at the given level."""
+        key = (level, settled_mask, settled_distance, state)
+        if key in self.memo:
+            return self.memo[key]
+        reduced_state = self.reduce_state(level, settled_mask, settled_distance, state)
+        if isinstance(reduced_state, dict):
+            distribution = reduced_state
+        else:
+            settled_mask, settled_distance, state = reduced_state
+            reduced_key = (level, settled_mask, settled_distance, state)
+            if reduced_key in self.memo:
+                distribution = self.memo[reduced_key]
+            else:
+                edge_index = self.edge_order[level]
+                edge_reliability = self.graph.edge_reliability_array[edge_index]
+                up_distribution = self.factor(level + 1, settled_mask, settled_distance,
+                                              self.add_edge_to_state(level, state))
+                distribution = {distance: edge_reliability * probability
+                                for distance, probability in up_distribution.items()}
+                if edge_reliability < 1:
+                    down_distribution = self.factor(level + 1, settled_mask, settled_distance,
+                                                    self.project_state(level, state))
+                    for distance, probability in down_distribution.items():
+                        distribution[distance] = (distribution.get(distance, 0.0) +
+                                                  (1 - edge_reliability) * probability)
+                self.memo[reduced_key] = distribution
+        self.memo[key] = distribution
+        return distribution
+
+    def reduce_state(self, level, settled_mask, settled_distance, state):
+        """
+        Settles a state or puts it in canonical form.
+
+        Returns a one-entry distribution once every terminal's distance is final, or is beyond the maximum
+        diameter even with every undecided edge up, and otherwise the settled terminal mask and largest settled
+        distance with the state stripped of distances that cannot shorten the path to an unsettled terminal.
+        """
+        vertex_count = len(self.level_vertex_list[level])
+        source_position = self.source_position_list[level]
+        source_row = source_position * vertex_count
+        # Optimistic distances, letting every undecided edge be up.
+        future_distance_list = self.future_distance_list_list[level]
+        optimistic_length_list = [min(length, future_length)
+                                  for length, future_length in zip(state, future_distance_list)]
+        source_distance_list = self.find_dense_distances(optimistic_length_list, vertex_count, source_position)
+        last_level = level == len(self.edge_order)
+        unsettled_position_list = []
+        for terminal_number, position in enumerate(self.terminal_position_list_list[level]):
+            if (settled_mask >> terminal_number) & 1:
+                continue
+            if source_distance_list[position] > self.diameter or source_distance_list[position] == float("inf"):
+                return {float("inf"): 1.0}
+            if last_level or state[source_row + position] <= source_distance_list[position]:
+                settled_mask |= 1 << terminal_number
+                settled_distance = max(settled_distance, state[source_row + position])
+            else:
+                unsettled_position_list.append(position)
+        if not unsettled_position_list:
+            return {settled_distance: 1.0}
+        terminal_distance_list_list = [self.find_dense_distances(optimistic_length_list, vertex_count, position)
+                                       for position in unsettled_position_list]
+        return settled_mask, settled_distance, self.strip_state(state, vertex_count, source_distance_list,
+                                                                terminal_distance_list_list)
@@ -0,0 +1,302 @@
+"""Exact diameter-constrained reliability by factoring on edges."""
+import heapq
+import sys
+from operator import itemgetter
+from instrumentation import Instrumentation
+
+
+class ReliabilityEngine:
+    """
+    Computes the probability that every terminal is within the diameter of the source.
+
+    Edges are factored one at a time, in breadth first order from the source, into an up branch and a
+    down branch. The up branch stands in for contraction: the edge is kept for certain, but its
+    endpoints are not merged because its weight still counts toward the diameter. After each level
+    only the frontier matters, so a subproblem is keyed by the level and the distances (capped at the
+    diameter) among the frontier, source and terminal vertices using the up edges so far. Different
+    edge states with the same key share one memo entry.
+
+    Each settled subproblem and memo hit adds its probability to the instrumentation's success or failure
+    mass, so a run stopped by the instrumentation's budget still bounds the reliability.
+    """
+    # Edges that never come up cannot change the reliability, unless the reliabilities may change later.
+    keep_failed_edges = False
+
+    def __init__(self, graph, diameter, terminal_list=None, source=0, instrumentation=None):
+        graph.build_adjacency_arrays()
+        self.graph = graph
+        self.diameter = diameter
+        # Slack so that rounding never treats a path of exactly the diameter as too long to matter.
+        self.relevance_bound = diameter + 1e-9 * max(1.0, abs(diameter))
+        self.source = source
+        if not terminal_list:
+            terminal_list = [graph.number_of_vertices - 1]
+        self.terminal_list = sorted(set(terminal_list))
+        self.memo = {}
+        self.instrumentation = instrumentation or Instrumentation()
+        self.edge_order = self.order_edges(self.find_relevant_edges())
+        self.prepare_levels()
+
+    def find_reliability(self):
+        recursion_limit = sys.getrecursionlimit()
+        sys.setrecursionlimit(max(recursion_limit, 4 * len(self.edge_order) + 1000))
+        try:
+            return self.factor(0, 0, self.initial_state)
+        finally:
+            sys.setrecursionlimit(recursion_limit)
+
+    def factor(self, level, satisfied_mask, state, path_probability=1.0):
+        """
+        Returns the reliability of the subproblem whose first undecided edge is at the given level.
+
+        path_probability is the probability of the edge states that led here, used only for the bounds.
+        """
+        instrumentation = self.instrumentation
+        key = (level, satisfied_mask, state)
+        if key in self.memo:
+            instrumentation.counter_dict['memo_hits'] += 1
+            instrumentation.add_outcome(path_probability, self.memo[key])
+            return self.memo[key]
+        instrumentation.explore_node()
+        reduced_state = self.reduce_state(level, satisfied_mask, state)
+        if not isinstance(reduced_state, tuple):
+            reliability = reduced_state
+            instrumentation.add_outcome(path_probability, reliability)
+        else:
+            satisfied_mask, state = reduced_state
+            reduced_key = (level, satisfied_mask, state)
+            if reduced_key in self.memo:
+                reliability = self.memo[reduced_key]
+                instrumentation.counter_dict['memo_hits'] += 1
+                instrumentation.add_outcome(path_probability, reliability)
+            else:
+                edge_index = self.edge_order[level]
+                edge_reliability = self.graph.edge_reliability_array[edge_index]
+                reliability = edge_reliability * self.factor(level + 1, satisfied_mask,
+                                                             self.add_edge_to_state(level, state),
+                                                             path_probability * edge_reliability)
+                if edge_reliability < 1:
+                    reliability += (1 - edge_reliability) * self.factor(level + 1, satisfied_mask,
+                                                                        self.project_state(level, state),
+                                                                        path_probability * (1 - edge_reliability))
+                self.memo[reduced_key] = reliability
+        self.memo[key] = reliability
+        return reliability
+
+    def reduce_state(self, level, satisfied_mask, state):
+        """
+        Settles a state or puts it in canonical form.
+
+        Returns 1.0 if every terminal is already within the diameter, 0.0 if some terminal stays out of
+        reach even with every undecided edge up, and otherwise the updated satisfied terminal mask with
+        the state stripped of distances that cannot be part of a short enough path to an unsatisfied
+        terminal.
+        """
+        vertex_count = len(self.level_vertex_list[level])
+        source_position = self.source_position_list[level]
+        source_row = source_position * vertex_count
+        unsatisfied_position_list = []
+        for terminal_number, position in enumerate(self.terminal_position_list_list[level]):
+            # An unreachable terminal is never satisfied, not even when the diameter is infinite.
+            if state[source_row + position] <= self.diameter and state[source_row + position] < float("inf"):
+                satisfied_mask |= 1 << terminal_number
+            elif not (satisfied_mask >> terminal_number) & 1:
+                unsatisfied_position_list.append(position)
+        if not unsatisfied_position_list:
+            return 1.0
+        # Optimistic distances, letting every undecided edge be up.
+        future_distance_list = self.future_distance_list_list[level]
+        optimistic_length_list = [min(length, future_length)
+                                  for length, future_length in zip(state, future_distance_list)]
+        source_distance_list = self.find_dense_distances(optimistic_length_list, vertex_count, source_position)
+        if any(source_distance_list[position] > self.diameter or source_distance_list[position] == float("inf")
+               for position in unsatisfied_position_list):
+            return 0.0
+        terminal_distance_list_list = [self.find_dense_distances(optimistic_length_list, vertex_count, position)
+                                       for position in unsatisfied_position_list]
+        return satisfied_mask, self.strip_state(state, vertex_count, source_distance_list, terminal_distance_list_list)
+
+    def strip_state(self, state, vertex_count, source_distance_list, terminal_distance_list_list):
+        """Drops the distances that cannot be part of a short enough path from the source to any given terminal."""
+        reduced_state = list(state)
+        for position_x in range(vertex_count):
+            row = position_x * vertex_count
+            for position_y in range(position_x + 1, vertex_count):
+                length = state[row + position_y]
+                if length == float("inf"):
+                    continue
+                if not any(source_distance_list[position_x] + length + terminal_distance_list[position_y] <=
+                           self.relevance_bound or
+                           source_distance_list[position_y] + length + terminal_distance_list[position_x] <=
+                           self.relevance_bound
+                           for terminal_distance_list in terminal_distance_list_list):
+                    reduced_state[row + position_y] = float("inf")
+                    reduced_state[position_y * vertex_count + position_x] = float("inf")
+        return tuple(reduced_state)
+
+    @staticmethod
+    def find_dense_distances(length_list, vertex_count, start):
+        """Runs Dijkstra over a small dense matrix of lengths."""
+        distance_list = [float("inf")] * vertex_count
+        distance_list[start] = 0
+        settled_list = [False] * vertex_count
+        for _ in range(vertex_count):
+            vertex_position = -1
+            minimum_distance = float("inf")
+            for position in range(vertex_count):
+                if not settled_list[position] and distance_list[position] < minimum_distance:
+                    vertex_position = position
+                    minimum_distance = distance_list[position]
+            if vertex_position == -1:
+                break
+            settled_list[vertex_position] = True
+            row = vertex_position * vertex_count
+            for position in range(vertex_count):
+                length = minimum_distance + length_list[row + position]
+                if length < distance_list[position]:
+                    distance_list[position] = length
+        return distance_list
+
+    def add_edge_to_state(self, level, state):
+        """Returns the next level's state after the edge at this level comes up."""
+        edge_index = self.edge_order[level]
+        vertex_count = len(self.level_vertex_list[level])
+        position1 = self.level_position_dict_list[level][self.graph.edge_vertex1_array[edge_index]]
+        position2 = self.level_position_dict_list[level][self.graph.edge_vertex2_array[edge_index]]
+        weight = self.graph.edge_weight_array[edge_index]
+        if state[position1 * vertex_count + position2] <= weight:
+            return self.project_state(level, state)
+        row1 = state[position1 * vertex_count:(position1 + 1) * vertex_count]
+        row2 = state[position2 * vertex_count:(position2 + 1) * vertex_count]
+        distance_list = list(state)
+        for position_x in range(vertex_count):
+            through1 = row1[position_x] + weight
+            through2 = row2[position_x] + weight
+            if through1 > self.diameter and through2 > self.diameter:
+                continue
+            row = position_x * vertex_count
+            for position_y in range(vertex_count):
+                length = min(through1 + row2[position_y], through2 + row1[position_y])
+                if length < distance_list[row + position_y] and length <= self.diameter:
+                    distance_list[row + position_y] = length
+        return self.project_state(level, distance_list)
+
+    def project_state(self, level, state):
+        """Maps a state over this level's vertices onto the next level's vertices."""
+        return self.projection_getter_list[level]((*state, float("inf"), 0.0))[:-1]
+
+    def find_relevant_edges(self):
+        """Finds the edges that can lie on a source to terminal walk no longer than the diameter."""
+        graph = self.graph
+        source_distance_array = graph.shortest_paths(self.source, distance_bound=self.relevance_bound)[0]
+        terminal_distance_array_list = [graph.shortest_paths(terminal_index, distance_bound=self.relevance_bound)[0]
+                                        for terminal_index in self.terminal_list]
+        relevant_edge_list = []
+        for edge_index in range(graph.number_of_edges):
+            vertex1 = graph.edge_vertex1_array[edge_index]
+            vertex2 = graph.edge_vertex2_array[edge_index]
+            weight = graph.edge_weight_array[edge_index]
+            if graph.edge_removed_array[edge_index]:
+                continue
+            if graph.edge_reliability_array[edge_index] <= 0 and not self.keep_failed_edges:
+                continue
+            if vertex1 == vertex2:
+                continue
+            for terminal_distance_array in terminal_distance_array_list:
+                if (source_distance_array[vertex1] + weight + terminal_distance_array[vertex2] <= self.relevance_bound or
+                        source_distance_array[vertex2] + weight + terminal_distance_array[vertex1] <= self.relevance_bound):
+                    relevant_edge_list.append(edge_index)
+                    break
+        return relevant_edge_list
+
+    def order_edges(self, edge_list):
+        """Orders edges by the breadth first position of their later endpoint to keep the frontier narrow."""
+        graph = self.graph
+        order_list = [-1] * graph.number_of_vertices
+        order_list[self.source] = 0
+        queue = [self.source]
+        for vertex_index in queue:
+            for adjacent_vertex, edge_index in graph.get_adjacent_edges(vertex_index):
+                if order_list[adjacent_vertex] == -1:
+                    order_list[adjacent_vertex] = len(queue)
+                    queue.append(adjacent_vertex)
+
+        def edge_key(edge_index):
+            vertex_order1 = order_list[graph.edge_vertex1_array[edge_index]]
+            vertex_order2 = order_list[graph.edge_vertex2_array[edge_index]]
+            return max(vertex_order1, vertex_order2), min(vertex_order1, vertex_order2), edge_index
+        return sorted(edge_list, key=edge_key)
+
+    def prepare_levels(self):
+        """Works out each level's vertices, the projections between levels and the optimistic future distances."""
+        graph = self.graph
+        level_count = len(self.edge_order)
+        first_level_dict = {}
+        last_level_dict = {}
+        for level, edge_index in enumerate(self.edge_order):
+            for vertex_index in (graph.edge_vertex1_array[edge_index], graph.edge_vertex2_array[edge_index]):
+                first_level_dict.setdefault(vertex_index, level)
+                last_level_dict[vertex_index] = level
+        kept_vertex_set = set(self.terminal_list)
+        kept_vertex_set.add(self.source)
+        self.level_vertex_list = []
+        self.level_position_dict_list = []
+        for level in range(level_count + 1):
+            vertex_list = sorted(kept_vertex_set.union(
+                vertex_index for vertex_index in first_level_dict
+                if first_level_dict[vertex_index] <= level <= last_level_dict[vertex_index]))
+            self.level_vertex_list.append(vertex_list)
+            self.level_position_dict_list.append({vertex_index: position
+                                                  for position, vertex_index in enumerate(vertex_list)})
+        # States are padded with an infinite and a zero entry so that every projection is a plain lookup.
+        self.projection_getter_list = []
+        for level in range(level_count):
+            old_position_dict = self.level_position_dict_list[level]
+            old_vertex_count = len(self.level_vertex_list[level])
+            infinite_index = old_vertex_count * old_vertex_count
+            projection_list = []
+            for vertex_x in self.level_vertex_list[level + 1]:
+                for vertex_y in self.level_vertex_list[level + 1]:
+                    if vertex_x in old_position_dict and vertex_y in old_position_dict:
+                        projection_list.append(old_position_dict[vertex_x] * old_vertex_count +
+                                               old_position_dict[vertex_y])
+                    elif vertex_x == vertex_y:
+                        projection_list.append(infinite_index + 1)
+                    else:
+                        projection_list.append(infinite_index)
+            projection_list.append(infinite_index)
+            self.projection_getter_list.append(itemgetter(*projection_list))
+        self.future_distance_list_list = [self.find_future_distances(level) for level in range(level_count + 1)]
+        vertex_list = self.level_vertex_list[0]
+        self.initial_state = tuple(0.0 if vertex_x == vertex_y else float("inf")
+                                   for vertex_x in vertex_list for vertex_y in vertex_list)
+        self.source_position_list = [position_dict[self.source] for position_dict in self.level_position_dict_list]
+        self.terminal_position_list_list = [[position_dict[terminal_index] for terminal_index in self.terminal_list]
+                                            for position_dict in self.level_position_dict_list]
+
+    def find_future_distances(self, level):
+        """Finds the distances among a level's vertices using only the edges from that level on."""
+        graph = self.graph
+        adjacency_dict = {}
+        for edge_index in self.edge_order[level:]:
+            vertex1 = graph.edge_vertex1_array[edge_index]
+            vertex2 = graph.edge_vertex2_array[edge_index]
+            weight = graph.edge_weight_array[edge_index]
+            adjacency_dict.setdefault(vertex1, []).append((vertex2, weight))
+            adjacency_dict.setdefault(vertex2, []).append((vertex1, weight))
+        vertex_list = self.level_vertex_list[level]
+        future_distance_list = []
+        for vertex_x in vertex_list:
+            distance_dict = {vertex_x: 0}
+            heap = [(0, vertex_x)]
+            while heap:
+                distance, vertex_index = heapq.heappop(heap)
+                if distance > distance_dict[vertex_index]:
+                    continue
+                for adjacent_vertex, weight in adjacency_dict.get(vertex_index, []):
+                    length = distance + weight
+                    if length <= self.relevance_bound and length < distance_dict.get(adjacent_vertex, float("inf")):
+                        distance_dict[adjacent_vertex] = length
+                        heapq.heappush(heap, (length, adjacent_vertex))
+            future_distance_list.extend(distance_dict.get(vertex_y, float("inf")) for vertex_y in vertex_list)
+        return future_distance_list
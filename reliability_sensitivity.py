@@ -0,0 +1,205 @@
+"""Derivatives of the diameter-constrained reliability with respect to every edge reliability."""
+import sys
+from array import array
+from collections import namedtuple
+from graph_reduction import ReliabilityReducer
+from reliability_engine import ReliabilityEngine
+
+ReliabilityGradient = namedtuple('ReliabilityGradient', ['reliability', 'derivative_list'])
+
+
+class ReliabilitySensitivityEngine(ReliabilityEngine):
+    """
+    Factors like ReliabilityEngine, but keeps the memo as a DAG instead of keeping only its values.
+
+    Each distinct reduced subproblem is a node holding its edge and the nodes of its up and down branches;
+    nodes 0 and 1 are the settled failure and success. Nodes are numbered after their branches, so one
+    pass in numbering order evaluates every node for any edge reliabilities, and one pass in the opposite
+    order carries each node's adjoint (the derivative of the reliability with respect to the node's value)
+    down to its branches. An edge's derivative is the sum over its nodes of the adjoint times the difference
+    between the up and down values, which is its Birnbaum importance.
+
+    Both branches are factored for every edge, including certain and failed ones, so the DAG does not depend
+    on the edge reliabilities and stays valid when they change.
+    """
+    keep_failed_edges = True
+
+    def find_dag(self):
+        """Factors the graph, filling the node arrays, and returns the root node."""
+        self.node_edge_array = array('q', [-1, -1])
+        self.node_up_array = array('q', [0, 1])
+        self.node_down_array = array('q', [0, 1])
+        recursion_limit = sys.getrecursionlimit()
+        sys.setrecursionlimit(max(recursion_limit, 4 * len(self.edge_order) + 1000))
+        try:
+            self.root = self.factor(0, 0, self.initial_state)
+        finally:
+            sys.setrecursionlimit(recursion_limit)
+        self.memo = {}
+        return self.root
+
+    def factor(self, level, satisfied_mask, state, path_probability=1.0):
+        """Returns the node of the subproblem whose first undecided edge is at the given level."""
+        key = (level, satisfied_mask, state)
+        node = self.memo.get(key)
+        if node is not None:
+            self.instrumentation.counter_dict['memo_hits'] += 1
+            return node
+        self.instrumentation.explore_node()
+        reduced_state = self.reduce_state(level, satisfied_mask, state)
+        if not isinstance(reduced_state, tuple):
+            node = int(reduced_state)
+        else:
+            satisfied_mask, state = reduced_state
+            reduced_key = (level, satisfied_mask, state)
+            node = self.memo.get(reduced_key)
+            if node is None:
+                up_node = self.factor(level + 1, satisfied_mask, self.add_edge_to_state(level, state))
+                down_node = self.factor(level + 1, satisfied_mask, self.project_state(level, state))
+                if up_node == down_node:
+                    # Both branches lead to the same subproblem, so this edge's state does not matter here.
+                    node = up_node
+                else:
+                    node = len(self.node_edge_array)
+                    self.node_edge_array.append(self.edge_order[level])
+                    self.node_up_array.append(up_node)
+                    self.node_down_array.append(down_node)
+                self.memo[reduced_key] = node
+        self.memo[key] = node
+        return node
+
+    def evaluate(self, edge_reliability_array):
+        """Returns the value of every node for the given reliabilities of the engine graph's edges."""
+        node_edge_array = self.node_edge_array
+        node_up_array = self.node_up_array
+        node_down_array = self.node_down_array
+        value_array = array('d', [0.0, 1.0]) + array('d', bytes(8 * (len(node_edge_array) - 2)))
+        for node in range(2, len(node_edge_array)):
+            edge_reliability = edge_reliability_array[node_edge_array[node]]
+            value_array[node] = (edge_reliability * value_array[node_up_array[node]] +
+                                 (1 - edge_reliability) * value_array[node_down_array[node]])
+        return value_array
+
+    def differentiate(self, edge_reliability_array, value_array):
+        """Returns the derivative of the root's value with respect to each of the engine graph's edges."""
+        node_edge_array = self.node_edge_array
+        node_up_array = self.node_up_array
+        node_down_array = self.node_down_array
+        derivative_list = [0.0] * self.graph.number_of_edges
+        adjoint_array = array('d', bytes(8 * len(node_edge_array)))
+        adjoint_array[self.root] = 1.0
+        for node in range(len(node_edge_array) - 1, 1, -1):
+            adjoint = adjoint_array[node]
+            if not adjoint:
+                continue
+            edge_index = node_edge_array[node]
+            edge_reliability = edge_reliability_array[edge_index]
+            up_node = node_up_array[node]
+            down_node = node_down_array[node]
+            derivative_list[edge_index] += adjoint * (value_array[up_node] - value_array[down_node])
+            adjoint_array[up_node] += adjoint * edge_reliability
+            adjoint_array[down_node] += adjoint * (1 - edge_reliability)
+        return derivative_list
+
+
+class ReliabilitySensitivity:
+    """
+    The reliability of a graph and its derivative with respect to each edge's reliability, from one factoring.
+
+    The graph is first reduced as in Graph.attain_reliability_by_factoring, keeping failed edges so the reduced
+    structure does not depend on the reliabilities. Each reduced edge's reliability is rebuilt from the
+    original edges through its series and parallel merges, and the derivatives flow back through the same
+    merges by the chain rule. Removed and irrelevant edges get a derivative of 0.
+
+    After changing edge reliabilities (but not edges, weights or removed flags), evaluate gives the new
+    reliability and derivatives from the stored DAG without factoring again.
+    """
+    def __init__(self, graph, diameter, terminal_list=None, reduce=True, instrumentation=None):
+        self.graph = graph
+        if reduce:
+            reduction = ReliabilityReducer(graph, diameter, terminal_list=terminal_list,
+                                           keep_failed_edges=True).reduce()
+            engine_graph, terminal_list, self.edge_origin_list = reduction[:3]
+        else:
+            engine_graph = graph
+            self.edge_origin_list = list(range(graph.number_of_edges))
+        self.engine = ReliabilitySensitivityEngine(engine_graph, diameter, terminal_list=terminal_list,
+                                                   instrumentation=instrumentation)
+        self.engine.find_dag()
+
+    @property
+    def node_count(self):
+        return len(self.engine.node_edge_array)
+
+    @staticmethod
+    def walk_origin(origin):
+        """Returns the merges within an origin, each one after the merges it is made of."""
+        merge_list = []
+        stack = [(origin, False)]
+        while stack:
+            origin, expanded = stack.pop()
+            if isinstance(origin, int):
+                continue
+            if expanded:
+                merge_list.append(origin)
+            else:
+                stack.append((origin, True))
+                stack.append((origin[1], False))
+                stack.append((origin[2], False))
+        return merge_list
+
+    def find_origin_reliabilities(self, origin):
+        """Returns a dictionary from the id of each merge within the origin to its reliability, and a lookup."""
+        edge_reliability_array = self.graph.edge_reliability_array
+        reliability_dict = {}
+
+        def get_reliability(part):
+            if isinstance(part, int):
+                return edge_reliability_array[part]
+            return reliability_dict[id(part)]
+        for merge in self.walk_origin(origin):
+            kind, first, second = merge
+            first_reliability = get_reliability(first)
+            second_reliability = get_reliability(second)
+            if kind == 'series':
+                reliability_dict[id(merge)] = first_reliability * second_reliability
+            else:
+                reliability_dict[id(merge)] = 1 - (1 - first_reliability) * (1 - second_reliability)
+        return reliability_dict, get_reliability
+
+    def evaluate(self):
+        """Returns the reliability and its derivatives, indexed like the graph's edges, at the current reliabilities."""
+        reliability_dict_list = []
+        engine_reliability_array = array('d')
+        for origin in self.edge_origin_list:
+            reliability_dict, get_reliability = self.find_origin_reliabilities(origin)
+            reliability_dict_list.append((reliability_dict, get_reliability))
+            engine_reliability_array.append(get_reliability(origin))
+        value_array = self.engine.evaluate(engine_reliability_array)
+        engine_derivative_list = self.engine.differentiate(engine_reliability_array, value_array)
+        derivative_list = [0.0] * self.graph.number_of_edges
+        for origin, engine_derivative, (reliability_dict, get_reliability) in zip(
+                self.edge_origin_list, engine_derivative_list, reliability_dict_list):
+            if not engine_derivative:
+                continue
+            stack = [(origin, engine_derivative)]
+            while stack:
+                part, derivative = stack.pop()
+                if isinstance(part, int):
+                    derivative_list[part] += derivative
+                    continue
+                kind, first, second = part
+                if kind == 'series':
+                    stack.append((first, derivative * get_reliability(second)))
+                    stack.append((second, derivative * get_reliability(first)))
+                else:
+                    stack.append((first, derivative * (1 - get_reliability(second))))
+                    stack.append((second, derivative * (1 - get_reliability(first))))
+        return ReliabilityGradient(value_array[self.engine.root], derivative_list)
+
+    def update_reliabilities(self, edge_reliability_dict):
+        """Sets the given edges' reliabilities on the graph and returns the re-evaluated gradient."""
+        edge_list = self.graph.edge_list
+        for edge_index, reliability in edge_reliability_dict.items():
+            edge_list[edge_index].reliability = reliability
+        return self.evaluate()
@@ -0,0 +1,154 @@
+"""An on-disk cache of expensive query results, keyed by the content of the graph they were computed on."""
+import hashlib
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+
+class ResultCache:
+    """
+    Stores query results in a SQLite file shared by every session and process that opens the same path.
+
+    Keys hash the graph's present edges (endpoints, weight and reliability, in a canonical order so that
+    loading the same edges in another order finds the same entry) together with the query's name and
+    parameters. When the stored results outgrow maximum_size bytes the least recently used are evicted.
+    Writes take SQLite's write lock and the file is in write-ahead logging mode, so processes can read
+    and write it at the same time. Hits, misses and evictions are counted both for this object and in the
+    file itself, across every session that used it.
+    """
+    default_path = os.path.join(os.path.expanduser('~'), '.graph_result_cache.sqlite3')
+    statistic_name_list = ['hits', 'misses', 'stores', 'evictions']
+
+    def __init__(self, path=None, maximum_size=64 * 1024 * 1024):
+        self.path = path or self.default_path
+        self.maximum_size = maximum_size
+        self.statistic_dict = dict.fromkeys(self.statistic_name_list, 0)
+        self.lock = threading.Lock()
+        self.connection = None
+        self.connection_process_id = None
+
+    def __getstate__(self):
+        # Connections cannot cross processes; the receiving process opens its own.
+        state = self.__dict__.copy()
+        del state['lock']
+        state['connection'] = None
+        state['connection_process_id'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = threading.Lock()
+
+    def connect(self):
+        if self.connection is None or self.connection_process_id != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=60, isolation_level=None, check_same_thread=False)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('CREATE TABLE IF NOT EXISTS result '
+                               '(key TEXT PRIMARY KEY, value BLOB, size INTEGER, last_used REAL)')
+            connection.execute('CREATE INDEX IF NOT EXISTS result_last_used ON result (last_used)')
+            connection.execute('CREATE TABLE IF NOT EXISTS statistic (name TEXT PRIMARY KEY, count INTEGER)')
+            self.connection = connection
+            self.connection_process_id = os.getpid()
+        return self.connection
+
+    def close(self):
+        if self.connection is not None and self.connection_process_id == os.getpid():
+            self.connection.close()
+        self.connection = None
+
+    @staticmethod
+    def hash_graph(graph):
+        """Returns a digest of the graph's vertex count, weight and reliability flags and present edges."""
+        edge_list = []
+        edge_removed_array = graph.edge_removed_array
+        for edge_index, (vertex1, vertex2, weight, reliability) in enumerate(zip(
+                graph.edge_vertex1_array, graph.edge_vertex2_array, graph.edge_weight_array,
+                graph.edge_reliability_array)):
+            if not edge_removed_array[edge_index]:
+                edge_list.append((min(vertex1, vertex2), max(vertex1, vertex2), weight, reliability))
+        edge_list.sort()
+        description = repr((graph.number_of_vertices, graph.using_weight, graph.using_reliability, edge_list))
+        return hashlib.sha256(description.encode()).hexdigest()
+
+    @classmethod
+    def make_key(cls, graph, query_name, parameter_tuple):
+        return '%s:%s:%s' % (cls.hash_graph(graph), query_name, repr(parameter_tuple))
+
+    def count(self, connection, name, amount=1):
+        self.statistic_dict[name] += amount
+        connection.execute('INSERT INTO statistic VALUES (?, ?) ON CONFLICT (name) DO UPDATE SET count = count + ?',
+                           (name, amount, amount))
+
+    def get(self, key):
+        """Returns the stored result, or None on a miss."""
+        with self.lock:
+            connection = self.connect()
+            with connection:
+                connection.execute('BEGIN IMMEDIATE')
+                row = connection.execute('SELECT value FROM result WHERE key = ?', (key,)).fetchone()
+                if row is None:
+                    self.count(connection, 'misses')
+                    return None
+                connection.execute('UPDATE result SET last_used = ? WHERE key = ?', (time.time(), key))
+                self.count(connection, 'hits')
+        return pickle.loads(row[0])
+
+    def put(self, key, result):
+        """Stores a result, evicting the least recently used results beyond the size bound."""
+        value = pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(value) > self.maximum_size:
+            return
+        with self.lock:
+            connection = self.connect()
+            with connection:
+                connection.execute('BEGIN IMMEDIATE')
+                connection.execute('INSERT OR REPLACE INTO result VALUES (?, ?, ?, ?)',
+                                   (key, value, len(value), time.time()))
+                self.count(connection, 'stores')
+                self.evict(connection)
+
+    def evict(self, connection):
+        total_size = connection.execute('SELECT COALESCE(SUM(size), 0) FROM result').fetchone()[0]
+        if total_size <= self.maximum_size:
+            return
+        eviction_count = 0
+        for key, size in connection.execute('SELECT key, size FROM result ORDER BY last_used').fetchall():
+            if total_size <= self.maximum_size:
+                break
+            connection.execute('DELETE FROM result WHERE key = ?', (key,))
+            total_size -= size
+            eviction_count += 1
+        if eviction_count:
+            self.count(connection, 'evictions', eviction_count)
+
+    def clear(self):
+        with self.lock:
+            connection = self.connect()
+            with connection:
+                connection.execute('BEGIN IMMEDIATE')
+                connection.execute('DELETE FROM result')
+                connection.execute('DELETE FROM statistic')
+
+    def get_statistics(self):
+        """
+        Returns this object's counts, the counts over every session using the file, and the stored size.
+
+        Session counts are keyed by statistic_name_list and lifetime counts by the same names prefixed
+        with 'total_'. The hit rates are over hits and misses.
+        """
+        with self.lock:
+            connection = self.connect()
+            entry_count, total_size = connection.execute(
+                'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM result').fetchone()
+            total_dict = dict(connection.execute('SELECT name, count FROM statistic').fetchall())
+        statistic_dict = dict(self.statistic_dict)
+        for name in self.statistic_name_list:
+            statistic_dict['total_' + name] = total_dict.get(name, 0)
+        for prefix in ['', 'total_']:
+            lookup_count = statistic_dict[prefix + 'hits'] + statistic_dict[prefix + 'misses']
+            hit_count = statistic_dict[prefix + 'hits']
+            statistic_dict[prefix + 'hit_rate'] = hit_count / lookup_count if lookup_count else 0.0
+        statistic_dict.update(entries=entry_count, size=total_size, maximum_size=self.maximum_size)
+        return statistic_dict
@@ -0,0 +1,47 @@
+"""Subgraphs that share a graph's structure and differ only in which edges are removed."""
+from graph import Graph
+from query_context import QueryContext
+
+
+class SubgraphView(Graph):
+    """
+    A graph sharing another graph's edge and adjacency arrays, with its own removed edge flags and query context.
+
+    Creating a view copies one byte per edge and allocates a context, never copying the structure.
+    remove_edge flips a single flag and undo_edge_removal flips it back, so a search over subgraphs can
+    walk one view up and down instead of copying a graph per edge. Every traversal is a Graph method and
+    only looks at edges through get_adjacent_edges, so each one respects the view's removed edges.
+
+    The structure is shared, so changing an edge's weight or reliability through a view changes it in the
+    graph too, and edges and vertices cannot be added to a view.
+    """
+    def __init__(self, graph, edge_removed_array=None):
+        graph.build_adjacency_arrays()
+        self.__dict__.update(graph.__dict__)
+        if edge_removed_array is None:
+            edge_removed_array = graph.edge_removed_array
+        self.edge_removed_array = bytearray(edge_removed_array)
+        self.removed_edge_stack = []
+        self.component_index = None
+        self.shortest_path_index = None
+        self.query_context = QueryContext(self)
+
+    def remove_edge(self, edge_index):
+        self.removed_edge_stack.append((edge_index, self.edge_removed_array[edge_index]))
+        self.edge_removed_array[edge_index] = True
+        self.component_index = None
+
+    def undo_edge_removal(self):
+        """Restores the flag changed by the latest remove_edge that has not been undone."""
+        edge_index, removed = self.removed_edge_stack.pop()
+        self.edge_removed_array[edge_index] = removed
+        self.component_index = None
+
+    def add_vertex(self, position=None):
+        raise TypeError('vertices cannot be added to a subgraph view')
+
+    def add_edge(self, vertex1, vertex2, reliability=1.0, weight=1.0):
+        raise TypeError('edges cannot be added to a subgraph view')
+
+    def add_edges(self, vertex1_list, vertex2_list, reliability_list, weight_list):
+        raise TypeError('edges cannot be added to a subgraph view')
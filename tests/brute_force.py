@@ -0,0 +1,110 @@
+"""Reference answers for the tests, computed by enumerating every edge state without any of the engines."""
+import heapq
+import itertools
+import os
+import random
+from graph import Graph
+
+example_graph_directory = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'examplegraphs')
+
+
+def example_graph_path(file_name):
+    """Returns the path of a file in examplegraphs/, wherever the tests are run from."""
+    return os.path.join(example_graph_directory, file_name)
+
+
+def make_graph(number_of_vertices, edge_list):
+    """Returns a weighted reliability graph from (vertex1, vertex2, reliability, weight) tuples."""
+    graph = Graph()
+    graph.using_reliability = True
+    graph.using_weight = True
+    graph.initialize_with_size(number_of_vertices)
+    for vertex1, vertex2, reliability, weight in edge_list:
+        graph.add_edge(vertex1, vertex2, reliability=reliability, weight=weight)
+    return graph
+
+
+def describe_graph(graph):
+    """Returns the (vertex1, vertex2, reliability, weight) tuples of the graph's edges, for failure messages."""
+    return list(zip(graph.edge_vertex1_array, graph.edge_vertex2_array, graph.edge_reliability_array,
+                    graph.edge_weight_array))
+
+
+def make_random_graph(random_generator, maximum_vertices=6, maximum_edges=8):
+    """Returns a small random multigraph with self-loops, certain and failed edges and isolated vertices."""
+    number_of_vertices = random_generator.randint(2, maximum_vertices)
+    edge_list = []
+    for _ in range(random_generator.randint(0, maximum_edges)):
+        edge_list.append((random_generator.randrange(number_of_vertices),
+                          random_generator.randrange(number_of_vertices),
+                          random_generator.choice([0.0, 1.0, 0.5, 0.9, round(random_generator.random(), 3)]),
+                          random_generator.choice([1.0, 1.0, 2.0, 0.5])))
+    return make_graph(number_of_vertices, edge_list)
+
+
+def random_cases(count, seed=0, maximum_vertices=6, maximum_edges=8):
+    """Yields (graph, diameter, terminal_list) cases, including zero and infinite diameters."""
+    random_generator = random.Random(seed)
+    for _ in range(count):
+        graph = make_random_graph(random_generator, maximum_vertices, maximum_edges)
+        diameter = random_generator.choice([0, 1, 2, 2.5, 4, float("inf")])
+        terminal_list = None
+        if random_generator.random() < 0.6:
+            terminal_list = random_generator.sample(range(1, graph.number_of_vertices),
+                                                    random_generator.randint(1, min(3, graph.number_of_vertices - 1)))
+        yield graph, diameter, terminal_list
+
+
+def find_distances(number_of_vertices, up_edge_list, source=0):
+    distance_list = [float("inf")] * number_of_vertices
+    distance_list[source] = 0.0
+    heap = [(0.0, source)]
+    while heap:
+        distance, vertex_index = heapq.heappop(heap)
+        if distance > distance_list[vertex_index]:
+            continue
+        for vertex1, vertex2, weight in up_edge_list:
+            for start, end in [(vertex1, vertex2), (vertex2, vertex1)]:
+                if start == vertex_index and distance + weight < distance_list[end]:
+                    distance_list[end] = distance + weight
+                    heapq.heappush(heap, (distance + weight, end))
+    return distance_list
+
+
+def find_reliability(graph, diameter, terminal_list=None, reliability_list=None, source=0):
+    """Returns the probability that every terminal is reachable from the source within the diameter."""
+    if not terminal_list:
+        terminal_list = [graph.number_of_vertices - 1]
+    if reliability_list is None:
+        reliability_list = list(graph.edge_reliability_array)
+    edge_index_list = [edge_index for edge_index in range(graph.number_of_edges)
+                       if not graph.edge_removed_array[edge_index]]
+    reliability = 0.0
+    for state in itertools.product([True, False], repeat=len(edge_index_list)):
+        probability = 1.0
+        up_edge_list = []
+        for edge_index, up in zip(edge_index_list, state):
+            edge_reliability = reliability_list[edge_index]
+            probability *= edge_reliability if up else 1 - edge_reliability
+            if up:
+                up_edge_list.append((graph.edge_vertex1_array[edge_index], graph.edge_vertex2_array[edge_index],
+                                     graph.edge_weight_array[edge_index]))
+        if not probability:
+            continue
+        distance_list = find_distances(graph.number_of_vertices, up_edge_list, source)
+        if all(distance_list[terminal_index] < float("inf") and distance_list[terminal_index] <= diameter
+               for terminal_index in terminal_list):
+            reliability += probability
+    return reliability
+
+
+def find_derivatives(graph, diameter, terminal_list=None):
+    """Returns each edge's derivative, using that the reliability is linear in every edge reliability."""
+    derivative_list = []
+    for edge_index in range(graph.number_of_edges):
+        reliability_list = list(graph.edge_reliability_array)
+        reliability_list[edge_index] = 1.0
+        up_reliability = find_reliability(graph, diameter, terminal_list, reliability_list)
+        reliability_list[edge_index] = 0.0
+        derivative_list.append(up_reliability - find_reliability(graph, diameter, terminal_list, reliability_list))
+    return derivative_list
@@ -0,0 +1,33 @@
+import unittest
+from average_case import AverageCase
+
+
+class TestAverageCase(unittest.TestCase):
+    def test_no_integers(self):
+        average_case = AverageCase.run_streaming(0, 10, 100, seed=1)
+        self.assertEqual((average_case.hits, average_case.steps), (0, 0))
+        self.assertEqual(AverageCase.find_expected_value(0, 10), 0.0)
+
+    def test_streaming_counts(self):
+        average_case = AverageCase.run_streaming(5, 1, 7, seed=1)
+        self.assertEqual((average_case.hits, average_case.steps), (7, 7))
+        average_case = AverageCase.run_streaming(50, 30, 20000, seed=2)
+        expected_value = AverageCase.find_expected_value(50, 30)
+        self.assertAlmostEqual(average_case.steps / 20000, expected_value, delta=0.05 * expected_value)
+        self.assertAlmostEqual(average_case.hits * 30 / 20000, expected_value, delta=0.05 * expected_value)
+
+    def test_seeded_sweep_does_not_depend_on_processes(self):
+        result_list = [[(average_case.hits, average_case.steps) for average_case in
+                        AverageCase.run_sweep(20, [3, 50, 1000], 500, number_of_processes=number_of_processes,
+                                              seed=3)] for number_of_processes in [1, 2]]
+        self.assertEqual(result_list[0], result_list[1])
+
+    def test_bounds_beyond_64_bits_need_the_legacy_simulation(self):
+        AverageCase.run_streaming(3, AverageCase.maximum_streaming_bound, 10, seed=4)
+        average_case = AverageCase(3, AverageCase.maximum_streaming_bound + 1, 10)
+        with self.assertRaisesRegex(ValueError, 'legacy'):
+            average_case.stream_hits_and_steps()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+from batch_runner import BatchRunner
+from brute_force import example_graph_path, find_reliability
+from graph import Graph
+
+petingi_file = example_graph_path('petingi_graph.csv')
+
+
+class TestBatchRunner(unittest.TestCase):
+    def run_jobs(self, job_list):
+        return sorted(BatchRunner(number_of_processes=1).run(job_list), key=lambda result: result['job'])
+
+    def test_bad_jobs_give_errors_without_stopping_the_batch(self):
+        result_list = self.run_jobs([
+            {'file': petingi_file, 'layout': 'reliability', 'operation': 'reliability', 'diameter': 3},
+            {'file': petingi_file, 'layout': 'sideways', 'operation': 'cycles'},
+            {'file': petingi_file, 'layout': 'reliability', 'operation': 'colouring'},
+            {'file': petingi_file, 'layout': 'reliability', 'operation': 'reliability', 'diameter': 3,
+             'method': 'enumerate'},
+            {'glob': example_graph_path('petingi_graph.csv'), 'layout': 'reliability', 'operation': 'components'},
+        ])
+        self.assertEqual([result['job'] for result in result_list], [0, 1, 2, 3, 4])
+        graph = Graph.create_reliability_graph_from_csv(petingi_file)
+        self.assertAlmostEqual(result_list[0]['result'], find_reliability(graph, 3))
+        self.assertIn("unknown layout 'sideways'", result_list[1]['error'])
+        self.assertIn("unknown operation 'colouring'", result_list[2]['error'])
+        self.assertIn("unknown method 'enumerate'", result_list[3]['error'])
+        self.assertEqual(result_list[4]['result'], 1)
+
+    def test_jobs_are_checked_before_loading_and_answering(self):
+        result_list = self.run_jobs([{'file': 'missing.csv', 'operation': 'colouring'},
+                                     {'file': 'missing.csv', 'layout': 'sideways', 'operation': 'cycles'}])
+        self.assertIn("unknown operation 'colouring'", result_list[0]['error'])
+        self.assertIn("unknown layout 'sideways'", result_list[1]['error'])
+        graph = Graph.create_reliability_graph_from_csv(petingi_file)
+        for job, message in [({'operation': 'colouring'}, "unknown operation 'colouring'"),
+                             ({'operation': 'reliability', 'diameter': 3, 'method': 'guess'},
+                              "unknown method 'guess'")]:
+            with self.assertRaisesRegex(ValueError, message):
+                BatchRunner.answer_job(graph, job)
+
+    def test_methods_agree(self):
+        graph = Graph.create_reliability_graph_from_csv(petingi_file)
+        for diameter in [0, 1, 2, float("inf")]:
+            result_list = self.run_jobs([{'file': petingi_file, 'layout': 'reliability', 'operation': 'reliability',
+                                          'diameter': diameter, 'terminal_list': [1, 3], 'method': method}
+                                         for method in BatchRunner.method_list])
+            for result in result_list:
+                self.assertAlmostEqual(result['result'], find_reliability(graph, diameter, [1, 3]))
+
+
+if __name__ == "__main__":
+    unittest.main()
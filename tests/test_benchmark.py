@@ -0,0 +1,33 @@
+import os
+import tempfile
+import unittest
+from benchmark import Benchmark
+
+
+class TestBenchmark(unittest.TestCase):
+    def test_run_on_tiny_sizes(self):
+        benchmark = Benchmark({'grid': [3], 'random_geometric': [20], 'erdos_renyi': [20], 'long_path': [10]},
+                              repeat=1)
+        benchmark.reliability_size_list_dict = {'grid': [2], 'long_path': [4]}
+        result_dict = benchmark.run()
+        for generator_name, size in [('grid', 3), ('erdos_renyi', 20), ('long_path', 10)]:
+            for operation in ['create_graph_from_csv', 'create_reliability_weighted_graph_from_csv',
+                              'check_for_cycles', 'find_number_of_components', 'dijkstra_algorithm']:
+                self.assertIn('%s/%d/%s' % (generator_name, size, operation), result_dict)
+        self.assertIn('random_geometric/20/create_wireless_mesh_graph_from_csv', result_dict)
+        for prefix in ['grid/2/', 'long_path/4/']:
+            self.assertIn(prefix + 'attain_reliability_for_diameter', result_dict)
+            self.assertIn(prefix + 'attain_reliability_by_factoring', result_dict)
+        self.assertTrue(all(seconds >= 0 for seconds in result_dict.values()))
+
+    def test_regressions_against_a_saved_baseline(self):
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, 'baseline.json')
+            Benchmark.save_baseline({'a': 1.0, 'b': 1.0, 'c': 0.0001}, file_path)
+            baseline_dict = Benchmark.load_baseline(file_path)
+        regression_list = Benchmark.find_regressions({'a': 1.1, 'b': 2.0, 'c': 0.0005, 'd': 5.0}, baseline_dict)
+        self.assertEqual([name for name, _, _, _ in regression_list], ['b'])
+
+
+if __name__ == "__main__":
+    unittest.main()
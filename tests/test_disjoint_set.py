@@ -0,0 +1,44 @@
+import unittest
+from disjoint_set import DisjointSet
+
+
+class TestDisjointSet(unittest.TestCase):
+    def test_unions_and_components(self):
+        disjoint_set = DisjointSet(5)
+        self.assertEqual(disjoint_set.number_of_components, 5)
+        self.assertTrue(disjoint_set.union(0, 1))
+        self.assertTrue(disjoint_set.union(3, 4))
+        self.assertTrue(disjoint_set.union(1, 4))
+        self.assertFalse(disjoint_set.has_a_cycle)
+        self.assertEqual(disjoint_set.number_of_components, 2)
+        self.assertTrue(disjoint_set.in_same_set(0, 3))
+        self.assertFalse(disjoint_set.in_same_set(0, 2))
+        self.assertEqual(disjoint_set.get_set_size(4), 4)
+        self.assertEqual(disjoint_set.get_set_size(2), 1)
+        self.assertFalse(disjoint_set.union(0, 4))
+        self.assertTrue(disjoint_set.has_a_cycle)
+        self.assertEqual(disjoint_set.number_of_components, 2)
+
+    def test_self_loop_is_a_cycle(self):
+        disjoint_set = DisjointSet(2)
+        self.assertFalse(disjoint_set.union(1, 1))
+        self.assertTrue(disjoint_set.has_a_cycle)
+
+    def test_add_element(self):
+        disjoint_set = DisjointSet()
+        self.assertEqual([disjoint_set.add_element() for _ in range(3)], [0, 1, 2])
+        disjoint_set.union(0, 2)
+        self.assertEqual(disjoint_set.number_of_components, 2)
+        self.assertTrue(disjoint_set.in_same_set(2, 0))
+
+    def test_long_chain_finds_its_root(self):
+        disjoint_set = DisjointSet(100000)
+        for element in range(99999):
+            disjoint_set.union(element + 1, element)
+        self.assertEqual(disjoint_set.number_of_components, 1)
+        self.assertTrue(disjoint_set.in_same_set(0, 99999))
+        self.assertEqual(disjoint_set.get_set_size(50000), 100000)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import random
+import unittest
+from brute_force import describe_graph, find_distances
+from graph import Graph
+
+
+class TestDynamicShortestPaths(unittest.TestCase):
+    def check_index(self, graph, index, source_list):
+        """Checks the index's distances against a fresh search, and its paths against its distances."""
+        up_edge_list = [(graph.edge_vertex1_array[edge_index], graph.edge_vertex2_array[edge_index],
+                         graph.edge_weight_array[edge_index]) for edge_index in range(graph.number_of_edges)
+                        if not graph.edge_removed_array[edge_index]]
+        source_distance_list = [find_distances(graph.number_of_vertices, up_edge_list, source)
+                                for source in source_list]
+        distance_list = [min(distance_tuple) for distance_tuple in zip(*source_distance_list)]
+        self.assertEqual(len(index.distance_array), graph.number_of_vertices)
+        for vertex_index, distance in enumerate(distance_list):
+            self.assertAlmostEqual(index.distance_array[vertex_index], distance, places=9)
+        self.assertEqual(list(graph.shortest_paths(source_list)[0]), list(index.distance_array))
+        for vertex_index in range(graph.number_of_vertices):
+            path_list = index.get_path(vertex_index)
+            if distance_list[vertex_index] == float("inf"):
+                self.assertEqual(path_list, [])
+                continue
+            self.assertIn(path_list[0], source_list)
+            self.assertEqual(path_list[-1], vertex_index)
+            length = 0.0
+            for vertex1, vertex2 in zip(path_list, path_list[1:]):
+                edge_index = index.parent_edge_array[vertex2]
+                self.assertFalse(graph.edge_removed_array[edge_index])
+                self.assertEqual({graph.edge_vertex1_array[edge_index], graph.edge_vertex2_array[edge_index]},
+                                 {vertex1, vertex2})
+                length += graph.edge_weight_array[edge_index]
+            self.assertAlmostEqual(length, distance_list[vertex_index], places=9)
+
+    def test_updates_match_recomputing(self):
+        for seed in range(120):
+            random_generator = random.Random(seed)
+            graph = Graph()
+            graph.using_weight = True
+            graph.initialize_with_size(random_generator.randint(1, 10))
+
+            def random_weight():
+                return random_generator.choice([0.0, 1.0, 2.0, 3.0, round(random_generator.random() * 5, 3)])
+
+            def random_vertex():
+                return random_generator.randrange(graph.number_of_vertices)
+            for _ in range(random_generator.randint(0, 16)):
+                graph.add_edge(random_vertex(), random_vertex(), weight=random_weight())
+            source_list = random_generator.sample(range(graph.number_of_vertices),
+                                                  random_generator.randint(1, min(2, graph.number_of_vertices)))
+            index = graph.enable_shortest_path_index(source_list)
+            self.check_index(graph, index, source_list)
+            for step in range(30):
+                choice = random_generator.random()
+                if choice < 0.2:
+                    graph.add_edge(random_vertex(), random_vertex(), weight=random_weight())
+                elif choice < 0.25:
+                    graph.add_vertex()
+                elif choice < 0.3:
+                    graph.add_edges([random_vertex(), random_vertex()], [random_vertex(), random_vertex()], [1, 1],
+                                    [random_weight(), random_weight()])
+                elif choice < 0.33:
+                    graph.build_adjacency_arrays()
+                elif graph.number_of_edges:
+                    edge = graph.edge_list[random_generator.randrange(graph.number_of_edges)]
+                    if choice < 0.65:
+                        edge.removed = not edge.removed
+                    else:
+                        edge.weight = random_generator.choice([random_weight(), edge.weight * 2, edge.weight / 2])
+                with self.subTest(seed=seed, step=step, edges=describe_graph(graph)):
+                    self.check_index(graph, index, source_list)
+
+    def test_weight_increase_reattaches_to_an_equal_path(self):
+        graph = Graph()
+        graph.using_weight = True
+        graph.initialize_with_size(4)
+        graph.add_edges([0, 0, 1, 2], [1, 2, 3, 3], [1, 1, 1, 1], [1.0, 1.0, 1.0, 1.0])
+        index = graph.enable_shortest_path_index(0)
+        tree_edge = graph.edge_list[index.parent_edge_array[3]]
+        tree_edge.weight = 5.0
+        self.assertEqual(index.distance_array[3], 2.0)
+        self.assertEqual(index.examined_vertex_count, 1)
+        self.check_index(graph, index, [0])
+
+
+if __name__ == "__main__":
+    unittest.main()
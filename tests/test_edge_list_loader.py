@@ -0,0 +1,46 @@
+import os
+import tempfile
+import unittest
+from brute_force import example_graph_path
+from edge_list_loader import EdgeListLoader
+from graph import Graph
+
+
+class TestEdgeListLoader(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write_csv(self, text):
+        file_path = os.path.join(self.directory.name, 'graph.csv')
+        with open(file_path, 'w') as file:
+            file.write(text)
+        return file_path
+
+    def test_rows_must_match_the_layout(self):
+        file_path = self.write_csv('0,1\n\n1,2\n2,3,4\n')
+        for chunk_size in [1, 2, 65536]:
+            with self.assertRaisesRegex(ValueError, 'row 4: expected 2 columns, found 3'):
+                EdgeListLoader(chunk_size=chunk_size).load(file_path, 'plain', graph_class=Graph)
+        with self.assertRaisesRegex(ValueError, 'row 1: expected 3 columns, found 2'):
+            Graph.create_weighted_graph_from_csv(self.write_csv('0,1\n'))
+        with self.assertRaises(ValueError):
+            Graph.create_graph_from_csv(example_graph_path('basic_weighted_graph.csv'))
+
+    def test_loads_like_the_original_constructors(self):
+        file_path = self.write_csv('0,1,0.5,2\n\n1,3,0.25,1.5\n3,0,1,1\n')
+        for chunk_size in [1, 2, 65536]:
+            graph = EdgeListLoader(chunk_size=chunk_size).load(file_path, 'reliability_weighted', graph_class=Graph)
+            self.assertEqual(graph.number_of_vertices, 4)
+            self.assertEqual(list(graph.edge_vertex1_array), [0, 1, 3])
+            self.assertEqual(list(graph.edge_vertex2_array), [1, 3, 0])
+            self.assertEqual(list(graph.edge_reliability_array), [0.5, 0.25, 1.0])
+            self.assertEqual(list(graph.edge_weight_array), [2.0, 1.5, 1.0])
+        graph = Graph.create_graph_from_csv(example_graph_path('has_cycle_and_3_components.csv'))
+        self.assertEqual(graph.find_number_of_components(), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,238 @@
+import random
+import unittest
+from brute_force import describe_graph, find_distances, find_reliability, make_random_graph
+from graph import Graph
+from query_context import QueryContext
+
+
+def find_components(graph):
+    """Returns the set of vertices reachable from each vertex over edges that are not removed."""
+    up_edge_list = [(graph.edge_vertex1_array[edge_index], graph.edge_vertex2_array[edge_index], 1.0)
+                    for edge_index in range(graph.number_of_edges) if not graph.edge_removed_array[edge_index]]
+    component_list = []
+    for source in range(graph.number_of_vertices):
+        distance_list = find_distances(graph.number_of_vertices, up_edge_list, source)
+        component_list.append(frozenset(vertex for vertex, distance in enumerate(distance_list)
+                                        if distance < float("inf")))
+    return component_list
+
+
+def find_source_distances(graph, source_list):
+    """Returns each vertex's distance to the nearest source over edges that are not removed."""
+    up_edge_list = [(graph.edge_vertex1_array[edge_index], graph.edge_vertex2_array[edge_index],
+                     graph.edge_weight_array[edge_index]) for edge_index in range(graph.number_of_edges)
+                    if not graph.edge_removed_array[edge_index]]
+    source_distance_list = [find_distances(graph.number_of_vertices, up_edge_list, source) for source in source_list]
+    return [min(distance_tuple) for distance_tuple in zip(*source_distance_list)]
+
+
+def make_path(number_of_vertices, using_reliability=False):
+    graph = Graph()
+    graph.using_reliability = using_reliability
+    graph.initialize_with_size(number_of_vertices)
+    graph.add_edges(range(number_of_vertices - 1), range(1, number_of_vertices), [1.0] * (number_of_vertices - 1),
+                    [1.0] * (number_of_vertices - 1))
+    return graph
+
+
+class TestTraversals(unittest.TestCase):
+    def test_long_path(self):
+        # Far deeper than the recursion limit, which the recursive searches used to hit.
+        for using_reliability in [False, True]:
+            graph = make_path(200000, using_reliability)
+            self.assertEqual(graph.find_number_of_components(), 1)
+            graph.reset_graph()
+            # The reliability search counts the edge back to the parent as a cycle, as the original did.
+            self.assertEqual(graph.check_for_cycles(), using_reliability)
+
+    def test_long_path_with_a_cycle_and_a_removed_edge(self):
+        graph = make_path(100000)
+        graph.add_edge(99999, 0)
+        self.assertTrue(graph.check_for_cycles())
+        graph.reset_graph()
+        graph.edge_list[50000].removed = True
+        self.assertFalse(graph.check_for_cycles())
+        graph.reset_all_vertices()
+        self.assertEqual(graph.find_number_of_components(), 1)
+        graph.edge_list[99999].removed = True
+        graph.reset_all_vertices()
+        self.assertEqual(graph.find_number_of_components(), 2)
+
+    def test_components_match_reachability(self):
+        random_generator = random.Random(13)
+        for _ in range(200):
+            graph = make_random_graph(random_generator, maximum_vertices=8)
+            for edge in graph.edge_list:
+                edge.removed = random_generator.random() < 0.3
+            with self.subTest(edges=describe_graph(graph), removed=list(graph.edge_removed_array)):
+                self.assertEqual(graph.find_number_of_components(), len(set(find_components(graph))))
+
+
+class TestShortestPaths(unittest.TestCase):
+    def make_cases(self, count):
+        """Yields random weighted graphs with some edges removed, each with one to three sources."""
+        random_generator = random.Random(3)
+        for _ in range(count):
+            graph = make_random_graph(random_generator, maximum_vertices=8, maximum_edges=14)
+            for edge in graph.edge_list:
+                if random_generator.random() < 0.2:
+                    edge.removed = True
+            source_list = random_generator.sample(range(graph.number_of_vertices),
+                                                  random_generator.randint(1, min(3, graph.number_of_vertices)))
+            yield graph, source_list
+
+    def check_parents(self, graph, source_list, distance_array, parent_array, vertex_index):
+        """Checks that the parents lead from the vertex back to a source along edges adding up to its distance."""
+        while vertex_index not in source_list:
+            parent = parent_array[vertex_index]
+            self.assertTrue(any(not graph.edge_removed_array[edge_index] and
+                                {graph.edge_vertex1_array[edge_index], graph.edge_vertex2_array[edge_index]} ==
+                                {parent, vertex_index} and
+                                distance_array[parent] + graph.edge_weight_array[edge_index] ==
+                                distance_array[vertex_index]
+                                for edge_index in range(graph.number_of_edges)))
+            vertex_index = parent
+        self.assertEqual(distance_array[vertex_index], 0)
+
+    def test_distances_match_brute_force(self):
+        for graph, source_list in self.make_cases(200):
+            expected_list = find_source_distances(graph, source_list)
+            with self.subTest(edges=describe_graph(graph), source_list=source_list):
+                distance_array, parent_array = graph.shortest_paths(source_list)
+                self.assertEqual(list(distance_array), expected_list)
+                for vertex_index, distance in enumerate(expected_list):
+                    if distance == float("inf"):
+                        self.assertEqual(parent_array[vertex_index], -1)
+                    else:
+                        self.check_parents(graph, source_list, distance_array, parent_array, vertex_index)
+
+    def test_target_and_distance_bound(self):
+        for graph, source_list in self.make_cases(200):
+            expected_list = find_source_distances(graph, source_list)
+            for target in range(graph.number_of_vertices):
+                with self.subTest(edges=describe_graph(graph), source_list=source_list, target=target):
+                    distance_array, parent_array = graph.shortest_paths(source_list, target=target)
+                    self.assertEqual(distance_array[target], expected_list[target])
+                    if expected_list[target] < float("inf"):
+                        self.check_parents(graph, source_list, distance_array, parent_array, target)
+                    for vertex_index, distance in enumerate(expected_list):
+                        self.assertGreaterEqual(distance_array[vertex_index], distance)
+            for distance_bound in [0, 0.5, 1, 2.5, 4]:
+                with self.subTest(edges=describe_graph(graph), source_list=source_list, distance_bound=distance_bound):
+                    distance_array = graph.shortest_paths(source_list, distance_bound=distance_bound)[0]
+                    self.assertEqual(list(distance_array), [distance if distance <= distance_bound else float("inf")
+                                                            for distance in expected_list])
+
+    def test_all_pairs(self):
+        for graph, _ in self.make_cases(12):
+            for number_of_processes in [1, 2, 3]:
+                for distance_bound in [float("inf"), 1.5]:
+                    with self.subTest(edges=describe_graph(graph), number_of_processes=number_of_processes,
+                                      distance_bound=distance_bound):
+                        path_list = graph.all_pairs_shortest_paths(number_of_processes=number_of_processes,
+                                                                   distance_bound=distance_bound)
+                        self.assertEqual(len(path_list), graph.number_of_vertices)
+                        for source, (distance_array, parent_array) in enumerate(path_list):
+                            self.assertEqual(list(distance_array),
+                                             [distance if distance <= distance_bound else float("inf")
+                                              for distance in find_source_distances(graph, [source])])
+                            self.assertEqual(list(parent_array),
+                                             list(graph.shortest_paths(source, distance_bound=distance_bound)[1]))
+        graph = next(self.make_cases(1))[0]
+        self.assertEqual(graph.all_pairs_shortest_paths([1, 0], number_of_processes=2),
+                         [graph.shortest_paths(1), graph.shortest_paths(0)])
+
+
+class TestQueries(unittest.TestCase):
+    def make_queries(self, random_generator, graph):
+        query_list = [('check_for_cycles',), ('find_number_of_components',)]
+        for _ in range(12):
+            vertex1 = random_generator.randrange(graph.number_of_vertices)
+            vertex2 = random_generator.randrange(graph.number_of_vertices)
+            query_list.append(('find_shortest_path', vertex1, vertex2))
+            query_list.append(('attain_reliability', random_generator.choice([1, 2, float("inf")]), [vertex2]))
+        return query_list
+
+    def test_run_queries_matches_answering_one_at_a_time(self):
+        random_generator = random.Random(5)
+        for number_of_workers, use_processes in [(1, False), (3, False), (2, True)]:
+            for _ in range(4):
+                graph = make_random_graph(random_generator, maximum_vertices=7, maximum_edges=10)
+                query_list = self.make_queries(random_generator, graph)
+                expected_list = [QueryContext(graph).run_query(query) for query in query_list]
+                with self.subTest(edges=describe_graph(graph), number_of_workers=number_of_workers,
+                                  use_processes=use_processes):
+                    answer_list = graph.run_queries(query_list, number_of_workers=number_of_workers,
+                                                    use_processes=use_processes)
+                    self.assertEqual(answer_list, expected_list)
+                    self.assertTrue(graph.frozen)
+                    for query, answer in zip(query_list, answer_list):
+                        if query[0] == 'attain_reliability':
+                            self.assertAlmostEqual(answer, find_reliability(graph, *query[1:]), places=12)
+
+    def test_frozen_graph_rejects_changes(self):
+        graph = make_path(4, using_reliability=True)
+        graph.edge_list[0].removed = True
+        graph.freeze()
+        change_list = [graph.add_vertex, lambda: graph.add_edge(0, 3), lambda: graph.add_edges([0], [2], [1.0], [1.0]),
+                       graph.reset_graph, lambda: setattr(graph.edge_list[1], 'removed', True),
+                       lambda: setattr(graph.edge_list[0], 'removed', False)]
+        for change_number, change in enumerate(change_list):
+            with self.subTest(change_number=change_number):
+                with self.assertRaises(TypeError):
+                    change()
+        self.assertEqual((graph.number_of_vertices, graph.number_of_edges), (4, 3))
+        self.assertEqual(graph.get_edge_boolean_list(), [True, False, False])
+        self.assertEqual(QueryContext(graph).find_number_of_components(), 2)
+        self.assertEqual(graph.run_queries([('find_shortest_path', 1, 3)], number_of_workers=1),
+                         [QueryContext(graph).find_shortest_path(1, 3)])
+
+
+class TestComponentIndex(unittest.TestCase):
+    def test_removed_edges_are_not_joined(self):
+        graph = make_path(3)
+        self.assertTrue(graph.in_same_component(0, 2))
+        graph.edge_list[1].removed = True
+        self.assertFalse(graph.in_same_component(0, 2))
+        self.assertEqual(graph.component_index.number_of_components, graph.find_number_of_components())
+        subgraph = graph.clone_with_edge_removed(graph.edge_list[0])
+        self.assertFalse(subgraph.in_same_component(0, 1))
+        graph.reset_graph()
+        self.assertTrue(graph.in_same_component(0, 2))
+        self.assertFalse(graph.clone_with_edge_removed(graph.edge_list[1]).in_same_component(0, 2))
+        subgraph = graph.clone_with_edge_removed(graph.edge_list[0])
+        self.assertFalse(subgraph.in_same_component(0, 2))
+        self.assertTrue(subgraph.in_same_component(1, 2))
+        subgraph.remove_edge(1)
+        self.assertFalse(subgraph.in_same_component(1, 2))
+        subgraph.undo_edge_removal()
+        self.assertTrue(subgraph.in_same_component(1, 2))
+
+    def test_index_follows_changes(self):
+        random_generator = random.Random(14)
+        for _ in range(100):
+            graph = make_random_graph(random_generator, maximum_vertices=8)
+            graph.enable_component_index()
+            for step in range(20):
+                choice = random_generator.random()
+                if choice < 0.3:
+                    graph.add_edge(random_generator.randrange(graph.number_of_vertices),
+                                   random_generator.randrange(graph.number_of_vertices))
+                elif choice < 0.4:
+                    graph.add_vertex()
+                elif choice < 0.45:
+                    graph.reset_graph()
+                elif graph.number_of_edges:
+                    edge = graph.edge_list[random_generator.randrange(graph.number_of_edges)]
+                    edge.removed = not edge.removed
+                component_list = find_components(graph)
+                with self.subTest(edges=describe_graph(graph), removed=list(graph.edge_removed_array)):
+                    for vertex1 in range(graph.number_of_vertices):
+                        for vertex2 in range(graph.number_of_vertices):
+                            self.assertEqual(graph.in_same_component(vertex1, vertex2),
+                                             vertex2 in component_list[vertex1])
+                    self.assertEqual(graph.component_index.number_of_components, len(set(component_list)))
+
+
+if __name__ == "__main__":
+    unittest.main()
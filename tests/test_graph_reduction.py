@@ -0,0 +1,69 @@
+import random
+import unittest
+from brute_force import describe_graph, find_reliability, make_random_graph, random_cases
+from graph_reduction import ReliabilityReducer
+
+
+class TestReliabilityReducer(unittest.TestCase):
+    def find_origin_edge(self, graph, origin, original_edge_list):
+        """Returns the weight and reliability an origin stands for, collecting its original edges."""
+        if isinstance(origin, int):
+            original_edge_list.append(origin)
+            return graph.edge_weight_array[origin], graph.edge_reliability_array[origin]
+        kind, first, second = origin
+        first_weight, first_reliability = self.find_origin_edge(graph, first, original_edge_list)
+        second_weight, second_reliability = self.find_origin_edge(graph, second, original_edge_list)
+        if kind == 'series':
+            return first_weight + second_weight, first_reliability * second_reliability
+        self.assertEqual(kind, 'parallel')
+        self.assertEqual(first_weight, second_weight)
+        return first_weight, 1 - (1 - first_reliability) * (1 - second_reliability)
+
+    def test_reduction_keeps_the_reliability(self):
+        random_generator = random.Random(4)
+        for graph, diameter, terminal_list in random_cases(300, seed=4, maximum_edges=10):
+            source = random_generator.randrange(graph.number_of_vertices)
+            if terminal_list and source in terminal_list:
+                source = 0
+            expected = find_reliability(graph, diameter, terminal_list, source=source)
+            for keep_failed_edges in [False, True]:
+                reduced_graph, reduced_terminal_list = ReliabilityReducer(
+                    graph, diameter, terminal_list=terminal_list, source=source,
+                    keep_failed_edges=keep_failed_edges).reduce()[:2]
+                with self.subTest(edges=describe_graph(graph), diameter=diameter, terminal_list=terminal_list,
+                                  source=source, keep_failed_edges=keep_failed_edges):
+                    self.assertLessEqual(reduced_graph.number_of_edges, graph.number_of_edges)
+                    self.assertAlmostEqual(find_reliability(reduced_graph, diameter, reduced_terminal_list), expected,
+                                           places=12)
+
+    def test_origins_rebuild_every_reduced_edge(self):
+        for graph, diameter, terminal_list in random_cases(300, seed=5, maximum_edges=10):
+            for keep_failed_edges in [False, True]:
+                reduced_graph, _, edge_origin_list, statistics = ReliabilityReducer(
+                    graph, diameter, terminal_list=terminal_list, keep_failed_edges=keep_failed_edges).reduce()
+                self.assertEqual(len(edge_origin_list), reduced_graph.number_of_edges)
+                self.assertEqual(statistics['reduced_edges'], reduced_graph.number_of_edges)
+                original_edge_list = []
+                for edge_index, origin in enumerate(edge_origin_list):
+                    weight, reliability = self.find_origin_edge(graph, origin, original_edge_list)
+                    self.assertAlmostEqual(reduced_graph.edge_weight_array[edge_index], weight, places=12)
+                    self.assertAlmostEqual(reduced_graph.edge_reliability_array[edge_index], reliability, places=12)
+                self.assertEqual(len(original_edge_list), len(set(original_edge_list)))
+                if not keep_failed_edges:
+                    self.assertTrue(all(graph.edge_reliability_array[edge_index] > 0
+                                        for edge_index in original_edge_list))
+
+    def test_kept_failed_edges_make_the_structure_independent_of_reliabilities(self):
+        random_generator = random.Random(6)
+        for _ in range(100):
+            graph = make_random_graph(random_generator, maximum_edges=10)
+            diameter = random_generator.choice([1, 2, 3, float("inf")])
+            first_origin_list = ReliabilityReducer(graph, diameter, keep_failed_edges=True).reduce().edge_origin_list
+            for edge in graph.edge_list:
+                edge.reliability = random_generator.choice([0.0, 1.0, random_generator.random()])
+            self.assertEqual(ReliabilityReducer(graph, diameter, keep_failed_edges=True).reduce().edge_origin_list,
+                             first_origin_list)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+import random
+import tracemalloc
+import unittest
+import numpy as np
+from brute_force import find_reliability, make_graph
+from graph import Graph
+from monte_carlo import MonteCarloReliability
+
+infinity = float("inf")
+
+
+class TestMonteCarloReliability(unittest.TestCase):
+    def setUp(self):
+        self.graph = make_graph(5, [(0, 1, 0.9, 1.0), (1, 2, 0.8, 1.0), (0, 2, 0.5, 2.0), (2, 3, 0.7, 1.0),
+                                    (0, 3, 0.4, 1.0), (3, 3, 0.5, 1.0)])
+
+    def test_infinite_diameter(self):
+        for reduce in [True, False]:
+            estimator = MonteCarloReliability(self.graph, infinity, terminal_list=[3], reduce=reduce)
+            estimate = estimator.estimate(maximum_number_of_samples=20000, number_of_processes=1, seed=1)
+            expected = find_reliability(self.graph, infinity, [3])
+            self.assertLessEqual(estimate.confidence_interval[0], expected)
+            self.assertGreaterEqual(estimate.confidence_interval[1], expected)
+            disconnected_estimator = MonteCarloReliability(self.graph, infinity, terminal_list=[4], reduce=reduce)
+            self.assertEqual(disconnected_estimator.estimate(maximum_number_of_samples=1000, number_of_processes=1,
+                                                             seed=1).estimate, 0.0)
+
+    def test_matches_brute_force(self):
+        for diameter in [0, 1, 2, 3]:
+            estimator = MonteCarloReliability(self.graph, diameter, terminal_list=[2, 3], reduce=False)
+            estimate = estimator.estimate(maximum_number_of_samples=40000, number_of_processes=1, seed=2)
+            expected = find_reliability(self.graph, diameter, [2, 3])
+            self.assertLessEqual(estimate.confidence_interval[0], expected + 1e-12)
+            self.assertGreaterEqual(estimate.confidence_interval[1], expected - 1e-12)
+
+    def test_seeded_estimate_does_not_depend_on_processes(self):
+        estimator = MonteCarloReliability(self.graph, 2, terminal_list=[3], batch_size=256)
+        estimate_list = [estimator.estimate(target_standard_error=0.01, maximum_number_of_samples=50000,
+                                            samples_per_shard=500, number_of_processes=number_of_processes, seed=3)
+                         for number_of_processes in [1, 2, 3]]
+        self.assertEqual(estimate_list[0], estimate_list[1])
+        self.assertEqual(estimate_list[0], estimate_list[2])
+
+    def test_batches_stay_within_the_memory_budget_on_a_mesh_sized_graph(self):
+        # A 100,000 vertex grid with extra random links, about as large as the meshes this estimator is for.
+        side = 316
+        random_generator = random.Random(5)
+        vertex1_list = [row * side + column for row in range(side) for column in range(side - 1)] + \
+                       [row * side + column for row in range(side - 1) for column in range(side)]
+        vertex2_list = [vertex_index + 1 for vertex_index in vertex1_list[:side * (side - 1)]] + \
+                       [vertex_index + side for vertex_index in vertex1_list[side * (side - 1):]]
+        for _ in range(200000):
+            vertex_index = random_generator.randrange(side * side - 2 * side)
+            vertex1_list.append(vertex_index)
+            vertex2_list.append(vertex_index + random_generator.choice([side + 1, 2, 2 * side]))
+        graph = Graph()
+        graph.using_reliability = True
+        graph.initialize_with_size(side * side)
+        graph.add_edges(vertex1_list, vertex2_list, [0.9] * len(vertex1_list), [1.0] * len(vertex1_list))
+        estimator = MonteCarloReliability(graph, 4, terminal_list=[2 * side + 2], reduce=False)
+        element_count = 2 * graph.number_of_edges + graph.number_of_vertices
+        self.assertGreaterEqual(estimator.batch_size, 1)
+        self.assertLessEqual(estimator.batch_size * element_count, MonteCarloReliability.batch_element_budget)
+        tracemalloc.start()
+        try:
+            successes = estimator.run_samples(np.random.SeedSequence(6), 2 * estimator.batch_size)
+            peak_size = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        self.assertLessEqual(successes, 2 * estimator.batch_size)
+        # A handful of float64 matrices of the budget's size, not one per sample per arc of the default batch.
+        self.assertLess(peak_size, 12 * 8 * MonteCarloReliability.batch_element_budget)
+
+    def test_batch_size(self):
+        self.assertEqual(MonteCarloReliability(self.graph, 2, reduce=False).batch_size,
+                         MonteCarloReliability.maximum_batch_size)
+        self.assertEqual(MonteCarloReliability(self.graph, 2, reduce=False, batch_element_budget=170).batch_size,
+                         10)
+        self.assertEqual(MonteCarloReliability(self.graph, 2, reduce=False, batch_element_budget=1).batch_size, 1)
+        self.assertEqual(MonteCarloReliability(self.graph, 2, batch_size=7).batch_size, 7)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,144 @@
+import asyncio
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+from brute_force import example_graph_path, find_reliability
+from graph import Graph
+from query_context import QueryContext
+from query_service import QueryService
+
+petingi_file = example_graph_path('petingi_graph.csv')
+
+
+class TestQueryService(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.service = QueryService(number_of_processes=1)
+        self.server = await self.service.start_server(port=0)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def asyncTearDown(self):
+        self.server.close()
+        await self.server.wait_closed()
+        self.service.close()
+
+    async def send(self, data):
+        reader, writer = await asyncio.open_connection('127.0.0.1', self.port)
+        writer.write(data)
+        await writer.drain()
+        status = int((await reader.readline()).split()[1])
+        header_dict = {}
+        while True:
+            header_line = (await reader.readline()).decode().strip()
+            if not header_line:
+                break
+            header_name, _, header_value = header_line.partition(':')
+            header_dict[header_name.lower()] = header_value.strip()
+        payload = json.loads(await reader.readexactly(int(header_dict['content-length'])))
+        closed = header_dict['connection'] == 'close' and await reader.read() == b''
+        writer.close()
+        return status, payload, closed
+
+    async def request(self, method, path, body=None):
+        body = b'' if body is None else json.dumps(body).encode()
+        status, payload, _ = await self.send(('%s %s HTTP/1.1\r\nContent-Length: %d\r\nConnection: close\r\n\r\n' % (
+            method, path, len(body))).encode() + body)
+        return status, payload
+
+    async def load_petingi(self):
+        return await self.request('POST', '/graphs', {'name': 'p', 'file': petingi_file, 'layout': 'reliability'})
+
+    async def test_endpoints_match_the_graph(self):
+        status, payload = await self.load_petingi()
+        graph = Graph.create_reliability_graph_from_csv(petingi_file)
+        self.assertEqual((status, payload['edges']), (200, graph.number_of_edges))
+        self.assertEqual(await self.request('GET', '/graphs'),
+                         (200, {'p': {'vertices': graph.number_of_vertices, 'edges': graph.number_of_edges}}))
+        self.assertEqual((await self.request('GET', '/cycles?graph=p'))[1]['result'], graph.check_for_cycles())
+        self.assertEqual((await self.request('GET', '/components?graph=p'))[1]['result'],
+                         QueryContext(graph).find_number_of_components())
+        distance_array, _ = graph.shortest_paths(0)
+        self.assertEqual((await self.request('GET', '/shortest_paths?graph=p'))[1]['result']['distance'],
+                         [None if distance == float("inf") else distance for distance in distance_array])
+        for method in ['factoring', 'enumeration']:
+            status, payload = await self.request('GET', '/reliability?graph=p&diameter=3&terminal_list=1,2&method='
+                                                 + method)
+            self.assertEqual(status, 200)
+            self.assertAlmostEqual(payload['result'], find_reliability(graph, 3, [1, 2]))
+        status, payload = await self.request('GET', '/reliability?graph=p&diameter_list=1,3')
+        self.assertEqual(status, 200)
+        self.assertEqual(len(payload['result']), 2)
+        metric_dict = (await self.request('GET', '/metrics'))[1]
+        self.assertEqual(metric_dict['reliability']['count'], 3)
+
+    async def test_identical_requests_are_coalesced(self):
+        await self.load_petingi()
+        response_list = await asyncio.gather(*[self.request('GET', '/reliability?graph=p&diameter=2')
+                                               for _ in range(5)])
+        self.assertEqual(len({json.dumps(payload['result']) for _, payload in response_list}), 1)
+        self.assertEqual((await self.request('GET', '/metrics'))[1]['reliability']['count'], 5)
+
+    async def test_graph_specification_with_lists_and_unknown_keys(self):
+        status, payload = await self.request('POST', '/graphs', {'name': 'p', 'file': petingi_file,
+                                                                 'layout': 'reliability', 'terminal_list': [0, 1]})
+        self.assertEqual(status, 400)
+        self.assertIn('terminal_list', payload['error'])
+        status, _ = await self.request('POST', '/graphs', {'name': 'p', 'file': petingi_file,
+                                                           'layout': 'reliability', 'cutoff_radius': None})
+        self.assertEqual(status, 200)
+        self.assertEqual((await self.request('GET', '/reliability?graph=p&diameter=2'))[0], 200)
+        self.assertEqual((await self.request('POST', '/graphs', [1, 2]))[0], 400)
+
+    async def test_errors(self):
+        await self.load_petingi()
+        self.assertEqual((await self.request('GET', '/reliability?graph=q&diameter=3'))[0], 404)
+        self.assertEqual((await self.request('GET', '/reliability?graph=p&diam=3'))[0], 400)
+        self.assertEqual((await self.request('GET', '/bogus'))[0], 404)
+        self.assertEqual((await self.request('GET', '/reliability?graph=p&diameter=3&method=guess'))[0], 400)
+
+    async def test_out_of_range_vertices_are_bad_requests(self):
+        await self.load_petingi()
+        stderr = io.StringIO()
+        with contextlib.redirect_stderr(stderr):
+            for path in ['/shortest_paths?graph=p&source=99', '/shortest_paths?graph=p&source=0&target=99',
+                         '/shortest_paths?graph=p&source=-1', '/reliability?graph=p&diameter=2&terminal_list=1,99',
+                         '/reliability?graph=p&diameter=2&terminal_list=-1']:
+                status, payload = await self.request('GET', path)
+                self.assertEqual(status, 400, (path, payload))
+        self.assertEqual(stderr.getvalue(), '')
+
+    async def test_unknown_paths_share_one_metric(self):
+        for path in ['/a', '/b/c', '/', '/graphs']:
+            await self.request('GET', path)
+        metric_dict = (await self.request('GET', '/metrics'))[1]
+        self.assertEqual(sorted(metric_dict), ['graphs', 'unknown'])
+        self.assertEqual(metric_dict['unknown']['count'], 3)
+        self.assertEqual(metric_dict['unknown']['errors'], 3)
+
+    async def test_large_graph_queries_leave_the_event_loop_free(self):
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, 'path.csv')
+            with open(file_path, 'w') as file:
+                file.writelines('%d,%d\n' % (vertex_index, vertex_index + 1) for vertex_index in range(200000))
+            await self.request('POST', '/graphs', {'name': 'path', 'file': file_path})
+        self.service.inline_edge_limit = 1000
+        components_task = asyncio.ensure_future(self.request('GET', '/components?graph=path'))
+        while not self.service.in_flight_dict:
+            await asyncio.sleep(0.001)
+        self.assertEqual((await self.request('GET', '/metrics'))[0], 200)
+        self.assertFalse(components_task.done())
+        self.assertEqual(await components_task, (200, {'result': 1, 'coalesced': False}))
+
+    async def test_malformed_request_line_is_answered_and_closed(self):
+        for data in [b'GET\r\n\r\n', b'GET / HTTP/1.1 extra\r\n\r\n',
+                     b'GET /graphs HTTP/1.1\r\nContent-Length: x\r\n\r\n']:
+            status, payload, closed = await self.send(data)
+            self.assertEqual(status, 400)
+            self.assertTrue(closed)
+        self.assertEqual((await self.request('GET', '/graphs'))[0], 200)
+
+
+if __name__ == "__main__":
+    unittest.main()
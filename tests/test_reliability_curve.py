@@ -0,0 +1,42 @@
+import unittest
+from brute_force import describe_graph, find_reliability, random_cases
+
+infinity = float("inf")
+
+
+class TestReliabilityCurve(unittest.TestCase):
+    diameter_list = [0, 0.5, 1, 2, 2.5, 4, infinity]
+
+    def test_curve_matches_each_diameter(self):
+        for graph, _, terminal_list in random_cases(150, seed=7):
+            expected_list = [find_reliability(graph, diameter, terminal_list) for diameter in self.diameter_list]
+            for reduce in [True, False]:
+                with self.subTest(edges=describe_graph(graph), terminal_list=terminal_list, reduce=reduce):
+                    curve = graph.attain_reliability_curve(self.diameter_list, terminal_list, reduce=reduce)
+                    self.assertEqual(len(curve), len(self.diameter_list))
+                    for reliability, expected in zip(curve, expected_list):
+                        self.assertAlmostEqual(reliability, expected, places=12)
+                    self.assertAlmostEqual(graph.attain_reliability_curve([2, 0, 1], terminal_list, reduce=reduce)[0],
+                                           expected_list[3], places=12)
+
+    def test_empty_diameter_list(self):
+        for graph, _, terminal_list in random_cases(20, seed=9):
+            for reduce in [True, False]:
+                with self.subTest(edges=describe_graph(graph), terminal_list=terminal_list, reduce=reduce):
+                    self.assertEqual(graph.attain_reliability_curve([], terminal_list, reduce=reduce), [])
+
+    def test_step_function(self):
+        for graph, _, terminal_list in random_cases(150, seed=8):
+            step_list = graph.attain_reliability_curve(terminal_list=terminal_list)
+            with self.subTest(edges=describe_graph(graph), terminal_list=terminal_list, step_list=step_list):
+                previous_reliability = 0.0
+                for diameter, reliability in step_list:
+                    self.assertGreater(reliability, previous_reliability)
+                    self.assertAlmostEqual(reliability, find_reliability(graph, diameter, terminal_list), places=12)
+                    previous_reliability = reliability
+                self.assertAlmostEqual(previous_reliability, find_reliability(graph, infinity, terminal_list),
+                                       places=12)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+import unittest
+from brute_force import describe_graph, example_graph_path, find_reliability, make_graph, random_cases
+from graph import Graph
+from query_context import QueryContext
+
+infinity = float("inf")
+
+
+class TestReliabilityEngine(unittest.TestCase):
+    def test_disconnected_terminal_with_infinite_diameter(self):
+        graph = make_graph(4, [(0, 1, 0.5, 1.0), (1, 2, 0.5, 1.0)])
+        self.assertEqual(graph.attain_reliability_by_factoring(infinity), 0.0)
+        self.assertEqual(graph.attain_reliability_by_factoring(infinity, reduce=False), 0.0)
+        self.assertEqual(graph.attain_reliability_by_factoring(infinity, [2, 3]), 0.0)
+        self.assertEqual(QueryContext(graph).attain_reliability(infinity, [3]), 0.0)
+        self.assertEqual(graph.attain_reliability_by_factoring(infinity, [2]), 0.25)
+
+    def test_infinite_diameter_matches_enumeration_on_example_graph(self):
+        graph = Graph.create_reliability_graph_from_csv(example_graph_path('half_success_mini_graph.csv'))
+        self.assertEqual(graph.attain_reliability_for_diameter(infinity), 0.5)
+        self.assertEqual(graph.attain_reliability_by_factoring(infinity), 0.5)
+
+    def test_factoring_matches_brute_force(self):
+        for graph, diameter, terminal_list in random_cases(200):
+            expected = find_reliability(graph, diameter, terminal_list)
+            for reduce in [True, False]:
+                with self.subTest(edges=describe_graph(graph), diameter=diameter, terminal_list=terminal_list,
+                                  reduce=reduce):
+                    reliability = graph.attain_reliability_by_factoring(diameter, terminal_list, reduce=reduce)
+                    self.assertAlmostEqual(reliability, expected, places=12)
+
+    def test_enumeration_matches_brute_force(self):
+        for graph, diameter, terminal_list in random_cases(100, seed=1):
+            with self.subTest(diameter=diameter, terminal_list=terminal_list):
+                self.assertAlmostEqual(graph.attain_reliability_for_diameter(diameter, terminal_list),
+                                       find_reliability(graph, diameter, terminal_list), places=12)
+
+    def test_removed_edges_are_ignored(self):
+        graph = make_graph(3, [(0, 1, 0.5, 1.0), (1, 2, 0.5, 1.0), (0, 2, 0.5, 1.0)])
+        graph.edge_list[2].removed = True
+        self.assertAlmostEqual(graph.attain_reliability_by_factoring(2), 0.25)
+        self.assertAlmostEqual(graph.attain_reliability_by_factoring(2, reduce=False), 0.25)
+
+    def test_budget_returns_certified_bounds(self):
+        graph = make_graph(4, [(0, 1, 0.5, 1.0), (1, 3, 0.5, 1.0), (0, 2, 0.5, 1.0), (2, 3, 0.5, 1.0),
+                               (1, 2, 0.5, 1.0)])
+        expected = find_reliability(graph, 3)
+        bounds = graph.attain_reliability_by_factoring(3, node_budget=2)
+        self.assertLessEqual(bounds.lower, expected + 1e-12)
+        self.assertGreaterEqual(bounds.upper, expected - 1e-12)
+        complete_bounds = graph.attain_reliability_by_factoring(3, node_budget=10 ** 6)
+        self.assertTrue(complete_bounds.complete)
+        self.assertAlmostEqual(complete_bounds.lower, expected)
+
+    def test_parallel_enumeration_matches_serial(self):
+        for graph, diameter, terminal_list in random_cases(40, seed=2):
+            expected = graph.attain_reliability_for_diameter(diameter, terminal_list)
+            for number_of_processes, split_depth in [(1, 0), (2, 0), (2, 1), (3, 2), (2, None), (None, None)]:
+                with self.subTest(edges=describe_graph(graph), diameter=diameter, terminal_list=terminal_list,
+                                  number_of_processes=number_of_processes, split_depth=split_depth):
+                    reliability = graph.attain_reliability_for_diameter_in_parallel(
+                        diameter, terminal_list, number_of_processes=number_of_processes, split_depth=split_depth)
+                    self.assertEqual(reliability, expected)
+
+    def test_enumeration_bounds_converge(self):
+        graph = Graph.create_reliability_graph_from_csv(example_graph_path('petingi_graph.csv'))
+        context = QueryContext(graph)
+        expected = graph.attain_reliability_for_diameter(2, [1], context=context)
+        self.assertAlmostEqual(expected, 0.859375)
+        self.assertAlmostEqual(context.instrumentation.get_bounds().upper, expected, places=12)
+        node_count = context.instrumentation.counter_dict['subgraphs_explored']
+        previous_bounds = None
+        for node_budget in range(1, node_count + 1, 41):
+            bounds = graph.attain_reliability_for_diameter(2, [1], node_budget=node_budget, context=context)
+            self.assertLessEqual(bounds.lower, expected + 1e-12)
+            self.assertGreaterEqual(bounds.upper, expected - 1e-12)
+            if previous_bounds is not None:
+                self.assertGreaterEqual(bounds.lower, previous_bounds.lower - 1e-12)
+                self.assertLessEqual(bounds.upper, previous_bounds.upper + 1e-12)
+            previous_bounds = bounds
+        for graph, diameter, terminal_list in random_cases(100):
+            context = QueryContext(graph)
+            expected = find_reliability(graph, diameter, terminal_list)
+            with self.subTest(edges=describe_graph(graph), diameter=diameter, terminal_list=terminal_list):
+                graph.attain_reliability_for_diameter(diameter, terminal_list, context=context)
+                bounds = context.instrumentation.get_bounds()
+                self.assertAlmostEqual(bounds.lower, expected, places=12)
+                self.assertAlmostEqual(bounds.upper, expected, places=12)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+import random
+import unittest
+from brute_force import describe_graph, find_derivatives, find_reliability, make_random_graph, random_cases
+
+
+class TestReliabilitySensitivity(unittest.TestCase):
+    def test_derivatives_match_brute_force(self):
+        for graph, diameter, terminal_list in random_cases(150, seed=9):
+            expected_list = find_derivatives(graph, diameter, terminal_list)
+            for reduce in [True, False]:
+                with self.subTest(edges=describe_graph(graph), diameter=diameter, terminal_list=terminal_list,
+                                  reduce=reduce):
+                    reliability, derivative_list = graph.attain_reliability_sensitivity(diameter, terminal_list,
+                                                                                        reduce=reduce)
+                    self.assertAlmostEqual(reliability, find_reliability(graph, diameter, terminal_list), places=12)
+                    self.assertEqual(len(derivative_list), graph.number_of_edges)
+                    for derivative, expected in zip(derivative_list, expected_list):
+                        self.assertAlmostEqual(derivative, expected, places=12)
+
+    def test_derivatives_match_finite_differences(self):
+        step = 1e-6
+        for graph, diameter, terminal_list in random_cases(60, seed=10):
+            _, derivative_list = graph.attain_reliability_sensitivity(diameter, terminal_list)
+            for edge_index, edge in enumerate(graph.edge_list):
+                reliability = edge.reliability
+                edge.reliability = min(1.0, reliability + step)
+                upper_reliability = graph.attain_reliability_by_factoring(diameter, terminal_list)
+                edge.reliability = max(0.0, reliability - step)
+                lower_reliability = graph.attain_reliability_by_factoring(diameter, terminal_list)
+                edge.reliability = reliability
+                difference = (upper_reliability - lower_reliability) / (min(1.0, reliability + step) -
+                                                                        max(0.0, reliability - step))
+                with self.subTest(edges=describe_graph(graph), diameter=diameter, terminal_list=terminal_list,
+                                  edge_index=edge_index):
+                    self.assertAlmostEqual(derivative_list[edge_index], difference, places=6)
+
+    def test_update_reliabilities_reuses_the_factoring(self):
+        random_generator = random.Random(11)
+        for _ in range(60):
+            graph = make_random_graph(random_generator)
+            diameter = random_generator.choice([1, 2, 3, float("inf")])
+            sensitivity = graph.prepare_reliability_sensitivity(diameter)
+            node_count = sensitivity.node_count
+            for _ in range(3):
+                edge_reliability_dict = {edge_index: random_generator.choice([0.0, 1.0, random_generator.random()])
+                                         for edge_index in range(graph.number_of_edges)
+                                         if random_generator.random() < 0.5}
+                reliability, derivative_list = sensitivity.update_reliabilities(edge_reliability_dict)
+                with self.subTest(edges=describe_graph(graph), diameter=diameter):
+                    self.assertEqual(sensitivity.node_count, node_count)
+                    self.assertAlmostEqual(reliability, find_reliability(graph, diameter), places=12)
+                    for derivative, expected in zip(derivative_list, find_derivatives(graph, diameter)):
+                        self.assertAlmostEqual(derivative, expected, places=12)
+
+    def test_removed_edges_have_no_derivative(self):
+        for graph, diameter, terminal_list in random_cases(40, seed=12):
+            if not graph.number_of_edges:
+                continue
+            graph.edge_list[0].removed = True
+            reliability, derivative_list = graph.attain_reliability_sensitivity(diameter, terminal_list)
+            self.assertEqual(derivative_list[0], 0.0)
+            self.assertAlmostEqual(reliability, find_reliability(graph, diameter, terminal_list), places=12)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,39 @@
+import os
+import tempfile
+import unittest
+from brute_force import make_graph
+from interface import Interface
+from result_cache import ResultCache
+
+
+class TestResultCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.result_cache = ResultCache(os.path.join(self.directory.name, 'results.sqlite3'))
+
+    def tearDown(self):
+        self.result_cache.close()
+        self.directory.cleanup()
+
+    def test_methods_are_cached_apart(self):
+        graph = make_graph(3, [(0, 1, 0.5, 1.0), (1, 2, 0.5, 1.0)])
+        graph.result_cache = self.result_cache
+        graph.attain_reliability_by_factoring(2)
+        self.result_cache.put(self.result_cache.make_key(graph, 'reliability', ('factoring', 2.0, [2])), 0.75)
+        self.assertEqual(graph.attain_reliability_by_factoring(2), 0.75)
+        self.assertEqual(graph.attain_reliability_for_diameter(2), 0.25)
+
+    def test_cached_result_is_reused(self):
+        graph = make_graph(3, [(0, 1, 0.5, 1.0), (1, 2, 0.5, 1.0)])
+        graph.result_cache = self.result_cache
+        self.assertEqual(graph.attain_reliability_by_factoring(2), 0.25)
+        self.assertEqual(graph.attain_reliability_by_factoring(2), 0.25)
+        self.assertEqual(self.result_cache.get_statistics()['hits'], 1)
+
+    def test_interface_caches_only_when_asked(self):
+        self.assertIsNone(Interface().result_cache)
+        self.assertIs(Interface(self.result_cache).result_cache, self.result_cache)
+
+
+if __name__ == "__main__":
+    unittest.main()
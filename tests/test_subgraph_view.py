@@ -0,0 +1,75 @@
+import random
+import unittest
+from brute_force import describe_graph, find_distances, make_random_graph
+from query_context import QueryContext
+from subgraph_view import SubgraphView
+
+
+def find_all_distances(graph):
+    """Returns the distance lists from every vertex over the edges that are not removed."""
+    up_edge_list = [(graph.edge_vertex1_array[edge_index], graph.edge_vertex2_array[edge_index],
+                     graph.edge_weight_array[edge_index]) for edge_index in range(graph.number_of_edges)
+                    if not graph.edge_removed_array[edge_index]]
+    return [find_distances(graph.number_of_vertices, up_edge_list, source)
+            for source in range(graph.number_of_vertices)]
+
+
+class TestSubgraphView(unittest.TestCase):
+    def test_removals_undo_and_leave_the_graph_alone(self):
+        random_generator = random.Random(8)
+        for _ in range(60):
+            graph = make_random_graph(random_generator, maximum_vertices=7, maximum_edges=10)
+            for edge in graph.edge_list:
+                if random_generator.random() < 0.2:
+                    edge.removed = True
+            graph.enable_component_index()
+            component_index = graph.component_index
+            graph_removed_array = bytearray(graph.edge_removed_array)
+            graph_distance_list = find_all_distances(graph)
+            view = SubgraphView(graph)
+            snapshot_list = []
+            for step in range(16):
+                if graph.number_of_edges and (not snapshot_list or random_generator.random() < 0.6):
+                    snapshot_list.append(bytearray(view.edge_removed_array))
+                    edge_index = random_generator.randrange(graph.number_of_edges)
+                    view.remove_edge(edge_index)
+                    self.assertTrue(view.edge_removed_array[edge_index])
+                elif snapshot_list:
+                    view.undo_edge_removal()
+                    self.assertEqual(view.edge_removed_array, snapshot_list.pop())
+                distance_list = find_all_distances(view)
+                with self.subTest(edges=describe_graph(graph), removed=list(view.edge_removed_array)):
+                    for source in range(graph.number_of_vertices):
+                        self.assertEqual(list(view.shortest_paths(source)[0]), distance_list[source])
+                        for vertex_index in range(graph.number_of_vertices):
+                            self.assertEqual(view.in_same_component(source, vertex_index),
+                                             distance_list[source][vertex_index] < float("inf"))
+                    self.assertEqual(QueryContext(view).find_number_of_components(),
+                                     len({frozenset(vertex_index for vertex_index, distance in enumerate(distances)
+                                                    if distance < float("inf")) for distances in distance_list}))
+                    self.assertEqual(graph.edge_removed_array, graph_removed_array)
+                    self.assertIs(graph.component_index, component_index)
+            while snapshot_list:
+                view.undo_edge_removal()
+                self.assertEqual(view.edge_removed_array, snapshot_list.pop())
+            self.assertEqual(view.edge_removed_array, graph_removed_array)
+            self.assertEqual(find_all_distances(graph), graph_distance_list)
+            for source in range(graph.number_of_vertices):
+                self.assertEqual(list(graph.shortest_paths(source)[0]), graph_distance_list[source])
+                for vertex_index in range(graph.number_of_vertices):
+                    self.assertEqual(graph.in_same_component(source, vertex_index),
+                                     graph_distance_list[source][vertex_index] < float("inf"))
+
+    def test_structure_cannot_change(self):
+        graph = make_random_graph(random.Random(2))
+        view = SubgraphView(graph)
+        for change in [view.add_vertex, lambda: view.add_edge(0, 1), lambda: view.add_edges([0], [1], [1.0], [1.0])]:
+            with self.assertRaises(TypeError):
+                change()
+        self.assertEqual((view.number_of_vertices, view.number_of_edges),
+                         (graph.number_of_vertices, graph.number_of_edges))
+        self.assertEqual(len(graph.edge_vertex1_array), graph.number_of_edges)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+import unittest
+import numpy as np
+from brute_force import describe_graph
+from wireless_mesh import WirelessMeshBuilder
+
+
+def find_pairs(position_array, cutoff_radius):
+    """Returns {(vertex1, vertex2): distance} for every pair within the cutoff by measuring every pair."""
+    pair_dict = {}
+    for vertex1 in range(len(position_array)):
+        for vertex2 in range(vertex1 + 1, len(position_array)):
+            difference = position_array[vertex2] - position_array[vertex1]
+            distance = float(np.hypot(difference[0], difference[1]))
+            if distance < cutoff_radius:
+                pair_dict[vertex1, vertex2] = distance
+    return pair_dict
+
+
+class TestWirelessMeshBuilder(unittest.TestCase):
+    def test_edges_match_every_pair_scan(self):
+        random_generator = np.random.default_rng(0)
+        for scale in [1e-3, 1.0, 1e4]:
+            for case_number in range(6):
+                number_of_points = int(random_generator.integers(0, 120))
+                position_array = random_generator.uniform(-40, 40, (number_of_points, 2)) * scale
+                if case_number % 2:
+                    # Clusters and repeated points put many pairs in the same cell.
+                    position_array = np.round(position_array / (10 * scale)) * (10 * scale)
+                builder = WirelessMeshBuilder(reliability_coefficient=0.01 / scale ** 2)
+                expected_dict = find_pairs(position_array, builder.cutoff_radius)
+                for batch_size in [1, 2, 7, 1000000]:
+                    builder.batch_size = batch_size
+                    with self.subTest(scale=scale, case_number=case_number, batch_size=batch_size):
+                        vertex1_array, vertex2_array, distance_array = builder.find_edges(position_array)
+                        pair_list = list(zip(vertex1_array.tolist(), vertex2_array.tolist()))
+                        self.assertEqual(pair_list, sorted(expected_dict))
+                        for pair, distance in zip(pair_list, distance_array.tolist()):
+                            self.assertAlmostEqual(distance, expected_dict[pair], delta=1e-12 * scale)
+
+    def test_build_graph(self):
+        builder = WirelessMeshBuilder(reliability_coefficient=0.25)
+        graph = builder.build_graph([[0, 0], [1, 0], [1, 1], [5, 5]])
+        self.assertEqual(graph.number_of_vertices, 4)
+        edge_list = describe_graph(graph)
+        self.assertEqual([edge[:2] for edge in edge_list], [(0, 1), (0, 2), (1, 2)])
+        self.assertAlmostEqual(edge_list[1][2], 0.5)
+        self.assertAlmostEqual(edge_list[1][3], 2 ** 0.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,11 +1,65 @@
-"""Vertex class using an adjacency list."""
+"""Vertex view onto a graph's vertex arrays and traversal state."""
+from collections.abc import Sequence
 
 
 class Vertex():
-    def __init__(self, label, position=None):
+    """A single vertex of a graph, reading and writing the graph's arrays and its traversal state."""
+    def __init__(self, graph, label):
+        self.graph = graph
         self.label = label
-        self.adjacency_list = []
-        self.visited = False
-        self.parent = -1
-        self.value = float("inf")
-        self.position = position
+
+    @property
+    def adjacency_list(self):
+        graph = self.graph
+        graph.build_adjacency_arrays()
+        adjacency_list = []
+        for offset in range(graph.adjacency_offset_array[self.label], graph.adjacency_offset_array[self.label + 1]):
+            if not graph.edge_removed_array[graph.adjacency_edge_array[offset]]:
+                adjacency_list.append(graph.adjacency_vertex_array[offset])
+        return adjacency_list
+
+    @property
+    def visited(self):
+        return self.graph.query_context.is_visited(self.label)
+
+    @visited.setter
+    def visited(self, visited):
+        self.graph.query_context.set_visited(self.label, visited)
+
+    @property
+    def parent(self):
+        return self.graph.query_context.get_parent(self.label)
+
+    @parent.setter
+    def parent(self, parent):
+        self.graph.query_context.set_parent(self.label, parent)
+
+    @property
+    def value(self):
+        return self.graph.query_context.get_distance(self.label)
+
+    @value.setter
+    def value(self, value):
+        self.graph.query_context.set_distance(self.label, value)
+
+    @property
+    def position(self):
+        return self.graph.get_vertex_position(self.label)
+
+
+class VertexList(Sequence):
+    """A list-like view of every vertex in a graph."""
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __len__(self):
+        return self.graph.number_of_vertices
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [Vertex(self.graph, label) for label in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('vertex index out of range')
+        return Vertex(self.graph, index)
@@ -0,0 +1,110 @@
+"""Builds wireless mesh graphs from 2D vertex coordinates."""
+import math
+from array import array
+import numpy as np
+from graph import Graph
+
+
+class WirelessMeshBuilder:
+    """
+    Connects every pair of vertices closer than a cutoff radius.
+
+    An edge's weight is the distance between its vertices and its reliability is
+    1 - reliability_coefficient * distance**2. The cutoff is where that reliability reaches the
+    reliability threshold (zero by default), or a smaller radius if one is given. Vertices are bucketed
+    into a uniform grid of cutoff-sized cells, so only pairs in the same or adjacent cells are measured,
+    and the distances are computed in vectorized batches.
+    """
+    # A cell's own points and the four neighbors ahead of it cover every adjacent pair exactly once.
+    neighbor_cell_offset_list = [(0, 0), (0, 1), (1, -1), (1, 0), (1, 1)]
+
+    def __init__(self, reliability_coefficient=0.001, reliability_threshold=0.0, cutoff_radius=None,
+                 batch_size=1000000):
+        self.reliability_coefficient = reliability_coefficient
+        self.reliability_threshold = reliability_threshold
+        self.cutoff_radius = math.sqrt((1 - reliability_threshold) / reliability_coefficient)
+        if cutoff_radius is not None:
+            self.cutoff_radius = min(self.cutoff_radius, cutoff_radius)
+        self.batch_size = batch_size
+
+    def find_edges(self, position_array):
+        """Returns the vertex1, vertex2 and distance arrays of every pair within the cutoff, sorted by vertex."""
+        position_array = np.asarray(position_array, dtype=np.float64).reshape(-1, 2)
+        vertex1_part_list = []
+        vertex2_part_list = []
+        distance_part_list = []
+        if len(position_array) > 1 and self.cutoff_radius > 0:
+            cell_array = np.floor(position_array / self.cutoff_radius).astype(np.int64)
+            cell_array -= cell_array.min(axis=0) - 1
+            row_span = int(cell_array[:, 1].max()) + 2
+            cell_key_array = cell_array[:, 0] * row_span + cell_array[:, 1]
+            point_order = np.argsort(cell_key_array, kind='stable')
+            sorted_key_array = cell_key_array[point_order]
+            sorted_position_array = position_array[point_order]
+            cell_key_list, cell_start_array, cell_count_array = np.unique(sorted_key_array, return_index=True,
+                                                                          return_counts=True)
+            point_cell_array = np.searchsorted(cell_key_list, sorted_key_array)
+            for row_offset, column_offset in self.neighbor_cell_offset_list:
+                neighbor_key_array = cell_key_list + row_offset * row_span + column_offset
+                neighbor_cell_array = np.searchsorted(cell_key_list, neighbor_key_array)
+                neighbor_cell_array[neighbor_cell_array == len(cell_key_list)] = 0
+                has_neighbor_array = cell_key_list[neighbor_cell_array] == neighbor_key_array
+                point_neighbor_array = neighbor_cell_array[point_cell_array]
+                pair_count_array = np.where(has_neighbor_array[point_cell_array],
+                                            cell_count_array[point_neighbor_array], 0)
+                for start, stop in self.split_batches(pair_count_array):
+                    first_array, second_array = self.expand_pairs(
+                        start, pair_count_array[start:stop], cell_start_array[point_neighbor_array[start:stop]])
+                    if row_offset == 0 and column_offset == 0:
+                        keep_array = second_array > first_array
+                        first_array = first_array[keep_array]
+                        second_array = second_array[keep_array]
+                    difference_array = sorted_position_array[second_array] - sorted_position_array[first_array]
+                    distance_array = np.hypot(difference_array[:, 0], difference_array[:, 1])
+                    keep_array = distance_array < self.cutoff_radius
+                    vertex1_part_list.append(point_order[first_array[keep_array]])
+                    vertex2_part_list.append(point_order[second_array[keep_array]])
+                    distance_part_list.append(distance_array[keep_array])
+        if not vertex1_part_list:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0)
+        vertex1_array = np.concatenate(vertex1_part_list)
+        vertex2_array = np.concatenate(vertex2_part_list)
+        distance_array = np.concatenate(distance_part_list)
+        low_array = np.minimum(vertex1_array, vertex2_array)
+        high_array = np.maximum(vertex1_array, vertex2_array)
+        edge_order = np.lexsort((high_array, low_array))
+        return low_array[edge_order], high_array[edge_order], distance_array[edge_order]
+
+    def split_batches(self, pair_count_array):
+        """Splits the points into consecutive ranges producing about batch_size candidate pairs each."""
+        cumulative_array = np.cumsum(pair_count_array)
+        start = 0
+        while start < len(pair_count_array):
+            already = cumulative_array[start - 1] if start else 0
+            stop = int(np.searchsorted(cumulative_array, already + self.batch_size, side='right'))
+            stop = max(stop, start + 1)
+            yield start, stop
+            start = stop
+
+    @staticmethod
+    def expand_pairs(first_start, pair_count_array, second_start_array):
+        """Lists (point, neighbor cell point) index pairs for a consecutive range of sorted points."""
+        first_array = np.repeat(np.arange(first_start, first_start + len(pair_count_array)), pair_count_array)
+        run_start_array = np.repeat(np.cumsum(pair_count_array) - pair_count_array, pair_count_array)
+        second_array = (np.repeat(second_start_array, pair_count_array) +
+                        np.arange(len(first_array)) - run_start_array)
+        return first_array, second_array
+
+    def build_graph(self, position_array, graph_class=Graph):
+        """Creates a reliability and weight graph with a vertex at each position."""
+        position_array = np.asarray(position_array, dtype=np.float64).reshape(-1, 2)
+        graph = graph_class()
+        graph.using_reliability = True
+        graph.using_weight = True
+        graph.initialize_with_size(len(position_array))
+        graph.vertex_position_array = array('d', position_array.ravel().tolist())
+        vertex1_array, vertex2_array, distance_array = self.find_edges(position_array)
+        reliability_array = 1 - self.reliability_coefficient * distance_array ** 2
+        graph.add_edges(vertex1_array.tolist(), vertex2_array.tolist(), reliability_array.tolist(),
+                        distance_array.tolist())
+        return graph